@@ -1,7 +1,15 @@
 from openai import OpenAI
 import os
+import time
+import logging
 import numpy as np
+from typing import List, Optional
 from dotenv import load_dotenv
+from app.core.metrics import inc, observe, EMBEDDING_SECONDS, EMBEDDING_ERRORS
+from app.core.tracing import span
+from app.core.logs import record_stage, error_fields
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -20,12 +28,50 @@ def get_embedding(text: str, model_type: str = "passage") -> np.ndarray:
         return np.array([])
         
     model_name = f"solar-embedding-1-large-{model_type}"
-    try:
-        response = client.embeddings.create(
-            input=text,
-            model=model_name
-        )
-        return np.array(response.data[0].embedding, dtype='float32')
-    except Exception as e:
-        print(f"Error generating embedding: {e}")
-        return np.array([])
+    start = time.perf_counter()
+    with span("upstage.embedding", model=model_name, chars=len(text)) as s:
+        try:
+            response = client.embeddings.create(
+                input=text,
+                model=model_name
+            )
+            return np.array(response.data[0].embedding, dtype='float32')
+        except Exception as e:
+            inc(EMBEDDING_ERRORS, model_type)
+            s.record_exception(e)
+            logger.error("Error generating embedding", extra={"model": model_name, "error": str(e), **error_fields(e)})
+            return np.array([])
+        finally:
+            elapsed = time.perf_counter() - start
+            observe(EMBEDDING_SECONDS, elapsed, model_type)
+            record_stage("embedding", elapsed)
+
+def get_embeddings(texts: List[str], model_type: str = "passage") -> Optional[np.ndarray]:
+    """
+    Batch version of get_embedding: one API call for many texts.
+    Returns a (len(texts), dim) float32 matrix, or None if the request failed.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype='float32')
+
+    model_name = f"solar-embedding-1-large-{model_type}"
+    start = time.perf_counter()
+    with span("upstage.embedding", model=model_name, batch=len(texts), chars=sum(len(t) for t in texts)) as s:
+        try:
+            response = client.embeddings.create(
+                input=texts,
+                model=model_name
+            )
+            # 응답 순서가 입력 순서와 다를 수 있으므로 index 기준으로 정렬
+            data = sorted(response.data, key=lambda item: item.index)
+            return np.array([item.embedding for item in data], dtype='float32')
+        except Exception as e:
+            inc(EMBEDDING_ERRORS, model_type)
+            s.record_exception(e)
+            logger.error("Error generating embeddings", extra={"model": model_name, "batch": len(texts),
+                                                               "error": str(e), **error_fields(e)})
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            observe(EMBEDDING_SECONDS, elapsed, model_type)
+            record_stage("embedding", elapsed)
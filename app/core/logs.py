@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import queue
+import uuid
+import atexit
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from app.core.tracing import TraceContextFilter
+
+# ==========================================
+# 📝 Structured Logging (non-blocking)
+# ==========================================
+# app.* 로거 -> QueueHandler (호출 스레드에서는 record 를 큐에 넣기만 함) -> QueueListener 스레드가 출력.
+# 큐가 가득 차면 기다리지 않고 버림 (dropped 카운트) -> 부하 상황에서도 로그가 요청 지연을 늘리지 않음.
+#   LOG_FORMAT   json (기본, 한 줄에 JSON 하나) / text
+#   LOG_LEVEL    app.* 기본 레벨 (INFO)
+#   LOG_LEVELS   모듈별 레벨 "app.repair=DEBUG,app.core.embedding=WARNING"
+# 모든 record 에 request_id / trace_id / span_id, logger.x(..., extra={...}) 의 필드가 함께 기록됨.
+# 요청 단위로 단계별 시간(record_stage)을 모아, 요청 전체 또는 단계가 임계값을 넘으면 "slow request" 경고.
+#   SLOW_REQUEST_MS  요청 전체 임계값 (기본 2000)
+#   SLOW_STAGE_MS    단계별 임계값 "clip_encode=1000,analysis=8000,text=500"
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+SLOW_STAGE_MS = os.getenv("SLOW_STAGE_MS", "")
+
+# LogRecord 기본 속성 (이외의 속성은 extra 필드로 출력)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_request_context: ContextVar[Optional[dict]] = ContextVar("request_context", default=None)
+_listener = None
+_queue_handler = None
+
+logger = logging.getLogger("app.requests")
+
+def parse_levels(spec: str) -> dict:
+    """'app.repair=DEBUG,app.core=WARNING' -> {logger 이름: 레벨}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        levels[name.strip()] = value.strip().upper()
+    return levels
+
+def parse_thresholds(spec: str) -> dict:
+    """'clip_encode=1000,text=500' -> {단계: 임계값(ms)}"""
+    return {name: float(value) for name, value in parse_levels(spec).items()}
+
+SLOW_STAGE_THRESHOLDS = parse_thresholds(SLOW_STAGE_MS)
+
+def classify_error(exc: BaseException) -> str:
+    """외부 API / 파일 오류 분류 (로그 검색, 알림 규칙용)"""
+    name = type(exc).__name__.lower()
+    message = str(exc).lower()
+    if isinstance(exc, TimeoutError) or "timeout" in name or "timed out" in message:
+        return "timeout"
+    if "ratelimit" in name or "429" in message or "rate limit" in message or "quota" in message:
+        return "rate_limit"
+    if "authentication" in name or "permission" in name or "401" in message or "403" in message or "api key" in message:
+        return "auth"
+    if isinstance(exc, (ConnectionError, OSError)) and not isinstance(exc, FileNotFoundError) or "connection" in name:
+        return "network"
+    if isinstance(exc, FileNotFoundError):
+        return "not_found"
+    if isinstance(exc, (ValueError, KeyError, json.JSONDecodeError)):
+        return "invalid_response"
+    return "internal"
+
+def error_fields(exc: BaseException) -> dict:
+    return {"error_type": type(exc).__name__, "error_class": classify_error(exc)}
+
+# ---------- 요청 컨텍스트 ----------
+
+def start_request(request_id: Optional[str] = None) -> tuple:
+    """요청 컨텍스트 시작. Returns (context, reset token)"""
+    context = {"request_id": request_id or uuid.uuid4().hex[:16], "stages": {}}
+    return context, _request_context.set(context)
+
+def end_request(token):
+    _request_context.reset(token)
+
+def current_request_id() -> Optional[str]:
+    context = _request_context.get()
+    return context["request_id"] if context is not None else None
+
+def record_stage(name: str, seconds: float):
+    """현재 요청의 단계별 시간 누적 (요청 밖이면 무시). 스레드풀 작업도 같은 dict 에 기록됨"""
+    context = _request_context.get()
+    if context is not None:
+        stages = context["stages"]
+        stages[name] = stages.get(name, 0.0) + seconds
+
+def slow_stages(stages: dict) -> dict:
+    return {name: round(t * 1000, 1) for name, t in stages.items()
+            if name in SLOW_STAGE_THRESHOLDS and t * 1000 > SLOW_STAGE_THRESHOLDS[name]}
+
+def log_request(context: dict, method: str, path: str, status: int, duration: float):
+    """요청 종료 로그: 느리거나 (임계값 초과) 5xx 이면 WARNING / ERROR, 그 외 DEBUG"""
+    duration_ms = round(duration * 1000, 1)
+    stages_ms = {name: round(t * 1000, 1) for name, t in context["stages"].items()}
+    over = slow_stages(context["stages"])
+    fields = {"method": method, "path": path, "status": status, "duration_ms": duration_ms, "stages_ms": stages_ms}
+    if status >= 500:
+        logger.error("request failed", extra=fields)
+    elif duration_ms > SLOW_REQUEST_MS or over:
+        logger.warning("slow request", extra={**fields, "slow_stages_ms": over})
+    else:
+        logger.debug("request", extra=fields)
+
+# ---------- 핸들러 / 포맷 ----------
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or "-"
+        return True
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key not in ("request_id", "trace_id", "span_id")}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "trace_id": getattr(record, "trace_id", "-"),
+            "span_id": getattr(record, "span_id", "-"),
+        }
+        entry.update(_extra_fields(record))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [req=%(request_id)s trace=%(trace_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extra = _extra_fields(record)
+        if extra:
+            line += " " + " ".join(f"{key}={json.dumps(value, ensure_ascii=False, default=str)}" for key, value in extra.items())
+        return line
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    큐가 가득 차면 블로킹 대신 버림. context 필드(filter)와 메시지 / 예외 문자열(prepare)은
+    호출 스레드에서 채우고, 포맷 / 출력만 listener 스레드에서 수행.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.addFilter(TraceContextFilter())
+        self.addFilter(RequestContextFilter())
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(stream=None) -> DroppingQueueHandler:
+    """app.* 로거에 비동기 구조화 로그 설정 (여러 번 호출해도 한 번만 설정)"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger("app")
+    root.addHandler(_queue_handler)
+    root.setLevel(LOG_LEVEL.upper())
+    root.propagate = False
+    for name, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    return _queue_handler
+
+def shutdown_logging():
+    """큐에 남은 로그 출력 후 listener 종료 (프로세스 종료 시 자동 호출)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger("app").removeHandler(_queue_handler)
+        _queue_handler = None
+
+async def log_requests(request: Request, call_next):
+    """FastAPI http middleware: 요청 id (X-Request-Id 헤더 또는 생성) + 단계별 시간 수집, 종료 시 log_request"""
+    context, token = start_request(request.headers.get("X-Request-Id"))
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        log_request(context, request.method, request.url.path, status, time.perf_counter() - start)
+        end_request(token)
+    response.headers["X-Request-Id"] = context["request_id"]
+    return response
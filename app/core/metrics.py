@@ -0,0 +1,131 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+
+# ==========================================
+# 📈 Prometheus Metrics
+# ==========================================
+# METRICS_ENABLED=1 이면 /metrics 로 노출 (기본 비활성). 비활성 시 기록 함수는 플래그 확인 후 바로 반환.
+# 계측 지점은 observe / inc / timed 만 사용 -> prometheus_client 가 없어도 import 가능 (기록 안 함).
+# 매칭 워커 프로세스(MATCH_WORKERS > 0)의 기록까지 모으려면 PROMETHEUS_MULTIPROC_DIR 을 지정
+# (prometheus_client multiprocess 모드, 서버 시작 전 빈 디렉토리).
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+# 이벤트 루프 지연 측정 주기 (초)
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+if METRICS_ENABLED and prometheus_client is None:
+    logger.warning("METRICS_ENABLED=1 but prometheus_client is not installed; metrics disabled")
+    METRICS_ENABLED = False
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (0, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+class _NoopMetric:
+    def labels(self, *labels):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+def _histogram(name: str, doc: str, labels=(), buckets=LATENCY_BUCKETS):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, doc, labels, buckets=buckets)
+
+def _counter(name: str, doc: str, labels=()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Counter(name, doc, labels)
+
+def _gauge(name: str, doc: str, labels=()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    # multiprocess 모드: 살아있는 프로세스 값 합산 (기록은 메인 프로세스에서만)
+    return prometheus_client.Gauge(name, doc, labels, multiprocess_mode="livesum")
+
+# ---------- Matching ----------
+MATCH_SECONDS = _histogram("roomy_match_seconds", "calculate_hybrid_match latency")
+MATCH_STAGE_SECONDS = _histogram("roomy_match_stage_seconds", "Matching latency by stage", ["stage"])
+MATCH_CANDIDATES = _histogram("roomy_match_candidates", "Candidates per match request", buckets=SIZE_BUCKETS)
+VECTOR_LOAD_SECONDS = _histogram("roomy_vector_load_seconds", "Vector loader latency", ["loader"])
+VECTOR_LOOKUPS = _counter("roomy_vector_lookups_total", "User vector lookups by source", ["source"])
+CACHE_LOOKUPS = _counter("roomy_cache_lookups_total", "Cache lookups", ["cache", "result"])
+
+# ---------- External APIs ----------
+EMBEDDING_SECONDS = _histogram("roomy_embedding_request_seconds", "Upstage embedding API latency", ["model_type"])
+EMBEDDING_ERRORS = _counter("roomy_embedding_errors_total", "Upstage embedding API errors", ["model_type"])
+GEMINI_SECONDS = _histogram("roomy_gemini_request_seconds", "Gemini analysis call latency", ["outcome"])
+
+# ---------- Repair ----------
+REPAIR_STAGE_SECONDS = _histogram("roomy_repair_stage_seconds", "Repair pipeline latency by stage", ["stage"])
+DUPLICATE_SCAN_SIZE = _histogram("roomy_repair_duplicate_scan_size", "Reports compared per duplicate check",
+                                 buckets=SIZE_BUCKETS)
+DUPLICATE_COMPARISONS = _counter("roomy_repair_duplicate_comparisons_total",
+                                 "Duplicate check vector comparisons (centroid / member) vs full partition scan", ["kind"])
+DUPLICATE_CLUSTERS = _gauge("roomy_repair_duplicate_clusters", "Open duplicate clusters")
+
+# ---------- User vector jobs ----------
+VECTOR_JOBS = _counter("roomy_vector_jobs_total", "User vector jobs by final status", ["status"])
+VECTOR_JOB_SECONDS = _histogram("roomy_vector_job_seconds", "User vector job latency (enqueue -> done)")
+VECTOR_JOB_BATCH = _histogram("roomy_vector_job_batch_size", "User vector jobs per worker batch", buckets=SIZE_BUCKETS)
+
+# ---------- Runtime ----------
+EVENT_LOOP_LAG = _histogram("roomy_event_loop_lag_seconds", "Event loop scheduling delay")
+
+def observe(metric, value: float, *labels):
+    if METRICS_ENABLED:
+        (metric.labels(*labels) if labels else metric).observe(value)
+
+def inc(metric, *labels, amount: float = 1):
+    if METRICS_ENABLED:
+        (metric.labels(*labels) if labels else metric).inc(amount)
+
+def set_value(metric, value: float, *labels):
+    if METRICS_ENABLED:
+        (metric.labels(*labels) if labels else metric).set(value)
+
+@contextmanager
+def timed(metric, *labels):
+    """블록 실행 시간을 histogram 에 기록"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, time.perf_counter() - start, *labels)
+
+async def monitor_event_loop_lag(interval: float = EVENT_LOOP_LAG_INTERVAL):
+    """interval 마다 깨어나 예정 시각 대비 지연을 기록 (블로킹 작업이 루프를 점유한 시간)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        observe(EVENT_LOOP_LAG, max(0.0, loop.time() - expected))
+
+def render_metrics():
+    """(본문, content type). multiprocess 모드면 모든 프로세스의 기록을 합산"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,188 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from fastapi import Request
+from app.core.tracing import current_span
+
+# ==========================================
+# 🔬 On-demand Request Profiling
+# ==========================================
+# PROFILING_ENABLED=1 일 때, 헤더(X-Profile: 1) 가 있거나 PROFILE_SAMPLE_RATE 로 샘플링된 요청을 프로파일링.
+#   PROFILE_BACKEND=sampling   (기본) 요청 동안 모든 스레드의 스택을 PROFILE_INTERVAL 마다 샘플링
+#                              -> 스레드풀에서 실행되는 매칭 점수 계산까지 포함. folded stacks (.collapsed,
+#                              flamegraph.pl / speedscope 로 flame graph) 저장
+#              cprofile        이벤트 루프 스레드만 (deterministic). .pstats 저장 (python -m pstats, snakeviz)
+#              pyinstrument    (설치된 경우) 이벤트 루프 스레드, async 인식. .html 저장
+# 결과는 PROFILE_DIR 에 {시각}_{method}_{route}_{요청 크기} 이름으로 저장하고 같은 이름의 .json 에 메타데이터
+# (route, status, 소요 시간, 후보자 수 / 이미지 크기, trace id, 상위 함수) 기록.
+# 동시에 PROFILE_MAX_CONCURRENT 개 요청까지만 프로파일링 (나머지는 그냥 실행).
+# 다른 요청이 같은 시간에 실행 중이면 sampling 결과에 함께 섞일 수 있음.
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))
+PROFILE_BACKEND = os.getenv("PROFILE_BACKEND", "sampling")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "storage/profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))  # sampling 간격 (초)
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))
+
+# 대기 중인 스레드 (스레드풀 유휴 워커, 이벤트 루프 select) 는 샘플에서 제외
+IDLE_FUNCTIONS = {"wait", "select", "poll", "_wait_for_tstate_lock", "get", "_worker", "accept"}
+
+_request_tags: ContextVar[Optional[dict]] = ContextVar("profile_tags", default=None)
+_active = 0
+_active_lock = threading.Lock()
+
+def annotate(**tags):
+    """현재 요청의 프로파일 메타데이터에 요청 크기 등 추가 (프로파일링 중이 아니면 무시)"""
+    current = _request_tags.get()
+    if current is not None:
+        current.update(tags)
+
+class StackSampler:
+    """모든 스레드의 호출 스택을 주기적으로 샘플링 (folded stacks 집계)"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            self._stop.wait(self.interval)
+
+    def top_functions(self, n: int = 15) -> list:
+        """leaf(self time) 기준 상위 함수"""
+        leaf = Counter()
+        for stack, count in self.stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": count} for name, count in leaf.most_common(n)]
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _start_profiler():
+    if PROFILE_BACKEND == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    if PROFILE_BACKEND == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("PROFILE_BACKEND=pyinstrument but pyinstrument is not installed")
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        profiler.start()
+        return profiler
+    profiler = StackSampler()
+    profiler.start()
+    return profiler
+
+def _stop_profiler(profiler, base_path: str) -> dict:
+    """프로파일러 종료 + 결과 파일 저장. Returns 메타데이터 (파일 이름, 상위 함수)"""
+    if PROFILE_BACKEND == "cprofile":
+        import pstats
+        profiler.disable()
+        profiler.dump_stats(base_path + ".pstats")
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:15]
+        return {"artifact": os.path.basename(base_path) + ".pstats",
+                "top": [{"function": f"{func[2]} ({os.path.basename(func[0])}:{func[1]})", "tottime": round(row[2], 6)}
+                        for func, row in top]}
+    if PROFILE_BACKEND == "pyinstrument":
+        profiler.stop()
+        with open(base_path + ".html", "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        return {"artifact": os.path.basename(base_path) + ".html"}
+    profiler.stop()
+    profiler.write(base_path + ".collapsed")
+    return {"artifact": os.path.basename(base_path) + ".collapsed", "samples": profiler.samples,
+            "top": profiler.top_functions()}
+
+def _should_profile(request: Request) -> bool:
+    if request.headers.get(PROFILE_HEADER) == "1":
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_") or "root"
+
+def _size_tag(tags: dict) -> str:
+    return "_".join(f"{key}{value}" for key, value in sorted(tags.items()))
+
+async def profile_requests(request: Request, call_next):
+    """FastAPI http middleware: 선택된 요청만 프로파일링하고 PROFILE_DIR 에 저장"""
+    global _active
+    if not PROFILING_ENABLED or not _should_profile(request):
+        return await call_next(request)
+    with _active_lock:
+        busy = _active >= PROFILE_MAX_CONCURRENT
+        if not busy:
+            _active += 1
+    if busy:
+        return await call_next(request)
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        tags = {}
+        token = _request_tags.set(tags)
+        started = datetime.now()
+        start = time.perf_counter()
+        profiler = _start_profiler()
+        status = 500
+        try:
+            # 스트리밍 응답은 헤더까지만 측정됨 (본문 생성은 call_next 반환 이후)
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            _request_tags.reset(token)
+            path = request.url.path
+            endpoint = getattr(request.scope.get("endpoint"), "__name__", None)
+            name = f"{started:%Y%m%d_%H%M%S_%f}_{request.method}_{_slug(path)}"
+            if tags:
+                name += f"_{_slug(_size_tag(tags))}"
+            base_path = os.path.join(PROFILE_DIR, name)
+            meta = {
+                "route": path, "endpoint": endpoint, "method": request.method, "status": status,
+                "durationMs": round(duration * 1000, 2), "backend": PROFILE_BACKEND,
+                "startedAt": started.isoformat(), "traceId": current_span().trace_id, "tags": tags,
+            }
+            meta.update(_stop_profiler(profiler, base_path))
+            with open(base_path + ".json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2, ensure_ascii=False)
+    finally:
+        with _active_lock:
+            _active -= 1
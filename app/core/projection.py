@@ -0,0 +1,112 @@
+import os
+import time
+import numpy as np
+from app.core.vector_format import l2_normalize, read_format, update_format, encode_vector, decode_vector, stored_dtype
+
+# ==========================================
+# 📉 Dimensionality Reduction (PCA)
+# ==========================================
+# 원본(full-dim) 벡터는 그대로 두고, 투영 버전별 디렉토리에 투영 행렬과 투영된 벡터를 함께 저장.
+#   storage/vectors/{id}_{type}.npy              원본 벡터 (재학습용 원천 데이터)
+#   storage/vectors/pca_256_<ts>/projection.npz  mean, components
+#   storage/vectors/pca_256_<ts>/{id}_{type}.npy 투영 + L2 정규화된 벡터
+# 활성 투영 버전은 _format.json 의 "projection" 항목에 기록.
+
+PROJECTION_FILE_NAME = "projection.npz"
+
+_projection_cache = {}
+
+class Projection:
+    def __init__(self, name: str, directory: str, mean: np.ndarray, components: np.ndarray):
+        self.name = name
+        self.directory = directory
+        self.mean = mean.astype('float32')
+        self.components = components.astype('float32')  # (d_out, d_in)
+
+    @property
+    def d_in(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def d_out(self) -> int:
+        return self.components.shape[0]
+
+    def apply(self, vecs) -> np.ndarray:
+        """Project full-dim vector(s) and re-normalize (cosine in the reduced space)."""
+        arr = np.asarray(vecs, dtype='float32')
+        return l2_normalize((arr - self.mean) @ self.components.T)
+
+def train_pca(matrix: np.ndarray, dim: int):
+    """
+    PCA 학습. n <= d 이면 economy SVD, 아니면 공분산 고유값 분해 (d x d).
+    Returns (mean, components[dim, d]).
+    """
+    n, d = matrix.shape
+    if dim > min(n, d):
+        raise ValueError(f"Cannot train PCA to {dim} dims from {n} vectors of dim {d}")
+
+    mean = matrix.mean(axis=0)
+    centered = (matrix - mean).astype('float64')
+    if n <= d:
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        components = vt[:dim]
+    else:
+        cov = centered.T @ centered
+        eigvals, eigvecs = np.linalg.eigh(cov)
+        components = eigvecs[:, np.argsort(eigvals)[::-1][:dim]].T
+    return mean.astype('float32'), components.astype('float32')
+
+def save_projection(storage_dir: str, mean: np.ndarray, components: np.ndarray) -> str:
+    """Write a new projection version directory and return its name."""
+    name = f"pca_{components.shape[0]}_{time.strftime('%Y%m%d%H%M%S')}"
+    directory = os.path.join(storage_dir, name)
+    os.makedirs(directory, exist_ok=True)
+    np.savez(os.path.join(directory, PROJECTION_FILE_NAME), mean=mean, components=components)
+    return name
+
+def load_projection(storage_dir: str, name: str) -> Projection:
+    directory = os.path.join(storage_dir, name)
+    data = np.load(os.path.join(directory, PROJECTION_FILE_NAME))
+    return Projection(name, directory, data["mean"], data["components"])
+
+def activate_projection(storage_dir: str, name: str = None):
+    """Set (or clear, with name=None) the active projection version in the manifest."""
+    update_format(storage_dir, projection=name)
+    _projection_cache.pop(storage_dir, None)
+
+def load_raw_vectors(storage_dir: str):
+    """All full-dim vectors in `storage_dir` (top level only). Returns (file_names, matrix)."""
+    names = sorted(n for n in os.listdir(storage_dir) if n.endswith(".npy"))
+    if not names:
+        return [], np.zeros((0, 0), dtype='float32')
+    matrix = l2_normalize([decode_vector(np.load(os.path.join(storage_dir, n))) for n in names])
+    return names, matrix
+
+def train_from_storage(storage_dir: str, dim: int) -> str:
+    """Train a PCA projection over every stored vector and save it as a new version."""
+    _, matrix = load_raw_vectors(storage_dir)
+    mean, components = train_pca(matrix, dim)
+    return save_projection(storage_dir, mean, components)
+
+def backfill_projection(storage_dir: str, name: str) -> int:
+    """Write the projected vector of every stored vector into the version directory."""
+    projection = load_projection(storage_dir, name)
+    count = 0
+    for file_name in sorted(os.listdir(storage_dir)):
+        if not file_name.endswith(".npy"):
+            continue
+        raw = np.load(os.path.join(storage_dir, file_name))
+        projected = projection.apply(l2_normalize(decode_vector(raw)))
+        np.save(os.path.join(projection.directory, file_name), encode_vector(projected, stored_dtype(raw)))
+        count += 1
+    return count
+
+def get_active_projection(storage_dir: str):
+    """
+    Active projection for `storage_dir`, or None. Cached per process:
+    restart the server after activating a new version.
+    """
+    if storage_dir not in _projection_cache:
+        name = read_format(storage_dir).get("projection")
+        _projection_cache[storage_dir] = load_projection(storage_dir, name) if name else None
+    return _projection_cache[storage_dir]
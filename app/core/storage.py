@@ -0,0 +1,199 @@
+import os
+import uuid
+import errno
+import asyncio
+import contextvars
+import numpy as np
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# ==========================================
+# 💾 File Storage (async facade + pluggable backend)
+# ==========================================
+# 이미지 / 벡터 파일 접근은 StorageBackend 를 통해서만. 백엔드 메서드는 블로킹 구현이고,
+# async 코드에서는 read_bytes / write_bytes / move / delete (아래) 로 전용 I/O 스레드풀에서 실행
+# -> 느린 디스크 / 네트워크 스토리지에서도 이벤트 루프가 멈추지 않음.
+#   STORAGE_BACKEND     local (기본). register_backend 로 추가 (예: MinIO / S3 호환 object store)
+#   STORAGE_ROOT        local 백엔드의 기준 디렉토리 (기본 "" = 현재 디렉토리, 절대 경로 key 는 그대로)
+#   STORAGE_IO_THREADS  I/O 스레드 수 (기본 8)
+#   STORAGE_FSYNC       full (기본, 파일 + 디렉토리 fsync) / file (파일만) / none
+# 쓰기는 항상 atomic: 같은 디렉토리의 임시 파일에 쓰고 fsync 후 rename -> 읽는 쪽은 이전 / 새 파일만 봄.
+# 디렉토리는 서버 시작 시 한 번 생성 (ensure_dir). 없는 디렉토리에 쓰면 그때 생성 후 재시도.
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "")
+STORAGE_IO_THREADS = int(os.getenv("STORAGE_IO_THREADS", "8"))
+STORAGE_FSYNC = os.getenv("STORAGE_FSYNC", "full")
+
+FSYNC_POLICIES = ("full", "file", "none")
+
+class StorageBackend:
+    """
+    스토리지 백엔드 인터페이스 (key = '/' 구분 경로, 예: storage/repair_images/3.jpg).
+    모든 메서드는 블로킹 -> async 코드에서는 모듈의 async 함수로 호출.
+    """
+
+    def read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def write(self, key: str, data: bytes):
+        """atomic 쓰기 (기존 key 는 교체)"""
+        raise NotImplementedError
+
+    def move(self, src: str, dst: str):
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """Returns 삭제 여부 (없으면 False)"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def ensure_dir(self, prefix: str):
+        """key prefix 준비 (디렉토리가 없는 object store 는 아무것도 안 함)"""
+
+class LocalStorage(StorageBackend):
+    """로컬 파일 시스템 (temp 파일 + fsync + rename)"""
+
+    def __init__(self, root: str = STORAGE_ROOT, fsync: str = STORAGE_FSYNC):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unsupported STORAGE_FSYNC: {fsync}")
+        self.root = root
+        self.fsync = fsync
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key) if self.root else key
+
+    def _sync_dir(self, directory: str):
+        if self.fsync != "full":
+            return
+        fd = os.open(directory or ".", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def _write(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        tmp = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                if self.fsync != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._sync_dir(directory)
+
+    def write(self, key: str, data: bytes):
+        path = self.path(key)
+        try:
+            self._write(path, data)
+        except FileNotFoundError:
+            # 시작 시 만들지 않은 디렉토리 (테스트 / 벤치마크에서 경로 교체 등)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._write(path, data)
+
+    def move(self, src: str, dst: str):
+        src_path, dst_path = self.path(src), self.path(dst)
+        try:
+            os.replace(src_path, dst_path)
+        except FileNotFoundError:
+            if not os.path.exists(src_path):
+                raise
+            os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+            os.replace(src_path, dst_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # 다른 파일 시스템: 복사 (atomic) 후 원본 삭제
+            with open(src_path, "rb") as f:
+                self._write(dst_path, f.read())
+            os.remove(src_path)
+            return
+        self._sync_dir(os.path.dirname(dst_path))
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def ensure_dir(self, prefix: str):
+        os.makedirs(self.path(prefix), exist_ok=True)
+
+_backends = {"local": LocalStorage}
+_storage = None
+_executor = None
+
+def register_backend(name: str, factory):
+    """STORAGE_BACKEND=name 일 때 사용할 백엔드 등록 (factory() -> StorageBackend)"""
+    _backends[name] = factory
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND not in _backends:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        _storage = _backends[STORAGE_BACKEND]()
+    return _storage
+
+def set_storage(storage):
+    """백엔드 교체 (None = STORAGE_BACKEND 설정으로 다시 생성)"""
+    global _storage
+    _storage = storage
+
+# ---------- async facade (전용 I/O 스레드풀) ----------
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STORAGE_IO_THREADS, thread_name_prefix="storage-io")
+    return _executor
+
+async def run_io(fn, *args):
+    """블로킹 I/O 를 I/O 스레드풀에서 실행 (trace / request context 유지)"""
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(context.run, fn, *args))
+
+async def read_bytes(key: str) -> bytes:
+    return await run_io(get_storage().read, key)
+
+async def write_bytes(key: str, data: bytes):
+    await run_io(get_storage().write, key, data)
+
+async def move(src: str, dst: str):
+    await run_io(get_storage().move, src, dst)
+
+async def delete(key: str) -> bool:
+    return await run_io(get_storage().delete, key)
+
+def shutdown_storage():
+    """진행 중인 I/O 완료 후 스레드풀 종료 (다음 호출 시 다시 생성)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+# ---------- numpy ----------
+
+def npy_bytes(arr: np.ndarray) -> bytes:
+    """np.save 형식 (.npy) 바이트 -> write / write_bytes 로 atomic 저장"""
+    buffer = BytesIO()
+    np.save(buffer, arr)
+    return buffer.getvalue()
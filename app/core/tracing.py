@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# ==========================================
+# 🧵 Request Tracing (OpenTelemetry-style spans)
+# ==========================================
+# 요청 하나 = trace 하나. 각 단계는 span (trace_id / span_id / parent_id, 시작 시각, 소요 시간, 속성, 오류).
+#   TRACING_EXPORTER     ""(기본, 비활성) / "console" (stdout 에 span 당 JSON 한 줄) / "file" (TRACING_FILE 에 JSONL)
+#   TRACING_SAMPLE_RATE  root span 에서 한 번 결정 (0.0 ~ 1.0), 하위 span 은 그대로 따름
+# 샘플링되지 않은 trace 도 trace_id 는 만들어 로그 / X-Trace-Id 에는 남김 (export 만 안 함).
+# 들어온 요청의 W3C traceparent 헤더가 있으면 그 trace 에 이어서 기록.
+# 매칭 워커 프로세스에는 run_with_context 로 현재 span 정보를 넘겨 같은 trace 로 기록.
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = os.getenv("TRACING_FILE", "storage/traces/spans.jsonl")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+def _new_id(n_bytes: int) -> str:
+    return f"{random.getrandbits(n_bytes * 8):0{n_bytes * 2}x}"
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "attributes", "events",
+                 "status", "start_time", "_start")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.events = []
+        self.status = "OK"
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time": time.time(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException):
+        self.status = "ERROR"
+        self.add_event("exception", type=type(exc).__name__, message=str(exc))
+
+    def to_dict(self, duration: float) -> dict:
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "startTime": self.start_time,
+            "durationMs": round(duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+class _NoopSpan:
+    trace_id = None
+    span_id = None
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_event(self, name, **attributes):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def _export(record: dict):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    if TRACING_EXPORTER == "console":
+        print(line, flush=True)
+    elif TRACING_EXPORTER == "file":
+        with _export_lock:
+            os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+            with open(TRACING_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+@contextmanager
+def span(name: str, **attributes):
+    """현재 span 의 하위 span (없으면 새 trace) 을 열고 블록 종료 시 export"""
+    if not TRACING_EXPORTER:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    if parent is None:
+        s = Span(name, _new_id(16), None, random.random() < TRACING_SAMPLE_RATE, attributes)
+    else:
+        s = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        raise
+    finally:
+        duration = time.perf_counter() - s._start
+        _current_span.reset(token)
+        if s.sampled:
+            _export(s.to_dict(duration))
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+# ---------- 전파 (HTTP 헤더 / 워커 프로세스) ----------
+
+def parse_traceparent(header: Optional[str]):
+    """W3C traceparent '00-{trace_id}-{parent_id}-{flags}' -> (trace_id, parent_id, sampled) 또는 None"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+def current_context():
+    """프로세스 경계를 넘길 수 있는 현재 span 정보 (trace_id, span_id, sampled) 또는 None"""
+    s = _current_span.get()
+    return (s.trace_id, s.span_id, s.sampled) if s is not None else None
+
+@contextmanager
+def attach_context(context):
+    """원격(헤더 / 부모 프로세스) span 을 현재 span 의 부모로 설정"""
+    if not TRACING_EXPORTER or context is None:
+        yield
+        return
+    trace_id, parent_id, sampled = context
+    remote = Span("remote", trace_id, None, sampled, {})
+    remote.span_id = parent_id
+    token = _current_span.set(remote)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+def run_with_context(context, fn, *args):
+    """워커 프로세스에서 부모 trace 를 이어서 fn(*args) 실행 (pickle 가능한 최상위 함수)"""
+    with attach_context(context):
+        return fn(*args)
+
+# ---------- 로그 연동 ----------
+
+class TraceContextFilter(logging.Filter):
+    """LogRecord 에 trace_id / span_id 추가 (span 밖이면 '-')"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        s = _current_span.get()
+        record.trace_id = s.trace_id if s is not None else "-"
+        record.span_id = s.span_id if s is not None else "-"
+        return True
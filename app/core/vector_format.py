@@ -0,0 +1,134 @@
+import os
+import json
+import numpy as np
+
+# ==========================================
+# 📦 Vector Storage Format
+# ==========================================
+# v1: raw embedding as returned by the model (not normalized)
+# v2: L2-normalized float32 -> cosine similarity == dot product
+
+VECTOR_FORMAT_VERSION = 2
+FORMAT_FILE_NAME = "_format.json"
+
+_version_cache = {}
+
+def l2_normalize(vec) -> np.ndarray:
+    """Return a float32 copy of `vec` scaled to unit length (row-wise for 2D)."""
+    arr = np.array(vec, dtype='float32')
+    if arr.size == 0:
+        return arr
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+# ==========================================
+# 🗜️ Compact Storage (float16 / int8)
+# ==========================================
+# float32: 4 bytes/dim (기본값)
+# float16: 2 bytes/dim
+# int8   : 1 byte/dim + 4 bytes. 벡터별 대칭 스칼라 양자화
+#          layout = [float32 scale (4 bytes)][int8 codes], value = code * scale
+# 압축 dtype 은 정규화된 벡터만 저장하므로 디코딩 후 다시 L2 정규화 (반올림 오차로 norm 이 1 에서 벗어나지 않도록)
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+INT8_HEADER_BYTES = 4
+
+def encode_vector(vec, dtype: str = "float32") -> np.ndarray:
+    """Encode a (normalized) float vector into the on-disk representation for `dtype`."""
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype: {dtype}")
+    arr = np.asarray(vec, dtype='float32')
+    if dtype == "float32":
+        return arr
+    if dtype == "float16":
+        return arr.astype('float16')
+
+    max_abs = float(np.abs(arr).max()) if arr.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    codes = np.clip(np.round(arr / scale), -127, 127).astype('int8')
+    header = np.array([scale], dtype='float32').view('int8')
+    return np.concatenate([header, codes])
+
+def decode_vector(arr: np.ndarray) -> np.ndarray:
+    """Decode any stored representation back to a float32 vector (compact dtypes come back unit length)."""
+    if arr.dtype == np.int8:
+        scale = arr[:INT8_HEADER_BYTES].view('float32')[0]
+        return l2_normalize(arr[INT8_HEADER_BYTES:].astype('float32') * scale)
+    if arr.dtype == np.float16:
+        return l2_normalize(arr)
+    return arr.astype('float32', copy=False)
+
+def stored_dtype(arr: np.ndarray) -> str:
+    """Storage dtype name of a loaded array (anything unknown counts as float32)."""
+    if arr.dtype == np.int8:
+        return "int8"
+    if arr.dtype == np.float16:
+        return "float16"
+    return "float32"
+
+def read_format(storage_dir: str) -> dict:
+    """Read the format manifest of a vector directory. Missing manifest means v1."""
+    path = os.path.join(storage_dir, FORMAT_FILE_NAME)
+    if not os.path.exists(path):
+        return {"version": 1}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def update_format(storage_dir: str, **extra):
+    """Update manifest fields without touching the format version."""
+    os.makedirs(storage_dir, exist_ok=True)
+    meta = read_format(storage_dir)
+    meta.update(extra)
+    with open(os.path.join(storage_dir, FORMAT_FILE_NAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    _version_cache.pop(storage_dir, None)
+
+def write_format(storage_dir: str, **extra):
+    """Mark a vector directory as the current format version."""
+    update_format(storage_dir, version=VECTOR_FORMAT_VERSION, **extra)
+
+def get_format_version(storage_dir: str) -> int:
+    """Cached manifest version lookup (avoids reading the manifest on every vector load)."""
+    if storage_dir not in _version_cache:
+        _version_cache[storage_dir] = int(read_format(storage_dir).get("version", 1))
+    return _version_cache[storage_dir]
+
+def is_normalized_storage(storage_dir: str) -> bool:
+    return get_format_version(storage_dir) >= 2
+
+def ensure_format_dir(storage_dir: str):
+    """
+    Create `storage_dir` if needed. An empty directory has nothing to migrate, so it starts
+    at the current format; directories with legacy (v1) files stay v1 until migrated.
+    """
+    os.makedirs(storage_dir, exist_ok=True)
+    if not is_normalized_storage(storage_dir):
+        if not any(name.endswith(".npy") for name in os.listdir(storage_dir)):
+            write_format(storage_dir)
+
+def migrate_storage(storage_dir: str, dtype: str = None) -> int:
+    """
+    Rewrite every .npy file in `storage_dir` as an L2-normalized vector and bump the
+    manifest to the current version. If `dtype` is given, files are also re-encoded
+    to that storage dtype. Returns the number of files rewritten.
+    """
+    if not os.path.isdir(storage_dir):
+        return 0
+    if dtype is None and is_normalized_storage(storage_dir):
+        return 0
+    if dtype is not None and dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype: {dtype}")
+
+    count = 0
+    for name in sorted(os.listdir(storage_dir)):
+        if not name.endswith(".npy"):
+            continue
+        path = os.path.join(storage_dir, name)
+        arr = np.load(path)
+        target = dtype or stored_dtype(arr)
+        np.save(path, encode_vector(l2_normalize(decode_vector(arr)), target))
+        count += 1
+
+    write_format(storage_dir, **({"dtype": dtype} if dtype else {}))
+    return count
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import numpy as np
+
+# ==========================================
+# 🗺️ Memory-mapped Vector Snapshot
+# ==========================================
+# 사용자별 .npy 파일을 하나의 float32 행렬로 모은 읽기 전용 스냅샷.
+# 매칭 워커 프로세스들이 np.load(mmap_mode='r') 로 같은 파일을 열어 OS 페이지 캐시를 공유
+# (워커 수만큼 벡터를 복사하지 않고, 요청마다 후보자 수만큼 파일을 열지 않음).
+#   {snapshot_dir}/{type}.npy       (N, d) float32, 저장소 로드 결과 (정규화 + 활성 PCA 투영 반영)
+#   {snapshot_dir}/{type}_ids.npy   (N,) int64 user id
+#   {snapshot_dir}/meta.json        생성 시각, 투영 버전, 차원
+# 스냅샷 생성 이후 원본 파일이 갱신된 사용자는 스냅샷을 건너뛰고 저장소에서 직접 로드.
+
+SNAPSHOT_META_FILE = "meta.json"
+
+class VectorSnapshot:
+    def __init__(self, snapshot_dir: str, storage_dir: str, meta: dict, matrices: dict, rows: dict):
+        self.snapshot_dir = snapshot_dir
+        self.storage_dir = storage_dir
+        self.meta = meta
+        self.matrices = matrices  # vector_type -> memmap (N, d)
+        self.rows = rows          # vector_type -> {user_id: row}
+
+    def lookup(self, user_id: int, vector_type: str):
+        """스냅샷 벡터 (float32) 또는 None (스냅샷에 없거나 이후 갱신됨)"""
+        row = self.rows.get(vector_type, {}).get(user_id)
+        if row is None:
+            return None
+        if not self._fresh(user_id, vector_type):
+            return None
+        return np.array(self.matrices[vector_type][row])
+
+    def _fresh(self, user_id: int, vector_type: str) -> bool:
+        path = os.path.join(self.storage_dir, f"{user_id}_{vector_type}.npy")
+        try:
+            return os.stat(path).st_mtime_ns <= self.meta["created_ns"]
+        except FileNotFoundError:
+            return False
+
+    def gather(self, user_ids, vector_type: str):
+        """
+        여러 사용자 벡터를 한 번의 fancy indexing 으로 읽기.
+        Returns (스냅샷에서 찾은 위치 목록, 벡터 행렬)
+        """
+        rows = self.rows.get(vector_type, {})
+        found, snapshot_rows = [], []
+        for i, uid in enumerate(user_ids):
+            row = rows.get(uid)
+            if row is not None and self._fresh(uid, vector_type):
+                found.append(i)
+                snapshot_rows.append(row)
+        if not found:
+            return found, None
+        return found, np.asarray(self.matrices[vector_type][np.array(snapshot_rows)], dtype='float32')
+
+def build_snapshot(storage_dir: str, snapshot_dir: str, vector_types=("self", "criteria")) -> dict:
+    """저장소의 모든 벡터를 스냅샷으로 기록 (임시 파일 -> rename 으로 교체). Returns meta"""
+    from app.users.service import load_user_vector, list_user_ids
+    from app.core.projection import get_active_projection
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    # 파일 갱신 판정 기준: 읽기 시작 전 시각 (읽는 도중 갱신된 파일은 stale 처리)
+    created_ns = time.time_ns()
+    counts = {}
+    dim = None
+    for vector_type in vector_types:
+        ids = list_user_ids(vector_type)
+        vectors = [load_user_vector(uid, vector_type) for uid in ids]
+        matrix = np.array(vectors, dtype='float32') if vectors else np.zeros((0, 0), dtype='float32')
+        if len(vectors):
+            dim = matrix.shape[1]
+
+        for suffix, arr in (("", matrix), ("_ids", np.array(ids, dtype='int64'))):
+            path = os.path.join(snapshot_dir, f"{vector_type}{suffix}.npy")
+            tmp = path + ".tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, path)
+        counts[vector_type] = len(ids)
+
+    projection = get_active_projection(storage_dir)
+    meta = {
+        "created_ns": created_ns,
+        "storage_dir": os.path.abspath(storage_dir),
+        "projection": projection.name if projection else None,
+        "dim": dim,
+        "counts": counts,
+    }
+    with open(os.path.join(snapshot_dir, SNAPSHOT_META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+def open_snapshot(snapshot_dir: str, storage_dir: str):
+    """스냅샷을 memory-map 으로 열기. 없거나 활성 투영 버전이 다르면 None"""
+    from app.core.projection import get_active_projection
+
+    meta_path = os.path.join(snapshot_dir, SNAPSHOT_META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    projection = get_active_projection(storage_dir)
+    if meta.get("projection") != (projection.name if projection else None):
+        return None
+
+    matrices, rows = {}, {}
+    for vector_type in meta["counts"]:
+        ids = np.load(os.path.join(snapshot_dir, f"{vector_type}_ids.npy"))
+        matrices[vector_type] = np.load(os.path.join(snapshot_dir, f"{vector_type}.npy"), mmap_mode='r')
+        rows[vector_type] = {int(uid): i for i, uid in enumerate(ids)}
+    return VectorSnapshot(snapshot_dir, storage_dir, meta, matrices, rows)
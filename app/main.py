@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -8,11 +10,44 @@ load_dotenv()
 from app.matching.router import router as matching_router
 from app.repair.router import router as repair_router
 from app.users.router import router as users_router
+from app.matching.workers import start_pool, shutdown_pool, MATCH_WORKERS
+import app.core.metrics as metrics
+from app.core.storage import shutdown_storage
+from app.repair.service import ensure_repair_storage
+from app.repair.derivatives import shutdown_derivatives
+from app.users.service import ensure_vector_storage
+from app.users.jobs import get_job_queue, shutdown_job_queue
+from app.core.tracing import span, attach_context, parse_traceparent
+from app.core.profiling import profile_requests
+from app.core.logs import configure_logging, log_requests
+
+# 앱 로그 (app.*): 구조화 + 비동기 출력, request_id / trace_id 포함
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 저장 디렉토리는 시작 시 한 번 생성 (요청 처리 중에는 만들지 않음)
+    ensure_vector_storage()
+    ensure_repair_storage()
+    # 매칭 프로세스 풀은 서버 시작 시 생성 (벡터 스냅샷 생성 포함)
+    if MATCH_WORKERS > 0:
+        start_pool()
+    # 유저 벡터 작업 워커 (중단된 작업 복구 포함)
+    get_job_queue().start()
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag()) if metrics.METRICS_ENABLED else None
+    yield
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+    await shutdown_job_queue()
+    shutdown_pool()
+    shutdown_derivatives()
+    shutdown_storage()
 
 app = FastAPI(
     title="Roommate Matching & Facility Repair API",
     description="Combined API for roommate matching and facility repair AI services.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS Middleware (React 등 프론트엔드 연동용)
@@ -24,6 +59,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling (PROFILING_ENABLED): 선택된 요청만 프로파일링. tracing 안쪽에서 실행되어 trace id 를 함께 기록
+app.middleware("http")(profile_requests)
+
+# Request log: X-Request-Id, 단계별 시간 수집, 느린 요청 경고
+app.middleware("http")(log_requests)
+
+# Tracing: 요청마다 root span (들어온 traceparent 가 있으면 그 trace 에 연결), 응답에 X-Trace-Id
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    with attach_context(parse_traceparent(request.headers.get("traceparent"))):
+        with span(f"{request.method} {request.url.path}", **{"http.method": request.method, "http.path": request.url.path}) as s:
+            response = await call_next(request)
+            s.set_attribute("http.status_code", response.status_code)
+    if s.trace_id:
+        response.headers["X-Trace-Id"] = s.trace_id
+    return response
+
 # Include Routers
 app.include_router(matching_router, prefix="/api/matching", tags=["Matching"])
 app.include_router(repair_router, prefix="/api/repair", tags=["Repair"])
@@ -33,4 +85,12 @@ app.include_router(users_router, prefix="/api/users", tags=["Users"])
 def health_check():
     return {"status": "ok", "service": "Roommate Matching & Repair API"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus 스크레이프 엔드포인트 (METRICS_ENABLED=1 일 때만)"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Forced reload trigger
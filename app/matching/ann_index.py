@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import logging
+import numpy as np
+import faiss
+
+# ==========================================
+# 🌐 Campus-wide ANN Index (HNSW / IVF-PQ)
+# ==========================================
+# 저장된 모든 후보자 self 벡터에 대한 근사 최근접 이웃 인덱스.
+# 매칭 시 seeker criteria 벡터로 상위 M명만 먼저 추려 하이브리드 점수 계산 대상으로 사용.
+#   storage/ann_index/index.faiss  FAISS 인덱스 (id = user id)
+#   storage/ann_index/meta.json    backend, 파라미터, 벡터 수, PCA 투영 버전, 생성 시각 (built_at_ns)
+# 생성 이후 self 벡터를 다시 저장한 사용자는 인덱스의 벡터가 오래됨 -> 매칭에서 미색인 후보자로 취급.
+
+logger = logging.getLogger(__name__)
+
+ANN_BACKENDS = ("hnsw", "ivfpq")
+ANN_INDEX_DIR = "storage/ann_index"
+ANN_INDEX_FILE = "index.faiss"
+ANN_META_FILE = "meta.json"
+
+# 매칭 ANN 설정 (환경 변수). MATCH_ANN_BACKEND=none 이면 기존 전수 검색
+MATCH_ANN_BACKEND = os.getenv("MATCH_ANN_BACKEND", "none")
+MATCH_ANN_TOP_M = int(os.getenv("MATCH_ANN_TOP_M", "200"))
+MATCH_ANN_EF_SEARCH = int(os.getenv("MATCH_ANN_EF_SEARCH", "128"))
+MATCH_ANN_NPROBE = int(os.getenv("MATCH_ANN_NPROBE", "16"))
+
+_loaded_index = None
+_index_loaded = False
+
+class AnnIndex:
+    def __init__(self, index: faiss.Index, ids: np.ndarray, meta: dict):
+        self.index = index
+        self.ids = set(int(i) for i in ids)
+        self.meta = meta
+
+    @property
+    def backend(self) -> str:
+        return self.meta["backend"]
+
+    def set_search_params(self, ef_search: int = MATCH_ANN_EF_SEARCH, nprobe: int = MATCH_ANN_NPROBE):
+        self.ef_search = ef_search
+        if self.backend == "ivfpq":
+            faiss.extract_index_ivf(self.index).nprobe = nprobe
+
+    def search_batch(self, queries: np.ndarray, k: int):
+        """(D, I) 상위 k개. HNSW efSearch는 k 이상이어야 k개를 모두 반환."""
+        k = min(k, len(self.ids))
+        if self.backend == "hnsw":
+            faiss.downcast_index(self.index.index).hnsw.efSearch = max(self.ef_search, k)
+        return self.index.search(queries, k)
+
+    def is_stale(self, user_id: int, mtime_ns) -> bool:
+        """색인된 사용자의 벡터 파일이 인덱스 생성 이후 다시 저장됨"""
+        return mtime_ns is not None and mtime_ns > self.meta["built_at_ns"]
+
+    def search(self, query: np.ndarray, top_m: int) -> dict:
+        """{user_id: 근사 유사도} 상위 top_m개 (query: 1 x d)"""
+        D, I = self.search_batch(query, top_m)
+        return {int(uid): float(sim) for uid, sim in zip(I[0], D[0]) if uid != -1}
+
+def _factory_string(backend: str, d: int, hnsw_m: int, nlist: int, pq_m: int, opq: bool) -> str:
+    if backend == "hnsw":
+        return f"IDMap2,HNSW{hnsw_m},Flat"
+    if d % pq_m != 0:
+        raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide the vector dimension ({d})")
+    prefix = f"OPQ{pq_m}," if opq else ""
+    return f"{prefix}IVF{nlist},PQ{pq_m}"
+
+def build_ann_index(matrix: np.ndarray, ids: np.ndarray, backend: str = "hnsw",
+                    hnsw_m: int = 32, nlist: int = 256, pq_m: int = 64, opq: bool = False) -> AnnIndex:
+    """정규화된 벡터 행렬과 user id로 ANN 인덱스 학습 + 생성"""
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"Unsupported ANN backend: {backend}")
+
+    n, d = matrix.shape
+    if backend == "ivfpq":
+        # IVF 셀 수는 학습 데이터보다 많을 수 없음
+        nlist = max(1, min(nlist, n // 39))
+    factory = _factory_string(backend, d, hnsw_m, nlist, pq_m, opq)
+    index = faiss.index_factory(d, factory, faiss.METRIC_INNER_PRODUCT)
+
+    built_at_ns = time.time_ns()
+    start = time.perf_counter()
+    index.train(matrix)
+    index.add_with_ids(matrix, ids.astype('int64'))
+
+    meta = {
+        "backend": backend,
+        "factory": factory,
+        "dim": d,
+        "count": n,
+        "build_seconds": round(time.perf_counter() - start, 2),
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "built_at_ns": built_at_ns,
+    }
+    ann = AnnIndex(index, ids, meta)
+    ann.set_search_params()
+    return ann
+
+def save_ann_index(ann: AnnIndex, index_dir: str = ANN_INDEX_DIR):
+    os.makedirs(index_dir, exist_ok=True)
+    faiss.write_index(ann.index, os.path.join(index_dir, ANN_INDEX_FILE))
+    meta = dict(ann.meta, ids=sorted(ann.ids))
+    with open(os.path.join(index_dir, ANN_META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+def load_ann_index(index_dir: str = ANN_INDEX_DIR):
+    index_path = os.path.join(index_dir, ANN_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    with open(os.path.join(index_dir, ANN_META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    ids = np.array(meta.pop("ids"), dtype='int64')
+    # 생성 시각이 없는 이전 인덱스: 파일 저장 시각 기준
+    meta.setdefault("built_at_ns", os.stat(index_path).st_mtime_ns)
+    ann = AnnIndex(faiss.read_index(index_path), ids, meta)
+    ann.set_search_params()
+    return ann
+
+def build_from_storage(backend: str = "hnsw", **params) -> AnnIndex:
+    """storage/vectors 의 모든 self 벡터로 ANN 인덱스 생성 (활성 PCA 투영 반영)"""
+    from app.users.service import load_user_vector, list_user_ids, VECTOR_STORAGE_PATH
+    from app.core.projection import get_active_projection
+
+    # 벡터를 읽기 전 시각: 읽는 도중 다시 저장된 벡터도 오래된 것으로 판정
+    built_at_ns = time.time_ns()
+    ids = np.array(list_user_ids("self"), dtype='int64')
+    if len(ids) == 0:
+        raise ValueError("No stored self vectors to index")
+    matrix = np.array([load_user_vector(int(uid), "self") for uid in ids], dtype='float32')
+
+    ann = build_ann_index(matrix, ids, backend, **params)
+    ann.meta["built_at_ns"] = built_at_ns
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    ann.meta["projection"] = projection.name if projection else None
+    return ann
+
+def get_ann_index():
+    """
+    매칭에서 사용할 ANN 인덱스 (MATCH_ANN_BACKEND=none 이거나 인덱스 파일이 없으면 None).
+    프로세스당 한 번 로드: 인덱스 재생성 후 서버 재시작 필요.
+    인덱스를 만들 때의 PCA 투영 버전이 현재 활성 버전과 다르면 (같은 차원으로 재학습한 경우 포함)
+    벡터 공간이 다르므로 사용하지 않음.
+    """
+    from app.users.service import VECTOR_STORAGE_PATH
+    from app.core.projection import get_active_projection
+
+    global _loaded_index, _index_loaded
+    if MATCH_ANN_BACKEND == "none":
+        return None
+    if not _index_loaded:
+        _index_loaded = True
+        _loaded_index = load_ann_index()
+        if _loaded_index is not None and _loaded_index.backend != MATCH_ANN_BACKEND:
+            logger.warning("ANN index backend mismatch", extra={"index_backend": _loaded_index.backend,
+                                                                 "configured_backend": MATCH_ANN_BACKEND})
+            _loaded_index = None
+        if _loaded_index is not None:
+            projection = get_active_projection(VECTOR_STORAGE_PATH)
+            active = projection.name if projection else None
+            if _loaded_index.meta.get("projection") != active:
+                logger.warning("ANN index projection mismatch", extra={
+                    "index_projection": _loaded_index.meta.get("projection"), "active_projection": active})
+                _loaded_index = None
+    return _loaded_index
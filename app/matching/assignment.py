@@ -0,0 +1,222 @@
+import os
+import time
+import numpy as np
+import networkx as nx
+from typing import List
+from .models import BatchSeeker, AssignmentRequest, AssignmentResult, RoomAssignment
+from .scoring import (candidate_features, preference_flags, subset_features,
+                      tag_score_kernel, pref_score_kernel)
+from .profiles import ScoringProfile, get_scoring_profile
+from .batch import criteria_matrix, self_matrix
+
+# ==========================================
+# 🏠 Global Room Assignment (2인실)
+# ==========================================
+# 지원자 전체를 2인 1실로 짝짓는 최대 가중치 매칭.
+# 쌍 점수 = 양방향 하이브리드 점수의 평균 (A가 B를 볼 때 + B가 A를 볼 때) / 2
+#   - Tag: 대칭, Preference / Text: 방향성 있음 (내 선호 조건, 내 criteria vs 상대 self)
+# 같은 성별끼리만 배정 (성별 그룹별로 독립적으로 풀고, 인원이 홀수면 한 명 미배정)
+#   exact : N <= ASSIGN_EXACT_MAX_N 이면 완전 그래프 + Edmonds blossom (networkx), O(N^3)
+#   greedy: 그 이상은 지원자별 상위 K명 이웃 그래프 (O(N*K) 메모리)
+#           -> 점수 내림차순 greedy 매칭 -> 남은 인원 재매칭 -> 2-opt 교환 local search
+
+ASSIGN_METHODS = ("auto", "exact", "greedy")
+
+# 배정 설정 (환경 변수)
+ASSIGN_EXACT_MAX_N = int(os.getenv("ASSIGN_EXACT_MAX_N", "200"))
+ASSIGN_NEIGHBORS_K = int(os.getenv("ASSIGN_NEIGHBORS_K", "20"))
+ASSIGN_BLOCK = int(os.getenv("ASSIGN_BLOCK", "256"))
+ASSIGN_LOCAL_SEARCH_PASSES = int(os.getenv("ASSIGN_LOCAL_SEARCH_PASSES", "10"))
+
+class PairScorer:
+    """지원자 속성/벡터를 한 번만 준비하고 임의의 쌍 점수를 계산"""
+
+    def __init__(self, applicants: List[BatchSeeker], scoring: ScoringProfile = None):
+        profiles = [a.profile for a in applicants]
+        self.scoring = scoring or get_scoring_profile()
+        self.n = len(profiles)
+        self.ids = np.array([p.id for p in profiles])
+        self.genders = np.array([p.gender.value for p in profiles])
+        self.feats = candidate_features(profiles)
+        self.active = preference_flags([a.preferences for a in applicants])
+        self.n_active = self.active.sum(axis=1)
+        # 선호 조건별 만족 여부 (N, 3): 비흡연, 벌레 잡기, 코골이 없음
+        self.satisfied = np.stack([~self.feats["smoker"], self.feats["bugKiller"], ~self.feats["snoring"]], axis=1).astype(np.int64)
+
+        self.self_vecs = self_matrix(profiles)
+        self.crit_vecs = criteria_matrix(profiles, self.self_vecs.shape[1]) if self.self_vecs is not None else None
+
+    def _directed_block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """rows 가 cols 를 볼 때의 하이브리드 점수 (R, C)"""
+        s = {key: arr[:, None] for key, arr in subset_features(self.feats, rows).items()}
+        c = subset_features(self.feats, cols)
+        scores = tag_score_kernel(s, c, self.scoring) + pref_score_kernel(self.active[rows], c, self.scoring)
+        if self.self_vecs is not None:
+            sims = np.maximum(0.0, self.crit_vecs[rows] @ self.self_vecs[cols].T).astype(np.float64)
+            scores = scores + sims * self.scoring.w_text
+        return scores
+
+    def block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """대칭 쌍 점수 행렬 (R, C). 배정 불가 쌍 (자기 자신, 다른 성별)은 -inf"""
+        scores = (self._directed_block(rows, cols) + self._directed_block(cols, rows).T) / 2.0
+        valid = (rows[:, None] != cols[None, :]) & (self.genders[rows][:, None] == self.genders[cols][None, :])
+        return np.where(valid, scores, -np.inf)
+
+    def _directed_pairs(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """i[e] 가 j[e] 를 볼 때의 점수 (E,) - 쌍 목록 원소별 계산"""
+        w_pref = self.scoring.w_pref
+        scores = tag_score_kernel(subset_features(self.feats, i), subset_features(self.feats, j), self.scoring)
+        matched_cnt = (self.active[i] * self.satisfied[j]).sum(axis=1)
+        n_active = self.n_active[i]
+        scores = scores + np.where(n_active == 0, w_pref, matched_cnt / np.maximum(n_active, 1) * w_pref)
+        if self.self_vecs is not None:
+            sims = np.maximum(0.0, np.einsum("ed,ed->e", self.crit_vecs[i], self.self_vecs[j])).astype(np.float64)
+            scores = scores + sims * self.scoring.w_text
+        return scores
+
+    def pairs(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """대칭 쌍 점수 (E,) (같은 성별 그룹 안에서만 호출)"""
+        return (self._directed_pairs(i, j) + self._directed_pairs(j, i)) / 2.0
+
+# ==========================================
+# 🎯 Solvers (인덱스 배열 -> [(i, j), ...])
+# ==========================================
+
+def solve_exact(scorer: PairScorer, members: np.ndarray) -> list:
+    """완전 그래프 최대 가중치 매칭 (인원이 짝수면 전원 배정)"""
+    if len(members) < 2:
+        return []
+    weights = scorer.block(members, members)
+    graph = nx.Graph()
+    rows, cols = np.triu_indices(len(members), k=1)
+    graph.add_weighted_edges_from(
+        (int(members[a]), int(members[b]), float(weights[a, b])) for a, b in zip(rows, cols)
+    )
+    return [tuple(sorted(pair)) for pair in nx.max_weight_matching(graph, maxcardinality=True)]
+
+def neighbor_graph(scorer: PairScorer, members: np.ndarray, k: int, block_size: int = None):
+    """
+    지원자별 상위 k명 이웃 그래프. 블록 단위 (B x N) 계산으로 메모리는 O(B*N + N*k).
+    Returns (i, j, w) 간선 배열 (i < j, 중복 제거)
+    """
+    block_size = block_size or ASSIGN_BLOCK
+    k = min(k, len(members) - 1)
+    src, dst = [], []
+    for start in range(0, len(members), block_size):
+        rows = members[start:start + block_size]
+        scores = scorer.block(rows, members)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        src.append(np.repeat(rows, k))
+        dst.append(members[top].ravel())
+
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    edges = np.unique(np.stack([np.minimum(src, dst), np.maximum(src, dst)], axis=1), axis=0)
+    return edges[:, 0], edges[:, 1], scorer.pairs(edges[:, 0], edges[:, 1])
+
+def greedy_matching(i: np.ndarray, j: np.ndarray, w: np.ndarray, partner: dict):
+    """점수 내림차순으로 두 사람 모두 미배정인 간선 선택 (partner 갱신)"""
+    for e in np.argsort(-w, kind="stable"):
+        a, b = int(i[e]), int(j[e])
+        if a not in partner and b not in partner:
+            partner[a] = b
+            partner[b] = a
+
+def local_search(scorer: PairScorer, i: np.ndarray, j: np.ndarray, partner: dict, max_passes: int) -> int:
+    """
+    2-opt 교환: 이웃 간선 (a, c) 에 대해 방 (a, b), (c, d) -> (a, c), (b, d) 가 더 좋으면 교환.
+    한 pass 안에서는 겹치지 않는 교환만 이득 순으로 적용. Returns 적용한 교환 수
+    """
+    swaps = 0
+    for _ in range(max_passes):
+        mask = np.array([int(a) in partner and int(c) in partner and partner[int(a)] != int(c) for a, c in zip(i, j)], dtype=bool)
+        if not mask.any():
+            break
+        a, c = i[mask], j[mask]
+        b = np.array([partner[int(x)] for x in a])
+        d = np.array([partner[int(x)] for x in c])
+        gain = scorer.pairs(a, c) + scorer.pairs(b, d) - scorer.pairs(a, b) - scorer.pairs(c, d)
+
+        touched = set()
+        applied = 0
+        for e in np.argsort(-gain, kind="stable"):
+            if gain[e] <= 1e-9:
+                break
+            group = {int(a[e]), int(b[e]), int(c[e]), int(d[e])}
+            if len(group) < 4 or touched & group:
+                continue
+            touched |= group
+            partner[int(a[e])], partner[int(c[e])] = int(c[e]), int(a[e])
+            partner[int(b[e])], partner[int(d[e])] = int(d[e]), int(b[e])
+            applied += 1
+        swaps += applied
+        if applied == 0:
+            break
+    return swaps
+
+def solve_greedy(scorer: PairScorer, members: np.ndarray, k: int = None, passes: int = None) -> list:
+    """상위 K 이웃 그래프 기반 근사 매칭 (greedy + 2-opt local search)"""
+    if len(members) < 2:
+        return []
+    k = k or ASSIGN_NEIGHBORS_K
+    passes = ASSIGN_LOCAL_SEARCH_PASSES if passes is None else passes
+    partner = {}
+    i, j, w = neighbor_graph(scorer, members, k)
+    greedy_matching(i, j, w, partner)
+
+    # 이웃이 모두 먼저 배정된 지원자끼리 다시 이웃 그래프를 만들어 배정
+    leftover = np.array([m for m in members if int(m) not in partner])
+    while len(leftover) >= 2:
+        if len(leftover) <= ASSIGN_EXACT_MAX_N:
+            for a, b in solve_exact(scorer, leftover):
+                partner[a], partner[b] = b, a
+            break
+        li, lj, lw = neighbor_graph(scorer, leftover, k)
+        greedy_matching(li, lj, lw, partner)
+        i, j = np.concatenate([i, li]), np.concatenate([j, lj])
+        leftover = np.array([m for m in leftover if int(m) not in partner])
+
+    local_search(scorer, i, j, partner, passes)
+    return sorted({tuple(sorted((a, b))) for a, b in partner.items()})
+
+# ==========================================
+# 🧠 Assignment Entry Point
+# ==========================================
+
+def assign_rooms(request: AssignmentRequest) -> AssignmentResult:
+    """성별 그룹별로 exact / greedy 매칭 후 방 목록 생성 (쌍 점수 내림차순)"""
+    start = time.perf_counter()
+    scorer = PairScorer(request.applicants, get_scoring_profile(request.scoringProfile))
+
+    pairs = []
+    methods = set()
+    for gender in sorted(set(scorer.genders)):
+        members = np.flatnonzero(scorer.genders == gender)
+        method = request.method
+        if method == "auto":
+            method = "exact" if len(members) <= ASSIGN_EXACT_MAX_N else "greedy"
+        methods.add(method)
+        if method == "exact":
+            pairs.extend(solve_exact(scorer, members))
+        else:
+            pairs.extend(solve_greedy(scorer, members))
+
+    if pairs:
+        a, b = np.array(pairs).T
+        scores = scorer.pairs(a, b)
+    else:
+        scores = np.zeros(0)
+    order = np.argsort(-scores, kind="stable")
+
+    rooms = [
+        RoomAssignment(roomNo=r + 1, members=[int(scorer.ids[pairs[p][0]]), int(scorer.ids[pairs[p][1]])],
+                       score=round(float(scores[p]), 1))
+        for r, p in enumerate(order)
+    ]
+    assigned = {m for pair in pairs for m in pair}
+    return AssignmentResult(
+        rooms=rooms,
+        unassigned=[int(scorer.ids[m]) for m in range(scorer.n) if m not in assigned],
+        totalScore=round(float(scores.sum()), 1),
+        method="+".join(sorted(methods)) or request.method,
+        elapsedSeconds=round(time.perf_counter() - start, 3),
+    )
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+from typing import Iterator, List
+from .models import BatchMatchRequest, UserProfile
+from .scoring import candidate_features, compute_tag_score_matrix, compute_pref_score_matrix
+from .profiles import get_scoring_profile
+from .service import load_seeker_vector, load_candidate_vectors, build_match_result
+
+# ==========================================
+# 📦 Batch Matching (seekers x candidates)
+# ==========================================
+# 후보자 풀 벡터는 한 번만 로드하고, seeker 블록 단위로
+#   텍스트: (B x d) @ (d x C) 행렬 곱
+#   태그/선호: broadcasting 으로 (B x C) 계산
+# 메모리는 블록 크기(B) x 후보자 수(C)로 제한됨.
+
+MATCH_BATCH_BLOCK = int(os.getenv("MATCH_BATCH_BLOCK", "256"))
+
+def select_top_k(totals: np.ndarray, valid: np.ndarray, k: int) -> List[int]:
+    """
+    단일 매칭과 같은 규칙으로 top-k 후보자 위치 선택:
+    반올림(소수 첫째 자리) 총점 내림차순, 동점이면 후보자 순서 유지.
+    """
+    idx = np.flatnonzero(valid)
+    if len(idx) > k:
+        vals = totals[idx]
+        kth = np.partition(vals, -k)[-k]
+        # 반올림 후 동점이 될 수 있는 범위(0.1)까지 포함해 정확히 정렬
+        idx = idx[vals >= kth - 0.11]
+    rounded = [round(float(totals[i]), 1) for i in idx]
+    order = sorted(range(len(idx)), key=lambda j: -rounded[j])
+    return [int(idx[j]) for j in order[:k]]
+
+def criteria_matrix(profiles: List[UserProfile], d: int) -> np.ndarray:
+    """seeker criteria 벡터 행렬 (벡터 없는 seeker는 0 벡터 -> 텍스트 점수 0)"""
+    matrix = np.zeros((len(profiles), d), dtype='float32')
+    for i, profile in enumerate(profiles):
+        vec = load_seeker_vector(profile)
+        if vec is not None and vec.shape[1] == d:
+            matrix[i] = vec[0]
+    return matrix
+
+def self_matrix(candidates: List[UserProfile]):
+    """후보자 self 벡터 행렬 (벡터 없는 후보자는 0 벡터 -> 유사도 0). 벡터가 하나도 없으면 None"""
+    rows, vectors = load_candidate_vectors(candidates)
+    if vectors is None:
+        return None
+    matrix = np.zeros((len(candidates), vectors.shape[1]), dtype='float32')
+    matrix[rows] = vectors
+    return matrix
+
+def iter_batch_matches(request: BatchMatchRequest, block_size: int = None) -> Iterator[dict]:
+    """seeker 별 top-K 결과를 블록 단위로 계산하며 순서대로 yield"""
+    block_size = block_size or MATCH_BATCH_BLOCK
+    scoring = get_scoring_profile(request.scoringProfile)
+    candidates: List[UserProfile] = request.candidates
+    if not candidates:
+        for s in request.seekers:
+            yield {"seekerId": s.profile.id, "matches": []}
+        return
+
+    # 1. 후보자 풀 준비 (한 번만)
+    feats = candidate_features(candidates)
+    cand_ids = np.array([c.id for c in candidates])
+    cand_genders = np.array([c.gender.value for c in candidates])
+
+    cand_matrix = self_matrix(candidates)
+
+    # 2. seeker 블록 단위 계산
+    for start in range(0, len(request.seekers), block_size):
+        block = request.seekers[start:start + block_size]
+        profiles = [s.profile for s in block]
+
+        tag = compute_tag_score_matrix(profiles, feats, scoring)
+        pref = compute_pref_score_matrix([s.preferences for s in block], feats, scoring)
+        if cand_matrix is not None:
+            sims = np.maximum(0.0, criteria_matrix(profiles, cand_matrix.shape[1]) @ cand_matrix.T).astype(np.float64)
+        else:
+            sims = np.zeros(tag.shape)
+        totals = tag + pref + sims * scoring.w_text
+
+        # Hard Filter: 자기 자신 제외, 같은 성별끼리만 매칭
+        seeker_ids = np.array([p.id for p in profiles])[:, None]
+        seeker_genders = np.array([p.gender.value for p in profiles])[:, None]
+        valid = (cand_ids[None, :] != seeker_ids) & (cand_genders[None, :] == seeker_genders)
+
+        for b, profile in enumerate(profiles):
+            top = select_top_k(totals[b], valid[b], request.topK)
+            yield {
+                "seekerId": profile.id,
+                "matches": [
+                    build_match_result(candidates[i], tag[b, i], pref[b, i], sims[b, i], rank=r + 1, profile=scoring).model_dump()
+                    for r, i in enumerate(top)
+                ],
+            }
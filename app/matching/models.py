@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
@@ -123,6 +123,11 @@ class MatchRequest(BaseModel):
     myProfile: UserProfile
     preferences: UserPreferences
     candidates: List[UserProfile]
+    # 상호 매칭: 후보자 criteria vs 내 self 유사도도 함께 반영 (집계 방식 기본값: MATCH_MUTUAL_AGG)
+    mutual: bool = False
+    mutualAggregation: Optional[Literal["mean", "min", "geometric", "harmonic"]] = None
+    # 점수 프로필 이름 (없으면 default, config/scoring_profiles.json)
+    scoringProfile: Optional[str] = None
     
     model_config = {
         "json_schema_extra": {
@@ -175,3 +180,37 @@ class MatchResult(BaseModel):
     matchDetails: dict
 
 
+class BatchSeeker(BaseModel):
+    """배치 매칭의 seeker 한 명 (프로필 + 검색 조건)"""
+    profile: UserProfile
+    preferences: UserPreferences = UserPreferences()
+
+
+class BatchMatchRequest(BaseModel):
+    """여러 seeker가 하나의 후보자 풀을 공유하는 배치 매칭 요청"""
+    seekers: List[BatchSeeker]
+    candidates: List[UserProfile]
+    topK: int = Field(default=20, ge=1)
+    scoringProfile: Optional[str] = None
+
+
+class AssignmentRequest(BaseModel):
+    """기숙사 2인실 전체 배정 요청"""
+    applicants: List[BatchSeeker]
+    # auto: 성별 그룹 인원이 ASSIGN_EXACT_MAX_N 이하이면 exact, 아니면 greedy
+    method: Literal["auto", "exact", "greedy"] = "auto"
+    scoringProfile: Optional[str] = None
+
+
+class RoomAssignment(BaseModel):
+    roomNo: int
+    members: List[int]
+    score: float
+
+
+class AssignmentResult(BaseModel):
+    rooms: List[RoomAssignment]
+    unassigned: List[int]
+    totalScore: float
+    method: str
+    elapsedSeconds: float
@@ -0,0 +1,105 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+from app.users.service import load_user_vector, gather_user_vectors, vector_version
+from .models import UserProfile
+from .service import compute_text_sims, prepare_inline_vector
+from app.core.metrics import inc, CACHE_LOOKUPS
+
+# ==========================================
+# 🤝 Mutual Matching (양방향 텍스트 유사도)
+# ==========================================
+# forward : 내 criteria  vs 후보자 self   (기존 단방향)
+# reverse : 후보자 criteria vs 내 self    ("누가 나를 원하는가")
+# 텍스트 유사도 = aggregate(forward, reverse)
+#   mean      : (f + r) / 2
+#   min       : min(f, r)            -> 양쪽 모두 만족해야 높음
+#   geometric : sqrt(f * r)
+#   harmonic  : 2fr / (f + r)
+# 모든 집계는 max(f, r) 이하 -> 2단계 랭킹의 텍스트 상한이 그대로 유효.
+# reverse 는 후보자 criteria 벡터를 한 번에 모아 (M x d) @ (d,) 로 계산 (스냅샷 연결 시 fancy indexing 한 번).
+# (seeker, 후보자) 쌍별 결과는 두 벡터의 버전(파일 mtime + PCA 투영)과 함께 캐시 -> 벡터가 바뀌면 자동 재계산.
+
+MUTUAL_AGGREGATIONS = ("mean", "min", "geometric", "harmonic")
+MATCH_MUTUAL_AGG = os.getenv("MATCH_MUTUAL_AGG", "mean")
+MATCH_MUTUAL_CACHE_SIZE = int(os.getenv("MATCH_MUTUAL_CACHE_SIZE", "200000"))
+
+_pair_cache = OrderedDict()  # (seeker id, 후보자 id) -> (seeker self 버전, 후보자 criteria 버전, 유사도)
+_pair_cache_lock = threading.Lock()
+
+def aggregate_sims(forward: np.ndarray, reverse: np.ndarray, mode: str = None) -> np.ndarray:
+    mode = mode or MATCH_MUTUAL_AGG
+    if mode == "mean":
+        return (forward + reverse) / 2.0
+    if mode == "min":
+        return np.minimum(forward, reverse)
+    if mode == "geometric":
+        return np.sqrt(forward * reverse)
+    if mode == "harmonic":
+        total = forward + reverse
+        return np.where(total > 0, 2.0 * forward * reverse / np.where(total > 0, total, 1.0), 0.0)
+    raise ValueError(f"Unsupported mutual aggregation: {mode}")
+
+def _seeker_self_vector(seeker: UserProfile):
+    """(self 벡터, 버전). 요청에 직접 포함된 벡터는 버전 None (캐시 안 함)"""
+    if seeker.selfIntroductionEmbedding:
+        return prepare_inline_vector(seeker.selfIntroductionEmbedding), None
+    return load_user_vector(seeker.id, "self"), vector_version(seeker.id, "self")
+
+def reverse_text_sims(seeker: UserProfile, candidates: List[UserProfile]) -> np.ndarray:
+    """후보자별 (후보자 criteria vs seeker self) 유사도 (0.0 ~ 1.0, 벡터 없으면 0)"""
+    sims = np.zeros(len(candidates))
+    self_vec, self_version = _seeker_self_vector(seeker)
+    if self_vec is None or not candidates:
+        return sims
+
+    # 1. 캐시 확인 (요청에 criteria 벡터를 직접 포함한 후보자는 항상 계산)
+    pending = []
+    versions = {}
+    with _pair_cache_lock:
+        for i, c in enumerate(candidates):
+            if c.roommateCriteriaEmbedding:
+                vec = prepare_inline_vector([c.roommateCriteriaEmbedding])[0]
+                if vec.shape[0] == self_vec.shape[0]:
+                    sims[i] = max(0.0, float(vec @ self_vec))
+                continue
+            version = vector_version(c.id, "criteria")
+            if version is None:
+                continue
+            cached = _pair_cache.get((seeker.id, c.id)) if self_version is not None else None
+            if cached is not None and cached[0] == self_version and cached[1] == version:
+                _pair_cache.move_to_end((seeker.id, c.id))
+                sims[i] = cached[2]
+            else:
+                pending.append(i)
+                versions[i] = version
+    inc(CACHE_LOOKUPS, "mutual_pair", "miss", amount=len(pending))
+    inc(CACHE_LOOKUPS, "mutual_pair", "hit", amount=len(candidates) - len(pending))
+
+    if not pending:
+        return sims
+
+    # 2. 캐시에 없는 후보자: criteria 벡터를 모아 한 번에 내적
+    rows, matrix = gather_user_vectors([candidates[i].id for i in pending], "criteria")
+    if matrix is None or matrix.shape[1] != self_vec.shape[0]:
+        return sims
+    computed = np.maximum(0.0, matrix @ self_vec).astype(np.float64)
+
+    with _pair_cache_lock:
+        for row, sim in zip(rows, computed):
+            i = pending[row]
+            sims[i] = sim
+            if self_version is not None:
+                _pair_cache[(seeker.id, candidates[i].id)] = (self_version, versions[i], float(sim))
+        while len(_pair_cache) > MATCH_MUTUAL_CACHE_SIZE:
+            _pair_cache.popitem(last=False)
+    return sims
+
+def mutual_sim_fn(seeker: UserProfile, seeker_vec: Optional[np.ndarray], mode: str = None):
+    """후보자 목록 -> 집계된 양방향 텍스트 유사도"""
+    def sim_fn(cands: List[UserProfile]) -> np.ndarray:
+        forward = compute_text_sims(seeker_vec, cands)
+        return aggregate_sims(forward, reverse_text_sims(seeker, cands), mode)
+    return sim_fn
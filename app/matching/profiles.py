@@ -0,0 +1,127 @@
+import os
+import json
+import math
+import numpy as np
+from typing import Optional
+
+# ==========================================
+# 🎛️ Scoring Profiles
+# ==========================================
+# 기숙사별 가중치를 이름 붙은 프로필로 관리. 프로필은 로드 시 한 번 컴파일:
+#   age_lut[나이 차]                 나이 점수
+#   time_lut[기상 차, 취침 차]         생활 시간 점수
+#   habit_lut[청소 차, 음주 차]        생활 습관 점수
+# -> Tag Score = age_lut + time_lut + habit_lut (후보자별 추가 연산 없이 table lookup 3번)
+# default 프로필은 기존 점수 공식과 비트 단위로 동일.
+#
+# 설정 파일 (SCORING_PROFILES_PATH, 기본 config/scoring_profiles.json):
+#   {"profiles": {"quiet_dorm": {"weights": {"time": 30, "text": 20}, "ranges": {"sleep": 4}}}}
+# 지정하지 않은 항목은 default 값을 사용.
+
+SCORING_PROFILES_PATH = os.getenv("SCORING_PROFILES_PATH", "config/scoring_profiles.json")
+DEFAULT_PROFILE_NAME = "default"
+
+DEFAULT_PROFILE_SPEC = {
+    # 만점 (age + time + habit = Tag Score 만점)
+    "weights": {"age": 5.0, "time": 20.0, "habit": 15.0, "pref": 30.0, "text": 30.0},
+    # 이 차이 이상이면 0점 (기상 5~11시, 취침 8~14시, 청소 주기 0~4, 음주 0~2)
+    "ranges": {"wake": 6, "sleep": 6, "clean": 4, "drink": 2},
+    # 나이: 100점 기준 1살 차이당 감점
+    "agePenaltyPerYear": 10,
+}
+
+_profiles = None
+
+class UnknownScoringProfile(ValueError):
+    pass
+
+def scale_diff_scores(vals1: np.ndarray, vals2: np.ndarray, max_diff_range: int) -> np.ndarray:
+    """get_scale_diff_score 의 벡터 버전 (0.0 ~ 1.0)"""
+    diff = np.abs(vals1 - vals2)
+    normalized_diff = np.minimum(diff, max_diff_range) / max_diff_range
+    return np.maximum(0.0, 1.0 - normalized_diff)
+
+class ScoringProfile:
+    """컴파일된 점수 프로필 (lookup table + 가중치)"""
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.spec = _merge_spec(spec)
+        weights = self.spec["weights"]
+        ranges = self.spec["ranges"]
+        penalty = self.spec["agePenaltyPerYear"]
+
+        for key, value in weights.items():
+            if value < 0:
+                raise ValueError(f"Scoring profile '{name}': weight '{key}' must be >= 0")
+        for key, value in ranges.items():
+            if int(value) != value or value < 1:
+                raise ValueError(f"Scoring profile '{name}': range '{key}' must be a positive integer")
+        if penalty < 0:
+            raise ValueError(f"Scoring profile '{name}': agePenaltyPerYear must be >= 0")
+
+        self.ranges = {key: int(value) for key, value in ranges.items()}
+        self.w_tag = weights["age"] + weights["time"] + weights["habit"]
+        self.w_pref = float(weights["pref"])
+        self.w_text = float(weights["text"])
+
+        # 1. Age: max(0, 100 - 차이 * penalty) / 100 * weight
+        self.age_cap = math.ceil(100 / penalty) if penalty > 0 else 0
+        age_diff = np.arange(self.age_cap + 1)
+        self.age_lut = np.maximum(0, 100 - (age_diff * penalty)) * (weights["age"] / 100)
+
+        # 2. Time: (wake + sleep) / 2 * weight
+        wake_p = scale_diff_scores(np.arange(self.ranges["wake"] + 1), 0, self.ranges["wake"])
+        sleep_p = scale_diff_scores(np.arange(self.ranges["sleep"] + 1), 0, self.ranges["sleep"])
+        self.time_lut = (wake_p[:, None] + sleep_p[None, :]) / 2.0 * float(weights["time"])
+
+        # 3. Habits: (clean + drink) / 2 * weight
+        clean_p = scale_diff_scores(np.arange(self.ranges["clean"] + 1), 0, self.ranges["clean"])
+        drink_p = scale_diff_scores(np.arange(self.ranges["drink"] + 1), 0, self.ranges["drink"])
+        self.habit_lut = (clean_p[:, None] + drink_p[None, :]) / 2.0 * float(weights["habit"])
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, **self.spec, "maxScore": self.w_tag + self.w_pref + self.w_text}
+
+def _merge_spec(spec: dict) -> dict:
+    unknown = set(spec) - set(DEFAULT_PROFILE_SPEC)
+    if unknown:
+        raise ValueError(f"Unknown scoring profile keys: {sorted(unknown)}")
+    merged = {
+        "weights": dict(DEFAULT_PROFILE_SPEC["weights"]),
+        "ranges": dict(DEFAULT_PROFILE_SPEC["ranges"]),
+        "agePenaltyPerYear": spec.get("agePenaltyPerYear", DEFAULT_PROFILE_SPEC["agePenaltyPerYear"]),
+    }
+    for section in ("weights", "ranges"):
+        extra = set(spec.get(section, {})) - set(merged[section])
+        if extra:
+            raise ValueError(f"Unknown scoring profile {section}: {sorted(extra)}")
+        merged[section].update(spec.get(section, {}))
+    return merged
+
+DEFAULT_PROFILE = ScoringProfile(DEFAULT_PROFILE_NAME, {})
+
+def load_scoring_profiles(path: str = SCORING_PROFILES_PATH) -> dict:
+    """설정 파일의 프로필을 컴파일 (파일이 없으면 default 만)"""
+    profiles = {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        for name, spec in config.get("profiles", {}).items():
+            profiles[name] = ScoringProfile(name, spec)
+    return profiles
+
+def get_scoring_profile(name: Optional[str] = None) -> ScoringProfile:
+    """이름으로 컴파일된 프로필 조회 (None = default). 프로세스당 설정 파일 한 번 로드"""
+    global _profiles
+    if _profiles is None:
+        _profiles = load_scoring_profiles()
+    if name is None:
+        return DEFAULT_PROFILE
+    if name not in _profiles:
+        raise UnknownScoringProfile(f"Unknown scoring profile: {name}")
+    return _profiles[name]
+
+def list_scoring_profiles() -> list:
+    get_scoring_profile()
+    return [p.to_dict() for p in _profiles.values()]
@@ -0,0 +1,247 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+from .models import MatchRequest, MatchResult, UserProfile
+from .scoring import candidate_features, compute_tag_score_matrix, compute_pref_score_matrix, W_TEXT
+from .service import (score_base, compute_text_sims, two_stage_text_sims, build_match_result,
+                      prepare_inline_vector, MATCH_TOP_K, MATCH_TWO_STAGE)
+from .vector_index import build_text_index
+from .ann_index import get_ann_index
+from app.core.metrics import inc, CACHE_LOOKUPS
+from app.users.service import load_user_vector
+
+# ==========================================
+# ♻️ Ranking Cache + Incremental Re-ranking
+# ==========================================
+# seeker 별 매칭 결과를 (seeker id, 선호 조건, 후보자 풀) 단위로 캐시.
+# 각 항목은 상위 K + 여유분(RESERVE)명의 점수만 보관 (retained) 하고 불변식을 유지:
+#   retained 밖의 모든 후보자 반올림 총점 < floor <= retained 의 모든 반올림 총점
+# 후보자 한 명의 프로필/벡터가 바뀌면 그 후보자가 속한 풀의 seeker 들에 대해서만
+# 그 한 명의 점수를 벡터화로 재계산하고 retained 를 patch -> 비용 O(영향받는 seeker 수).
+#   - 새 점수 >= floor : retained 에 추가/갱신
+#   - 새 점수 <  floor : retained 에서 제거 (retained 가 K명 미만이 되면 항목 무효화)
+# seeker 본인의 프로필/criteria 벡터가 바뀌면 그 seeker 의 항목은 무효화.
+# 캐시는 API 프로세스 메모리에 있으며, 후보자 변경은 백엔드가 알려줘야 함 (/api/matching/cache/candidate).
+# 알림 없이 요청의 프로필 내용(생활 습관, 인라인 임베딩 등)만 바뀐 경우에 대비해 항목마다 내용 fingerprint
+# (seeker + 후보자 풀) 를 보관하고, 요청과 다르면 캐시를 쓰지 않고 다시 계산.
+
+MATCH_RANK_CACHE_SIZE = int(os.getenv("MATCH_RANK_CACHE_SIZE", "0"))  # 0 = 비활성
+MATCH_RANK_CACHE_RESERVE = int(os.getenv("MATCH_RANK_CACHE_RESERVE", "40"))
+
+_cache = None
+
+def profile_fingerprint(profile: UserProfile) -> int:
+    """프로필 전체 필드 (인라인 임베딩 포함) 의 hash"""
+    return hash(tuple(tuple(v) if isinstance(v, list) else v for v in profile.__dict__.values()))
+
+class CandidatePool:
+    """여러 seeker 가 공유하는 후보자 목록 (요청의 candidates 순서 그대로)"""
+
+    def __init__(self, candidates: List[UserProfile]):
+        self.candidates = list(candidates)
+        self.position = {c.id: i for i, c in enumerate(candidates)}
+        self.entries = set()  # 이 풀을 쓰는 캐시 key
+        self.fingerprints = [profile_fingerprint(c) for c in self.candidates]
+        self.fingerprint = hash(tuple(self.fingerprints))
+
+    def replace(self, pos: int, profile: UserProfile):
+        self.candidates[pos] = profile
+        self.fingerprints[pos] = profile_fingerprint(profile)
+        self.fingerprint = hash(tuple(self.fingerprints))
+
+class RankEntry:
+    def __init__(self, seeker: UserProfile, prefs, pool: CandidatePool, seeker_vec):
+        self.seeker = seeker
+        self.prefs = prefs
+        self.pool = pool
+        self.seeker_vec = seeker_vec
+        self.seeker_fingerprint = profile_fingerprint(seeker)
+        self.retained = {}          # 풀 위치 -> (tag, pref, sim, 반올림 총점)
+        self.floor = -np.inf        # retained 밖 후보자는 모두 floor 미만
+
+    def eligible(self, cand: UserProfile) -> bool:
+        return cand.id != self.seeker.id and cand.gender == self.seeker.gender
+
+    def top_k(self, k: int) -> List[MatchResult]:
+        # 반올림 총점 내림차순, 동점이면 후보자 순서 (calculate_hybrid_match 의 stable sort 와 동일)
+        order = sorted(self.retained, key=lambda pos: (-self.retained[pos][3], pos))[:k]
+        results = []
+        for rank, pos in enumerate(order):
+            tag, pref, sim, _ = self.retained[pos]
+            results.append(build_match_result(self.pool.candidates[pos], tag, pref, sim, rank=rank + 1))
+        return results
+
+def _cache_key(request: MatchRequest, pool_key: tuple) -> tuple:
+    p = request.preferences
+    return (request.myProfile.id, p.preferNonSmoker, p.preferGoodAtBugs, p.preferQuietSleeper, pool_key)
+
+class RankingCache:
+    def __init__(self, max_entries: int, reserve: int = MATCH_RANK_CACHE_RESERVE, top_k: int = MATCH_TOP_K):
+        self.max_entries = max_entries
+        self.reserve = reserve
+        self.top_k = top_k
+        self.entries = OrderedDict()  # key -> RankEntry (LRU)
+        self.pools = {}               # 후보자 id tuple -> CandidatePool
+        self.generation = 0           # 갱신/무효화 횟수 (계산 도중 갱신된 결과는 캐시하지 않음)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------- 조회 / 생성 ----------
+
+    def match(self, request: MatchRequest) -> List[MatchResult]:
+        pool_key = tuple(c.id for c in request.candidates)
+        key = _cache_key(request, pool_key)
+        pool = CandidatePool(request.candidates)
+        seeker_fingerprint = profile_fingerprint(request.myProfile)
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry is not None and entry.seeker_fingerprint == seeker_fingerprint
+                    and entry.pool.fingerprint == pool.fingerprint):
+                self.entries.move_to_end(key)
+                inc(CACHE_LOOKUPS, "rank", "hit")
+                return entry.top_k(self.top_k)
+            generation = self.generation
+        inc(CACHE_LOOKUPS, "rank", "miss")
+
+        entry = self._build(request, pool)
+        with self.lock:
+            if generation != self.generation:
+                return entry.top_k(self.top_k)
+            # 같은 id 의 풀이라도 내용이 다르면 (알림 없이 바뀐 프로필) 이전 풀의 항목은 모두 오래됨
+            cached_pool = self.pools.get(pool_key)
+            if cached_pool is not None and cached_pool.fingerprint != pool.fingerprint:
+                for stale in list(cached_pool.entries):
+                    self._drop(stale)
+            self._drop(key)
+            pool = self.pools.setdefault(pool_key, pool)
+            entry.pool = pool
+            pool.entries.add(key)
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+        return entry.top_k(self.top_k)
+
+    def _build(self, request: MatchRequest, pool: CandidatePool) -> RankEntry:
+        """전체 계산 후 상위 K + RESERVE 명 (floor 와 동점인 후보자 포함) 보관"""
+        seeker_vec, candidates, tag_scores, pref_scores = score_base(request, use_ann=False)
+        entry = RankEntry(request.myProfile, request.preferences, pool, seeker_vec)
+        if not candidates:
+            return entry
+
+        keep = self.top_k + self.reserve
+        base_scores = tag_scores + pref_scores
+        if seeker_vec is None:
+            sims = np.zeros(len(candidates))
+        elif MATCH_TWO_STAGE:
+            # 계산하지 않은 후보자의 반올림 상한 < 중단 시점 keep 번째 점수 <= floor
+            sims = two_stage_text_sims(seeker_vec, candidates, base_scores, keep)
+        else:
+            sims = compute_text_sims(seeker_vec, candidates)
+
+        totals = {i: round(float(base_scores[i] + sims[i] * W_TEXT), 1) for i in np.flatnonzero(~np.isnan(sims))}
+        if len(candidates) > keep:
+            entry.floor = sorted(totals.values(), reverse=True)[keep - 1]
+        for i, total in totals.items():
+            if total >= entry.floor:
+                pos = entry.pool.position[candidates[i].id]
+                entry.retained[pos] = (float(tag_scores[i]), float(pref_scores[i]), float(sims[i]), total)
+        return entry
+
+    # ---------- 무효화 / 증분 갱신 ----------
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        entry.pool.entries.discard(key)
+        if not entry.pool.entries:
+            self.pools = {k: p for k, p in self.pools.items() if p is not entry.pool}
+
+    def _invalidate_seeker(self, user_id: int) -> int:
+        keys = [key for key in self.entries if key[0] == user_id]
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def invalidate_seeker(self, user_id: int) -> int:
+        """seeker 본인 정보(프로필, criteria 벡터)가 바뀐 경우 그 seeker 의 항목 삭제"""
+        with self.lock:
+            self.generation += 1
+            return self._invalidate_seeker(user_id)
+
+    def update_candidate(self, user_id: int, profile: Optional[UserProfile] = None) -> dict:
+        """
+        후보자 한 명의 프로필(profile) 또는 self 벡터(profile=None, 저장소에서 다시 로드)가 바뀐 경우.
+        그 후보자를 포함한 풀의 seeker 들에 대해서만 재계산 후 patch.
+        저장된 벡터는 lock 밖에서 한 번만 읽음 (/match 조회가 디스크 I/O 를 기다리지 않도록).
+        """
+        stored_vec = load_user_vector(user_id, 'self')
+        with self.lock:
+            self.generation += 1
+            # 프로필 변경은 그 사용자가 seeker 인 항목에도 영향 (self 벡터 변경은 후보자 쪽만)
+            stats = {"invalidated": self._invalidate_seeker(user_id) if profile is not None else 0, "rescored": 0}
+            for pool in list(self.pools.values()):
+                pos = pool.position.get(user_id)
+                if pos is None:
+                    continue
+                if profile is not None:
+                    pool.replace(pos, profile)
+                cand = pool.candidates[pos]
+                keys = list(pool.entries)
+                entries = [self.entries[key] for key in keys]
+
+                tag, pref, sims = self._rescore(cand, entries, stored_vec)
+                for key, entry, t, p, s in zip(keys, entries, tag, pref, sims):
+                    stats["rescored"] += 1
+                    if not self._patch(entry, pos, cand, t, p, s):
+                        self._drop(key)
+                        stats["invalidated"] += 1
+        return stats
+
+    def _rescore(self, cand: UserProfile, entries: List[RankEntry], stored_vec: Optional[np.ndarray]):
+        """후보자 한 명 vs seeker S명 점수 (S,) - 벡터화. stored_vec: 저장소의 self 벡터 (인라인 임베딩이 없을 때 사용)"""
+        feats = candidate_features([cand])
+        tag = compute_tag_score_matrix([e.seeker for e in entries], feats)[:, 0]
+        pref = compute_pref_score_matrix([e.prefs for e in entries], feats)[:, 0]
+
+        sims = np.zeros(len(entries))
+        # load_candidate_vectors 와 같은 우선순위 (요청의 인라인 임베딩 -> 저장소)
+        vec = prepare_inline_vector(cand.selfIntroductionEmbedding) if cand.selfIntroductionEmbedding else stored_vec
+        cand_vec = None if vec is None else np.array([vec], dtype='float32')
+        if cand_vec is not None:
+            # 전체 계산과 같은 경로 (flat 인덱스, 단일 쿼리 검색) -> 텍스트 유사도가 비트 단위로 동일
+            index = build_text_index(cand_vec, "flat")
+            for i, e in enumerate(entries):
+                if e.seeker_vec is not None and e.seeker_vec.shape[1] == cand_vec.shape[1]:
+                    D, _ = index.search(e.seeker_vec, 1)
+                    sims[i] = max(0.0, float(D[0][0]))
+        return tag, pref, sims
+
+    def _patch(self, entry: RankEntry, pos: int, cand: UserProfile, tag: float, pref: float, sim: float) -> bool:
+        """retained 갱신. 불변식을 유지할 수 없으면 (상위 K 미달) False"""
+        total = round(float(tag) + float(pref) + float(sim) * W_TEXT, 1)
+        if entry.eligible(cand) and total >= entry.floor:
+            entry.retained[pos] = (float(tag), float(pref), float(sim), total)
+            return True
+
+        entry.retained.pop(pos, None)
+        if entry.floor == -np.inf:
+            # 모든 후보자를 보관 중 -> 제거만 하면 됨
+            return True
+        return len(entry.retained) >= self.top_k
+
+def get_rank_cache() -> Optional[RankingCache]:
+    """
+    매칭 결과 캐시 (MATCH_RANK_CACHE_SIZE=0 이면 None).
+    ANN 모드에서는 후보 집합이 텍스트 벡터에 따라 달라지므로 사용하지 않음.
+    """
+    global _cache
+    if MATCH_RANK_CACHE_SIZE <= 0 or get_ann_index() is not None:
+        return None
+    if _cache is None:
+        _cache = RankingCache(MATCH_RANK_CACHE_SIZE)
+    return _cache
@@ -1,16 +1,119 @@
-from fastapi import APIRouter
-from typing import List
-from .models import MatchRequest, MatchResult
-from .service import calculate_hybrid_match
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from .models import MatchRequest, MatchResult, BatchMatchRequest, AssignmentRequest, AssignmentResult, UserProfile
+from .workers import run_match, WorkerPoolBusy
+from .batch import iter_batch_matches
+from .stream import iter_ranked_matches, decode_cursor
+from .assignment import assign_rooms
+from .rank_cache import get_rank_cache
+from .profiles import get_scoring_profile, list_scoring_profiles, UnknownScoringProfile
+from .service import check_inline_embeddings, InlineEmbeddingMismatch
+from app.core.profiling import annotate
 
 router = APIRouter()
 
+def _check_scoring_profile(name: Optional[str]):
+    """요청의 점수 프로필 이름 검증 (스트리밍 / 워커 실행 전에 400 반환)"""
+    try:
+        get_scoring_profile(name)
+    except UnknownScoringProfile as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _check_inline_embeddings(profiles: List[UserProfile]):
+    """요청에 직접 포함된 임베딩 차원 검증 (활성 PCA 투영과 다르면 400)"""
+    try:
+        check_inline_embeddings(profiles)
+    except InlineEmbeddingMismatch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/match", response_model=List[MatchResult], summary="Get roommate matches")
 async def match_roommates(request: MatchRequest):
     """
     룸메이트 매칭 엔드포인트
+    - 매칭 계산은 워커 풀(MATCH_WORKERS)에서 실행, 대기 요청이 가득 차면 503
     """
     if not request.candidates:
         return []
-    matches = calculate_hybrid_match(request)
+    _check_scoring_profile(request.scoringProfile)
+    _check_inline_embeddings([request.myProfile, *request.candidates])
+    annotate(candidates=len(request.candidates))
+    try:
+        matches = await run_match(request)
+    except WorkerPoolBusy:
+        raise HTTPException(status_code=503, detail="Matching workers are busy", headers={"Retry-After": "1"})
     return matches
+
+@router.post("/match/stream", summary="Full candidate ranking (JSONL stream)")
+def stream_match_roommates(
+    request: MatchRequest,
+    offset: int = Query(0, ge=0, description="건너뛸 결과 수 (cursor 기준 이후)"),
+    limit: Optional[int] = Query(None, ge=1, description="최대 결과 수 (없으면 전체)"),
+    cursor: Optional[str] = Query(None, description="이전 응답 마지막 줄의 cursor"),
+):
+    """
+    전체 순위 스트리밍 엔드포인트 (관리자 도구용)
+    - 후보자 한 명당 한 줄씩 JSONL: MatchResult + "cursor"
+    - 정렬: totalScore 내림차순, 동점이면 userId 오름차순 (페이지 간 순서 고정)
+    """
+    _check_scoring_profile(request.scoringProfile)
+    _check_inline_embeddings([request.myProfile, *request.candidates])
+    annotate(candidates=len(request.candidates))
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+    def generate():
+        for item in iter_ranked_matches(request, offset, limit, cursor):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/batch", summary="Batch roommate matches (JSONL stream)")
+async def batch_match_roommates(request: BatchMatchRequest):
+    """
+    배치 매칭 엔드포인트 (배정 시즌용)
+    - 여러 seeker가 하나의 후보자 풀을 공유
+    - seeker 한 명당 한 줄씩 JSONL로 스트리밍: {"seekerId": ..., "matches": [...]}
+    """
+    _check_scoring_profile(request.scoringProfile)
+    _check_inline_embeddings([s.profile for s in request.seekers] + request.candidates)
+    annotate(seekers=len(request.seekers), candidates=len(request.candidates))
+    def generate():
+        for item in iter_batch_matches(request):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/assign", response_model=AssignmentResult, summary="Global dorm room assignment")
+def assign_dorm_rooms(request: AssignmentRequest):
+    """
+    기숙사 2인실 전체 배정 엔드포인트 (배정 시즌용)
+    - 양방향 하이브리드 점수의 평균으로 쌍 점수를 만들고 총점이 최대가 되도록 짝지음
+    - 같은 성별끼리만 배정, 성별 그룹 인원이 홀수면 한 명은 unassigned
+    """
+    _check_scoring_profile(request.scoringProfile)
+    _check_inline_embeddings([a.profile for a in request.applicants])
+    annotate(applicants=len(request.applicants))
+    return assign_rooms(request)
+
+@router.post("/cache/candidate", summary="Incrementally re-rank cached matches for an updated profile")
+def update_cached_candidate(profile: UserProfile):
+    """
+    사용자 프로필(생활 습관 등)이 바뀌었을 때 백엔드가 호출.
+    - 이 사용자를 후보자로 포함한 캐시 항목: 이 사용자 점수만 재계산해 순위 patch
+    - 이 사용자가 seeker 인 캐시 항목: 무효화
+    """
+    _check_inline_embeddings([profile])
+    cache = get_rank_cache()
+    if cache is None:
+        return {"status": "disabled", "rescored": 0, "invalidated": 0}
+    return {"status": "ok", **cache.update_candidate(profile.id, profile)}
+
+@router.get("/profiles", summary="List scoring profiles")
+def get_scoring_profiles():
+    """사용 가능한 점수 프로필 (가중치, 범위, 만점)"""
+    return list_scoring_profiles()
@@ -0,0 +1,93 @@
+import numpy as np
+from datetime import datetime
+from typing import List
+from .models import UserProfile, UserPreferences
+from .profiles import DEFAULT_PROFILE, ScoringProfile, scale_diff_scores
+
+# ==========================================
+# ⚡ Vectorized Tag / Preference Scoring
+# ==========================================
+# 후보자 전체를 numpy 배열로 한 번에 계산. 가중치/범위는 컴파일된 ScoringProfile (profiles.py).
+# default 프로필은 기존 per-candidate 루프와 연산 순서가 같음 (float64) -> 점수가 비트 단위로 동일.
+
+# default 프로필 가중치
+W_TAG = DEFAULT_PROFILE.w_tag    # Tag Score 만점
+W_PREF = DEFAULT_PROFILE.w_pref  # Preference Score 만점
+W_TEXT = DEFAULT_PROFILE.w_text  # Text Score 만점
+
+def candidate_features(candidates: List[UserProfile]) -> dict:
+    """후보자 속성을 numpy 배열로 변환"""
+    year = datetime.now().year
+    return {
+        "age": np.array([year - c.birthYear for c in candidates], dtype=np.int64),
+        "wake": np.array([c.wakeTime for c in candidates], dtype=np.int64),
+        "sleep": np.array([c.sleepTime for c in candidates], dtype=np.int64),
+        "clean": np.array([c.cleaningCycle.to_score() for c in candidates], dtype=np.int64),
+        "drink": np.array([c.drinkingStyle.to_score() for c in candidates], dtype=np.int64),
+        "smoker": np.array([c.smoker for c in candidates], dtype=bool),
+        "bugKiller": np.array([c.bugKiller for c in candidates], dtype=bool),
+        "snoring": np.array([c.snoring for c in candidates], dtype=bool),
+    }
+
+def tag_score_kernel(s: dict, c: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """
+    Tag Score: 나이 + 생활 시간 + 생활 습관 (default 5 + 20 + 15 = 40점 만점)
+    s: seeker 속성, c: 후보자 속성 (numpy broadcasting: (1,) x (C,) 또는 (S, 1) x (C,))
+    차이를 프로필 범위로 자른 뒤 lookup table 3번 조회.
+    """
+    p = profile or DEFAULT_PROFILE
+    age_d = np.minimum(np.abs(s["age"] - c["age"]), p.age_cap)
+    wake_d = np.minimum(np.abs(s["wake"] - c["wake"]), p.ranges["wake"])
+    sleep_d = np.minimum(np.abs(s["sleep"] - c["sleep"]), p.ranges["sleep"])
+    clean_d = np.minimum(np.abs(s["clean"] - c["clean"]), p.ranges["clean"])
+    drink_d = np.minimum(np.abs(s["drink"] - c["drink"]), p.ranges["drink"])
+
+    return p.age_lut[age_d] + p.time_lut[wake_d, sleep_d] + p.habit_lut[clean_d, drink_d]
+
+def compute_tag_scores(seeker: UserProfile, feats: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """한 명의 seeker vs 후보자 전체 Tag Score (C,)"""
+    return tag_score_kernel(candidate_features([seeker]), feats, profile)
+
+def compute_tag_score_matrix(seekers: List[UserProfile], feats: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """여러 seeker vs 후보자 전체 Tag Score 행렬 (S, C)"""
+    s = {key: arr[:, None] for key, arr in candidate_features(seekers).items()}
+    return tag_score_kernel(s, feats, profile)
+
+def compute_pref_scores(prefs: UserPreferences, feats: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """Preference Score (default 30점 만점): 체크한 선호 조건 만족 비율"""
+    w_pref = (profile or DEFAULT_PROFILE).w_pref
+    n = len(feats["age"])
+    active = []
+    if prefs.preferNonSmoker: active.append(~feats["smoker"])
+    if prefs.preferGoodAtBugs: active.append(feats["bugKiller"])
+    if prefs.preferQuietSleeper: active.append(~feats["snoring"])
+
+    if len(active) == 0:
+        # 선호 조건이 없으면 감점 없음 (만점)
+        return np.full(n, w_pref)
+    matched_cnt = np.sum(active, axis=0)
+    return (matched_cnt / len(active)) * w_pref
+
+def preference_flags(prefs_list: List[UserPreferences]) -> np.ndarray:
+    """선호 조건 활성 여부 (S, 3): 비흡연, 벌레 잡기, 코골이 없음"""
+    return np.array([[p.preferNonSmoker, p.preferGoodAtBugs, p.preferQuietSleeper] for p in prefs_list], dtype=np.int64).reshape(-1, 3)
+
+def pref_score_kernel(active: np.ndarray, feats: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """선호 조건 (S, 3) x 후보자 속성 -> Preference Score 행렬 (S, C)"""
+    w_pref = (profile or DEFAULT_PROFILE).w_pref
+    # 후보자 만족 여부 (3, C) -> 만족 개수 (S, C)
+    satisfied = np.array([~feats["smoker"], feats["bugKiller"], ~feats["snoring"]], dtype=np.int64)
+    matched_cnt = active @ satisfied
+    n_active = active.sum(axis=1, keepdims=True)
+
+    ratio = matched_cnt / np.maximum(n_active, 1)
+    # 선호 조건이 없으면 감점 없음 (만점)
+    return np.where(n_active == 0, w_pref, ratio * w_pref)
+
+def compute_pref_score_matrix(prefs_list: List[UserPreferences], feats: dict, profile: ScoringProfile = None) -> np.ndarray:
+    """여러 seeker의 선호 조건 vs 후보자 전체 Preference Score 행렬 (S, C)"""
+    return pref_score_kernel(preference_flags(prefs_list), feats, profile)
+
+def subset_features(feats: dict, idx) -> dict:
+    """속성 dict 의 일부 후보자만 선택"""
+    return {key: arr[idx] for key, arr in feats.items()}
@@ -1,12 +1,29 @@
+import os
+import time
+import heapq
+from contextlib import contextmanager
 import numpy as np
-import faiss
 from typing import List
-from app.users.service import load_user_vector
-from .models import MatchRequest, MatchResult, DrinkingStyle
+from app.users.service import load_user_vector, vector_mtime_ns, VECTOR_STORAGE_PATH
+from app.core.vector_format import l2_normalize
+from app.core.projection import get_active_projection
+from app.core.metrics import timed, observe, MATCH_SECONDS, MATCH_STAGE_SECONDS, MATCH_CANDIDATES, VECTOR_LOAD_SECONDS
+from app.core.tracing import span
+from app.core.logs import record_stage
+from .vector_index import build_text_index
+from .ann_index import get_ann_index, MATCH_ANN_TOP_M
+from .scoring import candidate_features, compute_tag_scores, compute_pref_scores
+from .profiles import ScoringProfile, DEFAULT_PROFILE, get_scoring_profile
+from .models import MatchRequest, MatchResult, UserProfile
 
-# 점수 가중치 상수
-W_PREF = 30.0  # Preference Score 만점
-W_TEXT = 30.0  # Text Score 만점
+# 최종 반환 개수
+MATCH_TOP_K = 20
+
+# 2단계 랭킹: 태그/선호 점수 상한으로 텍스트 유사도 계산 대상을 줄임 (결과는 전수 계산과 동일)
+MATCH_TWO_STAGE = os.getenv("MATCH_TWO_STAGE", "1") == "1"
+MATCH_TWO_STAGE_BATCH = int(os.getenv("MATCH_TWO_STAGE_BATCH", "64"))
+# 정규화 벡터의 내적 상한 (float32 오차 여유 포함)
+SIM_UPPER_BOUND = 1.0 + 1e-4
 
 # ==========================================
 # 📏 Helper Functions
@@ -19,154 +36,258 @@ def get_scale_diff_score(val1: int, val2: int, max_diff_range: int) -> float:
     normalized_diff = min(diff, max_diff_range) / max_diff_range
     return max(0.0, 1.0 - normalized_diff)
 
+class InlineEmbeddingMismatch(ValueError):
+    """요청에 포함된 임베딩 차원이 활성 PCA 투영의 입력 차원과 다름"""
+
+def _check_inline_dim(dim: int, projection):
+    if dim != projection.d_in:
+        raise InlineEmbeddingMismatch(
+            f"Inline embedding has {dim} dims, active projection '{projection.name}' expects {projection.d_in}")
+
+def check_inline_embeddings(profiles: List[UserProfile]):
+    """요청의 인라인 임베딩 차원 검증 (매칭 계산 전에 400 반환용). 불일치면 InlineEmbeddingMismatch"""
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    if projection is None:
+        return
+    for p in profiles:
+        for values in (p.selfIntroductionEmbedding, p.roommateCriteriaEmbedding):
+            if values:
+                _check_inline_dim(len(values), projection)
+
+def prepare_inline_vector(values) -> np.ndarray:
+    """
+    요청에 직접 포함된 임베딩을 저장소 벡터와 같은 공간으로 변환.
+    (L2 정규화 + 활성 PCA 투영이 있으면 투영, 투영 입력 차원과 다르면 InlineEmbeddingMismatch)
+    """
+    vec = l2_normalize(values)
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    if projection is not None:
+        _check_inline_dim(vec.shape[-1], projection)
+        vec = projection.apply(vec)
+    return vec
+
+def ann_prefilter(seeker_vec: np.ndarray, candidates: list) -> list:
+    """
+    ANN 모드: 캠퍼스 전체 인덱스에서 seeker와 텍스트가 가장 가까운 상위 M명만 남김.
+    인덱스에 없는 후보자(신규 가입자, 요청에 임베딩을 직접 포함한 후보자,
+    인덱스 생성 이후 벡터를 다시 저장한 후보자)는 항상 유지.
+    ANN 비활성화 또는 인덱스 차원 불일치 시 후보자 그대로 반환.
+    """
+    ann = get_ann_index()
+    if ann is None or seeker_vec is None or seeker_vec.shape[1] != ann.meta["dim"]:
+        return candidates
+
+    hits = ann.search(seeker_vec, MATCH_ANN_TOP_M)
+    # 제외 대상만 파일 시각 확인 (os.stat, 벡터 로드보다 훨씬 저렴)
+    return [
+        c for c in candidates
+        if c.id in hits or c.id not in ann.ids or c.selfIntroductionEmbedding
+        or ann.is_stale(c.id, vector_mtime_ns(c.id, "self"))
+    ]
+
+def build_match_result(cand: UserProfile, tag_score: float, pref_score: float, text_sim: float, rank: int = 0,
+                       profile: ScoringProfile = None) -> MatchResult:
+    tag_score = float(tag_score)
+    pref_score = float(pref_score)
+    text_score = float(text_sim) * (profile or DEFAULT_PROFILE).w_text
+    
+    # Final Sum
+    total_score = tag_score + pref_score + text_score
+    
+    return MatchResult(
+        userId=cand.id,
+        name=cand.name,
+        totalScore=round(total_score, 1),
+        rank=rank,
+        matchDetails={
+            "tagScore": round(tag_score, 1),
+            "prefScore": round(pref_score, 1),
+            "textScore": round(text_score, 1),
+            "age": cand.age
+        }
+    )
+
 # ==========================================
 # 🧠 Matching Logic
 # ==========================================
+@contextmanager
+def match_stage(name: str):
+    """매칭 단계: span (match.{name}) + 단계별 latency 메트릭 + 요청 로그의 단계별 시간"""
+    start = time.perf_counter()
+    try:
+        with span(f"match.{name}"):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(MATCH_STAGE_SECONDS, elapsed, name)
+        record_stage(name, elapsed)
 
-def calculate_hybrid_match(request: MatchRequest) -> List[MatchResult]:
+def load_seeker_vector(seeker: UserProfile):
+    """Seeker criteria 벡터 (1 x d) 또는 None"""
+    if seeker.roommateCriteriaEmbedding:
+        # If provided in request (fallback/debug), use it
+        return prepare_inline_vector([seeker.roommateCriteriaEmbedding])
+    # Load from disk
+    with timed(VECTOR_LOAD_SECONDS, "seeker"):
+        loaded = load_user_vector(seeker.id, 'criteria') # {id}_criteria.npy
+    if loaded is not None:
+        return np.array([loaded], dtype='float32')
+    return None
+
+def load_candidate_vectors(candidates: List[UserProfile]):
+    """
+    후보자 self 벡터 로드. Returns (벡터가 있는 후보자의 위치 목록, 벡터 행렬)
+    """
+    rows = []
+    vectors = []
+    with timed(VECTOR_LOAD_SECONDS, "candidates"):
+        for i, c in enumerate(candidates):
+            if c.selfIntroductionEmbedding:
+                # Provided in request
+                vec = prepare_inline_vector(c.selfIntroductionEmbedding)
+            else:
+                # Load from disk
+                vec = load_user_vector(c.id, 'self') # {id}_self.npy
+            if vec is not None:
+                rows.append(i)
+                vectors.append(vec)
+    if not vectors:
+        return rows, None
+    return rows, np.array(vectors, dtype='float32')
+
+def compute_text_sims(seeker_vec: np.ndarray, candidates: List[UserProfile]) -> np.ndarray:
+    """
+    후보자별 텍스트 유사도 (0.0 ~ 1.0, 벡터 없으면 0).
+    flat 인덱스의 단일 쿼리 검색은 후보자별 내적을 독립적으로 계산하므로
+    일부 후보자만 계산해도 전체 계산과 값이 동일함 (2단계 랭킹의 전제).
+    """
+    sims = np.zeros(len(candidates))
+    if seeker_vec is None or not candidates:
+        return sims
+
+    rows, candidate_matrix = load_candidate_vectors(candidates)
+    if candidate_matrix is None:
+        return sims
+
+    # Candidate Matrix (정규화된 벡터 -> 내적 == 코사인 유사도)
+    index = build_text_index(candidate_matrix, "flat")
+    k = len(rows)
+    D, I = index.search(seeker_vec, k)
+
+    for dist, idx in zip(D[0], I[0]):
+        if idx == -1: continue
+        sims[rows[idx]] = max(0.0, float(dist))
+    return sims
+
+def text_sim_fn(request: MatchRequest, seeker_vec: np.ndarray):
+    """
+    후보자 목록 -> 텍스트 유사도 함수. 상호 매칭(request.mutual)이면 양방향 유사도의 집계.
+    Returns None 이면 텍스트 점수 없음 (seeker 벡터 없음)
+    """
+    if request.mutual:
+        from .mutual import mutual_sim_fn
+        return mutual_sim_fn(request.myProfile, seeker_vec, request.mutualAggregation)
+    if seeker_vec is None:
+        return None
+    return lambda cands: compute_text_sims(seeker_vec, cands)
+
+def two_stage_text_sims(seeker_vec: np.ndarray, candidates: List[UserProfile], base_scores: np.ndarray, top_k: int,
+                        sim_fn=None, profile: ScoringProfile = None) -> np.ndarray:
+    """
+    2단계 랭킹.
+    1단계: tag + pref (전체 후보자, 벡터화) -> 점수 상한 = tag + pref + 텍스트 만점
+    2단계: 상한이 높은 순으로 텍스트 유사도 계산. 다음 후보자의 (반올림된) 상한이
+           현재 K번째 (반올림된) 총점보다 작으면 이후 후보자는 top-K에 들 수 없으므로 중단.
+    반올림은 단조 증가이고 중단 조건이 엄격한 부등호이므로 동점 처리까지 전수 계산과 동일.
+    sim_fn: 후보자 목록 -> 유사도 (기본: seeker_vec 단방향). 상한 SIM_UPPER_BOUND 를 넘지 않아야 함.
+    Returns 텍스트 유사도 (계산하지 않은 후보자는 NaN).
+    """
+    sim_fn = sim_fn or (lambda cands: compute_text_sims(seeker_vec, cands))
+    w_text = (profile or DEFAULT_PROFILE).w_text
+    sims = np.full(len(candidates), np.nan)
+    upper = base_scores + w_text * SIM_UPPER_BOUND
+    order = np.argsort(-upper, kind="stable")
+
+    top_totals = []  # min-heap: 현재까지 top-K 반올림 총점
+    for start in range(0, len(order), MATCH_TWO_STAGE_BATCH):
+        batch = order[start:start + MATCH_TWO_STAGE_BATCH]
+        if len(top_totals) == top_k and round(float(upper[batch[0]]), 1) < top_totals[0]:
+            break
+
+        batch_sims = sim_fn([candidates[i] for i in batch])
+        sims[batch] = batch_sims
+        for i, sim in zip(batch, batch_sims):
+            total = round(float(base_scores[i] + sim * w_text), 1)
+            if len(top_totals) < top_k:
+                heapq.heappush(top_totals, total)
+            elif total > top_totals[0]:
+                heapq.heapreplace(top_totals, total)
+    return sims
+
+def score_base(request: MatchRequest, use_ann: bool = True, profile: ScoringProfile = None):
+    """
+    1~2단계 공통: seeker 벡터, Hard Filter 를 통과한 후보자, Tag / Preference 점수 (profile 가중치).
+    Returns (seeker_vec, candidates, tag_scores, pref_scores)
+    """
     seeker = request.myProfile
-    prefs = request.preferences
     candidates = request.candidates
-    
+
     # 1. FAISS Vector Search 준비
     # Load embeddings directly from storage
-    
-    # 1-1. Seeker Criteria Embedding
-    seeker_vec = None
-    if seeker.roommateCriteriaEmbedding:
-        # If provided in request (fallback/debug), use it
-        seeker_vec = np.array([seeker.roommateCriteriaEmbedding], dtype='float32')
-    else:
-        # Load from disk
-        loaded = load_user_vector(seeker.id, 'criteria') # {id}_criteria.npy
-        if loaded is not None:
-             seeker_vec = np.array([loaded], dtype='float32')
-             
-    # 1-2. Candidates Self Embeddings
-    valid_candidates_with_emb = []
-    candidate_vectors = []
-    
-    for c in candidates:
-        if c.selfIntroductionEmbedding:
-             # Provided in request
-             valid_candidates_with_emb.append(c)
-             candidate_vectors.append(c.selfIntroductionEmbedding)
-        else:
-             # Load from disk
-             loaded = load_user_vector(c.id, 'self') # {id}_self.npy
-             if loaded is not None:
-                 valid_candidates_with_emb.append(c)
-                 candidate_vectors.append(loaded)
-    
-    text_scores_map = {} 
-    
-    if seeker_vec is not None and len(candidate_vectors) > 0:
-        d = seeker_vec.shape[1]
-        index = faiss.IndexFlatIP(d) 
-        
-        # Candidate Matrix
-        candidate_matrix = np.array(candidate_vectors, dtype='float32')
-        faiss.normalize_L2(candidate_matrix)
-        index.add(candidate_matrix)
-        
-        # Query Vector
-        faiss.normalize_L2(seeker_vec)
-        
-        k = len(candidate_vectors)
-        D, I = index.search(seeker_vec, k)
-        
-        distances = D[0]
-        indices = I[0]
-        
-        for i, idx in enumerate(indices):
-            if idx == -1: continue
-            c_user = valid_candidates_with_emb[idx]
-            sim = max(0.0, float(distances[i]))
-            text_scores_map[c_user.id] = sim
-
-    # 2. Scoring Loop
-    results = []
-    
-    # Weights Configuration (Total 100)
-    W_TAG = 40.0
-    W_PREF = 30.0
-    W_TEXT = 30.0
-    
-    for cand in candidates:
-        if cand.id == seeker.id: continue
-        
-        # Hard Filter: Gender (같은 성별끼리만 매칭)
-        if cand.gender != seeker.gender:
-            continue
-
-        # --- A. Tag Score (40점 만점) ---
-        # 1. Age (10점 배점)
-        # 0살 차이 10점, 1살 차이 9점 ... 10살 이상 0점
-        cand_age = cand.age
-        seeker_age = seeker.age
-        age_diff = abs(seeker_age - cand_age)
-        
-        # 100점 만점 기준 점수: 100 - (차이 * 10)
-        age_base_score = max(0, 100 - (age_diff * 10))
-        # 40점 중 5점 비중으로 반영 (0.05 곱하기)
-        age_p = age_base_score * 0.05
-        
-        # 2. Time (20점) -> Wake(10) + Sleep(10)
-        # Wake range: 5~11 (max diff 6)
-        wake_p = get_scale_diff_score(seeker.wakeTime, cand.wakeTime, 6)
-        # Sleep range: 8~14 (max diff 6)
-        sleep_p = get_scale_diff_score(seeker.sleepTime, cand.sleepTime, 6)
-        # Time Total: 20점 (기상 10 + 취침 10)
-        time_p = (wake_p + sleep_p) / 2.0 * 20.0
-        
-        # 3. Habits (15점) -> Cleaning(7.5) + Drinking(7.5)
-        # Cleaning range: 0~4 (max diff 4)
-        clean_p = get_scale_diff_score(seeker.cleaningCycle.to_score(), cand.cleaningCycle.to_score(), 4)
-        # Drinking range: 0~2 (max diff 2)
-        drink_p = get_scale_diff_score(seeker.drinkingStyle.to_score(), cand.drinkingStyle.to_score(), 2)
-        habit_p = (clean_p + drink_p) / 2.0 * 15.0
-        
-        tag_score = age_p + time_p + habit_p
+    # 저장소 벡터는 저장 시점에 L2 정규화(+PCA 투영)됨 -> 요청에 포함된 벡터만 변환
+    with match_stage("seeker_vector"):
+        seeker_vec = load_seeker_vector(seeker)
 
-        # --- B. Preference Score (30점 만점) ---
-        active_prefs = []
-        if prefs.preferNonSmoker: active_prefs.append(lambda u: not u.smoker)
-        if prefs.preferGoodAtBugs: active_prefs.append(lambda u: u.bugKiller)
-        if prefs.preferQuietSleeper: active_prefs.append(lambda u: not u.snoring)
-        
-        if len(active_prefs) == 0:
-            # 선호 조건이 없으면 감점 없음 (만점)
-            pref_score = W_PREF
+    # (선택) ANN 후보 축소
+    if use_ann:
+        with match_stage("ann_prefilter"):
+            candidates = ann_prefilter(seeker_vec, candidates)
+
+    # Hard Filter: 자기 자신 제외, 같은 성별끼리만 매칭
+    candidates = [c for c in candidates if c.id != seeker.id and c.gender == seeker.gender]
+    if not candidates:
+        return seeker_vec, candidates, np.zeros(0), np.zeros(0)
+
+    # 2. Tag (40) + Preference (30) Score - 전체 후보자 벡터화 계산
+    with match_stage("tag_pref"):
+        feats = candidate_features(candidates)
+        tag_scores = compute_tag_scores(seeker, feats, profile)
+        pref_scores = compute_pref_scores(request.preferences, feats, profile)
+    return seeker_vec, candidates, tag_scores, pref_scores
+
+def calculate_hybrid_match(request: MatchRequest) -> List[MatchResult]:
+    observe(MATCH_CANDIDATES, len(request.candidates))
+    with span("match", seeker_id=request.myProfile.id, candidates=len(request.candidates)), timed(MATCH_SECONDS):
+        return _calculate_hybrid_match(request)
+
+def _calculate_hybrid_match(request: MatchRequest) -> List[MatchResult]:
+    profile = get_scoring_profile(request.scoringProfile)
+    seeker_vec, candidates, tag_scores, pref_scores = score_base(request, profile=profile)
+    if not candidates:
+        return []
+    base_scores = tag_scores + pref_scores
+
+    # 3. Text Score (30) - flat 인덱스 (정확한 내적) 이므로 2단계 랭킹 결과는 전수 계산과 동일
+    with match_stage("text"):
+        sim_fn = text_sim_fn(request, seeker_vec)
+        if sim_fn is None:
+            text_sims = np.zeros(len(candidates))
+        elif MATCH_TWO_STAGE:
+            text_sims = two_stage_text_sims(seeker_vec, candidates, base_scores, MATCH_TOP_K, sim_fn, profile)
         else:
-            matched_cnt = sum(1 for check in active_prefs if check(cand))
-            # 만족 비율만큼 점수 부여 (== 불일치 비율만큼 감점)
-            pref_score = (matched_cnt / len(active_prefs)) * W_PREF
-        
-        # --- C. Text Score (30점 만점) ---
-        txt_sim = text_scores_map.get(cand.id, 0.0)
-        text_score = txt_sim * W_TEXT
-        
-        # Final Sum
-        total_score = tag_score + pref_score + text_score
-        
-        # 결과 저장
-        results.append(MatchResult(
-            userId=cand.id,
-            name=cand.name,
-            totalScore=round(total_score, 1),
-            rank=0,
-            matchDetails={
-                "tagScore": round(tag_score, 1),
-                "prefScore": round(pref_score, 1),
-                "textScore": round(text_score, 1),
-                "age": cand.age
-            }
-        ))
-        
-    results.sort(key=lambda x: x.totalScore, reverse=True)
+            text_sims = sim_fn(candidates)
+
+    # 4. 결과 생성 (텍스트 유사도를 계산한 후보자만)
+    with match_stage("results"):
+        results = []
+        for i, cand in enumerate(candidates):
+            if np.isnan(text_sims[i]): continue
+            results.append(build_match_result(cand, tag_scores[i], pref_scores[i], text_sims[i], profile=profile))
+
+        results.sort(key=lambda x: x.totalScore, reverse=True)
     
     final_results = []
-    for i, res in enumerate(results[:20]):
+    for i, res in enumerate(results[:MATCH_TOP_K]):
         res.rank = i + 1
         final_results.append(res)
         
@@ -0,0 +1,69 @@
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from .models import MatchRequest
+from .profiles import get_scoring_profile
+from .service import score_base, text_sim_fn, two_stage_text_sims, build_match_result, MATCH_TWO_STAGE
+
+# ==========================================
+# 🌊 Full Ranking Stream (NDJSON)
+# ==========================================
+# 관리자 도구용: 후보자 전체 순위를 한 줄에 한 명씩 스트리밍.
+# 정렬 키 (안정적): 총점(소수 첫째 자리 반올림) 내림차순, 동점이면 userId 오름차순
+# 커서 "총점:userId" = 마지막으로 받은 줄의 정렬 키 -> 다음 요청은 그 뒤부터 (keyset pagination)
+# 점수는 numpy 배열로만 유지하고 MatchResult 는 줄을 보낼 때 하나씩 생성 -> 메모리는 후보자 수와 무관하게 평탄
+# ANN 후보 축소는 적용하지 않음 (전체 순위)
+
+def encode_cursor(total_score: float, user_id: int) -> str:
+    return f"{total_score:.1f}:{user_id}"
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """'87.5:123' -> (87.5, 123). 형식이 잘못되면 ValueError"""
+    score, sep, user_id = cursor.partition(":")
+    if not sep:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return round(float(score), 1), int(user_id)
+
+def iter_ranked_matches(request: MatchRequest, offset: int = 0, limit: Optional[int] = None,
+                        cursor: Optional[str] = None) -> Iterator[dict]:
+    """순위대로 결과 dict (MatchResult + cursor) 를 yield. rank 는 전체 순위 기준 (1부터)"""
+    after = decode_cursor(cursor) if cursor else None
+    profile = get_scoring_profile(request.scoringProfile)
+    seeker_vec, candidates, tag_scores, pref_scores = score_base(request, use_ann=False, profile=profile)
+    if not candidates:
+        return
+
+    # 텍스트 유사도: 커서 없이 limit 만 있으면 상위 offset+limit 만 필요 -> 2단계 랭킹으로 계산량 축소
+    base_scores = tag_scores + pref_scores
+    sim_fn = text_sim_fn(request, seeker_vec)
+    if sim_fn is None:
+        sims = np.zeros(len(candidates))
+    elif limit is not None and after is None and MATCH_TWO_STAGE:
+        sims = two_stage_text_sims(seeker_vec, candidates, base_scores, offset + limit, sim_fn, profile)
+    else:
+        sims = sim_fn(candidates)
+
+    computed = ~np.isnan(sims)
+    # build_match_result 와 같은 Python round (표시되는 totalScore 와 정렬 키가 일치)
+    raw = base_scores + np.where(computed, sims, 0.0) * profile.w_text
+    totals = np.array([round(float(x), 1) for x in raw])
+    user_ids = np.array([c.id for c in candidates], dtype=np.int64)
+
+    # lexsort: 마지막 키가 1순위 -> (-총점, userId)
+    idx = np.flatnonzero(computed)
+    order = idx[np.lexsort((user_ids[idx], -totals[idx]))]
+
+    start = 0
+    if after is not None:
+        # 커서 뒤의 첫 위치: (총점 < s) 또는 (총점 == s 이고 userId > id)
+        after_score, after_id = after
+        ranked_totals, ranked_ids = totals[order], user_ids[order]
+        before = (ranked_totals > after_score) | ((ranked_totals == after_score) & (ranked_ids <= after_id))
+        start = int(before.sum())
+    start += offset
+    stop = len(order) if limit is None else min(len(order), start + limit)
+
+    for rank in range(start, stop):
+        i = order[rank]
+        result = build_match_result(candidates[i], tag_scores[i], pref_scores[i], sims[i], rank=rank + 1, profile=profile).model_dump()
+        result["cursor"] = encode_cursor(result["totalScore"], result["userId"])
+        yield result
@@ -0,0 +1,64 @@
+import numpy as np
+import faiss
+
+# ==========================================
+# 🔎 Text Vector Index
+# ==========================================
+# flat : IndexFlatIP, 정확한 내적 (4 bytes/dim)
+# fp16 : IndexScalarQuantizer QT_fp16 (2 bytes/dim)
+# sq8  : IndexScalarQuantizer QT_8bit (1 byte/dim)
+# 매칭 요청은 후보자 벡터를 요청마다 float32 행렬로 읽어 flat 인덱스만 사용 (양자화 인덱스를 만들어도
+# float32 행렬이 이미 메모리에 있으므로 절감이 없음). 메모리 절감은 저장 dtype (VECTOR_STORAGE_DTYPE) 으로,
+# fp16 / sq8 은 오프라인 평가용 (benchmarks/bench_quantization.py).
+
+INDEX_TYPES = ("flat", "fp16", "sq8")
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+def build_text_index(matrix: np.ndarray, index_type: str = "flat") -> faiss.Index:
+    """정규화된 벡터 행렬로 내적(Inner Product) 인덱스 생성"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported index type: {index_type}")
+
+    d = matrix.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(d)
+    else:
+        index = faiss.IndexScalarQuantizer(d, _SQ_TYPES[index_type], faiss.METRIC_INNER_PRODUCT)
+        index.train(matrix)
+    index.add(matrix)
+    return index
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """인덱스에 저장된 벡터 코드의 메모리 사용량 (bytes)"""
+    return index.ntotal * index.sa_code_size()
+
+def rescore_exact(query: np.ndarray, exact_matrix: np.ndarray, D: np.ndarray, I: np.ndarray, rescore_k: int):
+    """
+    근사 검색 결과(D, I) 중 상위 rescore_k개를 float32 원본 벡터로 재계산하고 재정렬.
+    나머지 결과는 근사 점수를 그대로 유지.
+    """
+    D = D.copy()
+    I = I.copy()
+    for row in range(I.shape[0]):
+        n = min(rescore_k, I.shape[1])
+        head = I[row, :n]
+        valid = head >= 0
+        exact = exact_matrix[head[valid]] @ query[row]
+        head_scores = D[row, :n].copy()
+        head_scores[valid] = exact
+
+        order = np.argsort(-head_scores, kind="stable")
+        D[row, :n] = head_scores[order]
+        I[row, :n] = head[order]
+    return D, I
+
+def search_text_index(index: faiss.Index, query: np.ndarray, k: int, exact_matrix: np.ndarray = None, rescore_k: int = 0):
+    """인덱스 검색 + (선택) 상위 rescore_k개 정밀 재계산"""
+    D, I = index.search(query, k)
+    if rescore_k > 0 and exact_matrix is not None:
+        D, I = rescore_exact(query, exact_matrix, D, I, rescore_k)
+    return D, I
@@ -0,0 +1,94 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from starlette.concurrency import run_in_threadpool
+import app.users.service as user_service
+from app.core.vector_snapshot import build_snapshot, open_snapshot
+from app.core.tracing import current_context, run_with_context
+from .models import MatchRequest, MatchResult
+from .service import calculate_hybrid_match
+from .rank_cache import get_rank_cache
+
+# ==========================================
+# 🏭 Matching Worker Pool
+# ==========================================
+# CPU-bound 매칭 (점수 계산 + FAISS 검색)을 이벤트 루프 밖에서 실행.
+#   MATCH_WORKERS=0 (기본) : 스레드풀 (이벤트 루프만 막지 않음, GIL 공유)
+#   MATCH_WORKERS=N        : 프로세스 N개. 시작 시 벡터 스냅샷(memory-mapped)을 만들고
+#                            모든 워커가 같은 파일을 mmap 으로 열어 페이지 캐시 공유
+# Backpressure: 처리 중 + 대기 요청이 MATCH_MAX_PENDING 이상이면 즉시 거절 (503 + Retry-After)
+
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", "0"))
+MATCH_MAX_PENDING = int(os.getenv("MATCH_MAX_PENDING", "0")) or 4 * max(1, MATCH_WORKERS)
+MATCH_SNAPSHOT_DIR = os.getenv("MATCH_SNAPSHOT_DIR", "storage/vector_snapshot")  # 빈 값이면 스냅샷 미사용
+# fork 는 uvicorn 스레드가 있는 프로세스에서 안전하지 않으므로 기본 spawn
+MATCH_WORKER_START_METHOD = os.getenv("MATCH_WORKER_START_METHOD", "spawn")
+
+_pool = None
+
+class WorkerPoolBusy(Exception):
+    """대기 요청이 MATCH_MAX_PENDING 에 도달"""
+
+def _init_worker(storage_path: str, snapshot_dir: str):
+    """워커 프로세스 초기화: 저장소 경로 + 벡터 스냅샷 연결"""
+    user_service.VECTOR_STORAGE_PATH = storage_path
+    if snapshot_dir:
+        user_service.attach_snapshot(open_snapshot(snapshot_dir, storage_path))
+
+class MatchWorkerPool:
+    def __init__(self, workers: int = 0, max_pending: int = None, snapshot_dir: str = None):
+        self.workers = workers
+        self.max_pending = max_pending or 4 * max(1, workers)
+        self.pending = 0
+        self.executor = None
+        if workers > 0:
+            storage_path = user_service.VECTOR_STORAGE_PATH
+            if snapshot_dir:
+                build_snapshot(storage_path, snapshot_dir)
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(MATCH_WORKER_START_METHOD),
+                initializer=_init_worker,
+                initargs=(storage_path, snapshot_dir),
+            )
+
+    async def run(self, fn, *args):
+        """fn(*args) 를 워커(또는 스레드)에서 실행하고 결과를 await. 가득 차면 WorkerPoolBusy"""
+        # pending 은 이벤트 루프 스레드에서만 변경 -> lock 불필요
+        if self.pending >= self.max_pending:
+            raise WorkerPoolBusy()
+        self.pending += 1
+        try:
+            if self.executor is None:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.wrap_future(self.executor.submit(fn, *args))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+def start_pool() -> MatchWorkerPool:
+    """프로세스당 하나의 매칭 풀 (환경 변수 설정). 서버 시작 시 호출하면 스냅샷 생성을 미리 끝냄"""
+    global _pool
+    if _pool is None:
+        _pool = MatchWorkerPool(MATCH_WORKERS, MATCH_MAX_PENDING, MATCH_SNAPSHOT_DIR or None)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+async def run_match(request: MatchRequest) -> List[MatchResult]:
+    cache = get_rank_cache()
+    if cache is not None and not request.mutual and request.scoringProfile is None:
+        # 결과 캐시는 API 프로세스 메모리에 있으므로 스레드에서 실행
+        return await run_in_threadpool(cache.match, request)
+    # 워커 프로세스에서도 같은 trace 로 기록되도록 현재 span 정보 전달
+    return await start_pool().run(run_with_context, current_context(), calculate_hybrid_match, request)
@@ -0,0 +1,183 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# ==========================================
+# 🧩 Duplicate Clusters (incremental, per location partition)
+# ==========================================
+# 같은 고장을 찍은 신고들은 CLIP 공간에서 뭉쳐 있음 -> 미처리 신고를 클러스터로 묶고 중심(centroid) 보관.
+# 새 신고는 먼저 클러스터 중심들과 비교하고, 가능성이 있는 클러스터의 신고만 개별 비교.
+# 각 클러스터는 반경 (중심과 가장 먼 멤버의 유사도) 을 함께 보관하므로 가지치기는 정확함:
+#   멤버 m 과 유사도 >= threshold 이려면  angle(q, 중심) <= acos(threshold) + acos(반경)  (삼각 부등식)
+#   -> 이 조건을 만족하지 않는 클러스터는 비교하지 않아도 전체 비교와 결과가 같음.
+# 등록: 가장 가까운 중심과 유사도 >= REPAIR_CLUSTER_THRESHOLD 면 그 클러스터에 추가 (중심 = 멤버 평균, 정규화),
+#       아니면 새 클러스터. 처리 완료 / 만료로 멤버가 모두 빠지면 클러스터 삭제.
+# 등록 순서에 따라 클러스터가 한쪽으로 치우칠 수 있으므로 recluster (batch) 로 주기적으로 다시 묶음.
+#   REPAIR_CLUSTERING            1 (기본) / 0 = 클러스터 없이 partition 전체 비교
+#   REPAIR_CLUSTER_THRESHOLD     클러스터 추가 기준 유사도 (기본 0.80)
+#   REPAIR_RECLUSTER_ITERATIONS  batch 재클러스터링 반복 횟수 (기본 5)
+
+REPAIR_CLUSTERING = os.getenv("REPAIR_CLUSTERING", "1") == "1"
+REPAIR_CLUSTER_THRESHOLD = float(os.getenv("REPAIR_CLUSTER_THRESHOLD", "0.80"))
+REPAIR_RECLUSTER_ITERATIONS = int(os.getenv("REPAIR_RECLUSTER_ITERATIONS", "5"))
+
+# float32 내적 오차 여유 (가지치기가 경계의 멤버를 놓치지 않도록)
+_ANGLE_SLACK = 1e-3
+
+def _angle(sims) -> np.ndarray:
+    return np.arccos(np.clip(sims, -1.0, 1.0))
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+class Cluster:
+    def __init__(self, cluster_id: int):
+        self.id = cluster_id
+        self.members: Dict[int, np.ndarray] = {}  # report id -> 임베딩
+        self.total = None
+        self.centroid = None
+        self.radius = 1.0  # 중심과 멤버 유사도의 최솟값
+
+    def _refresh(self):
+        norm = np.linalg.norm(self.total)
+        if norm < 1e-6:
+            # 반대 방향 멤버만 남은 경우: 아무 멤버나 중심으로
+            self.centroid = next(iter(self.members.values())).copy()
+        else:
+            self.centroid = (self.total / norm).astype('float32')
+        self.radius = float(np.min(np.stack(list(self.members.values())) @ self.centroid))
+
+    def add(self, report_id: int, emb: np.ndarray):
+        self.members[report_id] = emb
+        self.total = emb.astype('float64') if self.total is None else self.total + emb
+        self._refresh()
+
+    def remove(self, report_id: int):
+        emb = self.members.pop(report_id)
+        if self.members:
+            self.total = self.total - emb
+            self._refresh()
+
+class ClusterSet:
+    """partition 하나의 클러스터들 (호출하는 쪽에서 lock)"""
+
+    def __init__(self, threshold: float = REPAIR_CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self.clusters: Dict[int, Cluster] = {}
+        self.assignment: Dict[int, int] = {}  # report id -> cluster id
+        self._next_id = 1
+        self._cache = None  # (cluster ids, 중심 행렬, 반경) - 변경 시 다시 생성
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def _matrix(self) -> Tuple[List[int], Optional[np.ndarray], np.ndarray]:
+        if self._cache is None:
+            clusters = list(self.clusters.values())
+            centroids = np.stack([c.centroid for c in clusters]) if clusters else None
+            self._cache = ([c.id for c in clusters], centroids, np.array([c.radius for c in clusters]))
+        return self._cache
+
+    def _new_cluster(self) -> Cluster:
+        cluster = self.clusters[self._next_id] = Cluster(self._next_id)
+        self._next_id += 1
+        return cluster
+
+    def add(self, report_id: int, emb: np.ndarray) -> int:
+        """가장 가까운 클러스터에 추가하거나 새 클러스터 생성. Returns cluster id"""
+        self.remove(report_id)
+        cluster_ids, centroids, _ = self._matrix()
+        cluster = None
+        if centroids is not None and centroids.shape[1] == emb.shape[0]:
+            sims = centroids @ emb
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                cluster = self.clusters[cluster_ids[best]]
+        if cluster is None:
+            cluster = self._new_cluster()
+        cluster.add(report_id, emb)
+        self.assignment[report_id] = cluster.id
+        self._cache = None
+        return cluster.id
+
+    def remove(self, report_id: int) -> bool:
+        cluster_id = self.assignment.pop(report_id, None)
+        if cluster_id is None:
+            return False
+        cluster = self.clusters[cluster_id]
+        cluster.remove(report_id)
+        if not cluster.members:
+            del self.clusters[cluster_id]
+        self._cache = None
+        return True
+
+    def candidates(self, query_emb: np.ndarray, threshold: float) -> Tuple[List[int], int]:
+        """
+        유사도 >= threshold 인 멤버가 있을 수 있는 클러스터의 report id 들.
+        Returns (report ids, 비교한 중심 수)
+        """
+        cluster_ids, centroids, radius = self._matrix()
+        if centroids is None:
+            return [], 0
+        reach = _angle(threshold) + _angle(radius) + _ANGLE_SLACK
+        keep = np.flatnonzero(_angle(centroids @ query_emb) <= reach)
+        ids = [report_id for i in keep for report_id in self.clusters[cluster_ids[i]].members]
+        return ids, len(cluster_ids)
+
+    def rebuild(self, ids: np.ndarray, matrix: np.ndarray, iterations: int = REPAIR_RECLUSTER_ITERATIONS):
+        """전체 멤버를 recluster 결과로 다시 묶음"""
+        self.clusters, self.assignment, self._cache = {}, {}, None
+        rows = {int(report_id): row for row, report_id in enumerate(ids)}
+        for group in recluster(ids, matrix, self.threshold, iterations):
+            cluster = self._new_cluster()
+            for report_id in group:
+                cluster.add(report_id, matrix[rows[report_id]])
+                self.assignment[report_id] = cluster.id
+
+    def stats(self) -> dict:
+        sizes = [len(c.members) for c in self.clusters.values()]
+        return {"clusters": len(sizes), "largest_cluster": max(sizes, default=0)}
+
+# ---------- batch ----------
+
+def recluster(ids, matrix: np.ndarray, threshold: float = REPAIR_CLUSTER_THRESHOLD,
+              iterations: int = REPAIR_RECLUSTER_ITERATIONS) -> List[List[int]]:
+    """
+    등록 순서에 의존하지 않게 다시 묶기 (이력 데이터 / 주기적 정리용).
+    1) leader 방식으로 초기 클러스터 (중심과 유사도 < threshold 면 새 클러스터)
+    2) 각 신고를 가장 가까운 중심에 재배정 + 중심 재계산 (spherical k-means), 변화가 없으면 중단.
+       가장 가까운 중심과도 threshold 미만인 신고는 단독 클러스터로 분리.
+    Returns report id 묶음 목록 (클러스터 크기 내림차순)
+    """
+    ids = np.asarray(ids, dtype='int64')
+    matrix = np.asarray(matrix, dtype='float32')
+    if len(ids) == 0:
+        return []
+
+    # 1) leader: 중심 행렬을 키워가며 한 번 훑기
+    centroids = np.zeros((len(ids), matrix.shape[1]), dtype='float32')
+    count = 0
+    for vec in matrix:
+        if count == 0 or np.max(centroids[:count] @ vec) < threshold:
+            centroids[count] = vec
+            count += 1
+    centroids = centroids[:count]
+
+    labels = None
+    for _ in range(max(iterations, 1)):
+        # 2) 재배정 (행렬 곱 한 번) + 중심 재계산
+        sims = matrix @ centroids.T
+        new_labels = np.argmax(sims, axis=1)
+        outliers = np.flatnonzero(sims[np.arange(len(ids)), new_labels] < threshold)
+        new_labels[outliers] = len(centroids) + np.arange(len(outliers))
+        _, new_labels = np.unique(new_labels, return_inverse=True)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        totals = np.zeros((labels.max() + 1, matrix.shape[1]), dtype='float64')
+        np.add.at(totals, labels, matrix)
+        centroids = _normalize_rows(totals).astype('float32')
+
+    groups = [ids[labels == label].tolist() for label in range(labels.max() + 1)]
+    return sorted(groups, key=len, reverse=True)
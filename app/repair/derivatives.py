@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import threading
+import contextvars
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Optional
+from functools import partial
+from PIL import Image, ImageOps, features
+from app.core.metrics import observe, REPAIR_STAGE_SECONDS
+from app.core.tracing import span
+from app.core.logs import error_fields
+import app.core.storage as storage
+
+# ==========================================
+# 🖼️ Repair Image Derivatives (thumbnail / medium)
+# ==========================================
+# 신고 이미지 저장 시 (save_report_files) 축소본을 백그라운드 스레드풀에서 생성.
+#   storage/repair_derivatives/{id}_{size}.{webp|jpg}
+# 클라이언트는 /api/repair/images/{id}/{size} 로 요청 (size = original / thumb / medium).
+# 아직 생성되지 않은 축소본은 요청 시 생성 (진행 중이면 그 작업을 기다림).
+# 축소본은 report id 별로 바뀌지 않으므로 Cache-Control immutable + ETag.
+#   REPAIR_DERIVATIVE_SIZES    "thumb=256,medium=1024" (긴 변 기준 최대 픽셀, 빈 값 = 백그라운드 생성 안 함)
+#   REPAIR_DERIVATIVE_FORMAT   webp (기본, Pillow 에 WebP 지원이 없으면 jpeg) / jpeg
+#   REPAIR_DERIVATIVE_QUALITY  80
+#   REPAIR_DERIVATIVE_WORKERS  생성 스레드 수 (기본 2)
+
+REPAIR_DERIVATIVE_DIR = "storage/repair_derivatives"
+REPAIR_DERIVATIVE_SIZES = os.getenv("REPAIR_DERIVATIVE_SIZES", "thumb=256,medium=1024")
+REPAIR_DERIVATIVE_FORMAT = os.getenv("REPAIR_DERIVATIVE_FORMAT", "webp")
+REPAIR_DERIVATIVE_QUALITY = int(os.getenv("REPAIR_DERIVATIVE_QUALITY", "80"))
+REPAIR_DERIVATIVE_WORKERS = int(os.getenv("REPAIR_DERIVATIVE_WORKERS", "2"))
+
+IMAGE_ROUTE = "/api/repair/images"
+ORIGINAL_SIZE = "original"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+logger = logging.getLogger(__name__)
+
+def parse_sizes(spec: str) -> Dict[str, int]:
+    """'thumb=256,medium=1024' -> {이름: 긴 변 최대 픽셀}"""
+    sizes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name.strip() == ORIGINAL_SIZE or int(value) < 1:
+            raise ValueError(f"Invalid derivative size: {item}")
+        sizes[name.strip()] = int(value)
+    return sizes
+
+DERIVATIVE_SIZES = parse_sizes(REPAIR_DERIVATIVE_SIZES)
+
+def _output_format() -> tuple:
+    """(Pillow 포맷, 확장자)"""
+    if REPAIR_DERIVATIVE_FORMAT == "webp" and features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+_executor = None
+_pending: Dict[int, Future] = {}
+_pending_lock = threading.Lock()
+
+def derivative_key(report_id: int, size: str) -> str:
+    return f"{REPAIR_DERIVATIVE_DIR}/{report_id}_{size}.{_output_format()[1]}"
+
+def image_urls(report_id: int) -> Dict[str, str]:
+    """응답에 넣을 크기별 URL (original + DERIVATIVE_SIZES)"""
+    return {size: f"{IMAGE_ROUTE}/{report_id}/{size}" for size in (ORIGINAL_SIZE, *DERIVATIVE_SIZES)}
+
+def generate_derivatives(report_id: int, image_key: str) -> Dict[str, str]:
+    """
+    원본을 한 번 디코딩해서 모든 크기의 축소본 저장 (큰 크기부터 차례로 축소).
+    Returns {size: key}
+    """
+    start = time.perf_counter()
+    with span("repair.derivatives", report_id=report_id, sizes=len(DERIVATIVE_SIZES)):
+        store = storage.get_storage()
+        img = Image.open(BytesIO(store.read(image_key)))
+        largest = max(DERIVATIVE_SIZES.values(), default=0)
+        if largest:
+            # JPEG 는 DCT 단계에서 미리 축소해 디코딩 비용 절감
+            img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        pil_format, _ = _output_format()
+        keys = {}
+        for size, max_side in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = BytesIO()
+            img.save(buffer, pil_format, quality=REPAIR_DERIVATIVE_QUALITY)
+            keys[size] = derivative_key(report_id, size)
+            store.write(keys[size], buffer.getvalue())
+    observe(REPAIR_STAGE_SECONDS, time.perf_counter() - start, "derivatives")
+    return keys
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=REPAIR_DERIVATIVE_WORKERS, thread_name_prefix="repair-derivatives")
+    return _executor
+
+def _log_failure(report_id: int, future: Future):
+    with _pending_lock:
+        if _pending.get(report_id) is future:
+            del _pending[report_id]
+    e = future.exception()
+    if e is not None:
+        logger.warning("Derivative generation failed", extra={"report_id": report_id, "error": str(e), **error_fields(e)})
+
+def schedule_derivatives(report_id: int, image_key: str) -> Optional[Future]:
+    """백그라운드 생성 예약 (이미 진행 중이면 그 작업 반환). 크기가 설정되지 않았으면 None"""
+    if not DERIVATIVE_SIZES:
+        return None
+    with _pending_lock:
+        future = _pending.get(report_id)
+        if future is not None:
+            return future
+        context = contextvars.copy_context()
+        future = _get_executor().submit(context.run, generate_derivatives, report_id, image_key)
+        _pending[report_id] = future
+    # lock 밖에서 등록: 이미 끝난 작업이면 callback 이 이 스레드에서 바로 실행되고 _pending_lock 을 다시 잡음
+    future.add_done_callback(partial(_log_failure, report_id))
+    return future
+
+def shutdown_derivatives():
+    """진행 중인 생성 완료 후 종료"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+# ---------- 조회 (static route) ----------
+
+def _read_with_etag(key: str) -> tuple:
+    data = storage.get_storage().read(key)
+    return data, '"' + hashlib.sha1(data).hexdigest() + '"'
+
+async def load_image(report_id: int, size: str, original_key: Optional[str]) -> Optional[tuple]:
+    """
+    (bytes, content type, ETag) 또는 None (원본 없음 / 알 수 없는 크기).
+    축소본이 아직 없으면 생성 후 반환.
+    """
+    if original_key is None or (size != ORIGINAL_SIZE and size not in DERIVATIVE_SIZES):
+        return None
+    if size == ORIGINAL_SIZE:
+        key = original_key
+    else:
+        key = derivative_key(report_id, size)
+        if not await storage.run_io(storage.get_storage().exists, key):
+            await asyncio.wrap_future(schedule_derivatives(report_id, original_key))
+    data, etag = await storage.run_io(_read_with_etag, key)
+    content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    return data, content_type, etag
@@ -0,0 +1,296 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from app.core.metrics import inc, DUPLICATE_COMPARISONS
+from .clustering import ClusterSet, REPAIR_CLUSTERING, REPAIR_CLUSTER_THRESHOLD, REPAIR_RECLUSTER_ITERATIONS
+from .image_hash import hamming
+
+# ==========================================
+# 🗂️ Location-partitioned Duplicate Index
+# ==========================================
+# 신고 CLIP 임베딩을 위치별 partition (층, 호수 / 공용) 으로 나눠 보관.
+# 중복 검사는 같은 위치 partition 의 행렬 하나와 내적 한 번 -> 전체 신고 이력 크기와 무관.
+# 각 partition 은 (ids, 임베딩 행렬, 등록 시각, 신고 정보) 를 행 단위로 보관 (용량 2배씩 증가,
+# 삭제는 마지막 행과 교체 -> O(1)).
+# 처리 완료된 신고는 remove (resolve API), 오래된 신고는 REPAIR_INDEX_MAX_AGE_DAYS 가 지나면
+# 해당 partition 을 조회 / 추가할 때 제거 -> 작업 집합은 "최근 미처리 신고" 만 유지.
+# REPAIR_CLUSTERING=1 (기본) 이면 partition 안의 신고를 클러스터로 묶어 (clustering.py)
+# 클러스터 중심과 먼저 비교하고, 가능성이 있는 클러스터의 신고만 비교 (결과는 전체 비교와 동일).
+# 신고에 content_hash (SHA-256) / dhash 가 있으면 partition 별로 함께 보관 -> find_same_image (CLIP 전 단계).
+# partition 과 차원이 다른 임베딩은 등록하지 않음 (search 의 차원 불일치 = 후보 없음과 같은 처리).
+
+logger = logging.getLogger(__name__)
+
+REPAIR_INDEX_MAX_AGE_DAYS = float(os.getenv("REPAIR_INDEX_MAX_AGE_DAYS", "30"))  # 0 = 만료 없음
+
+PUBLIC_AREA = "public"
+
+def partition_key(floor: str, room_number: Optional[str]) -> Tuple[str, str]:
+    """(층, 호수). 호수가 없으면 그 층의 공용 구역"""
+    return (str(floor).strip(), str(room_number).strip() if room_number else PUBLIC_AREA)
+
+class Partition:
+    def __init__(self, dim: int, capacity: int = 16, clusters: Optional[ClusterSet] = None):
+        self.size = 0
+        self.ids = np.zeros(capacity, dtype='int64')
+        self.matrix = np.zeros((capacity, dim), dtype='float32')
+        self.added_at = np.zeros(capacity, dtype='float64')
+        self.dhashes = np.zeros(capacity, dtype='uint64')
+        self.has_dhash = np.zeros(capacity, dtype=bool)
+        self.reports = [None] * capacity
+        self.rows: Dict[int, int] = {}  # report id -> 행
+        self.content_hashes: Dict[str, List[int]] = {}  # SHA-256 -> report ids
+        self.clusters = clusters
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.resize(self.ids, capacity)
+        matrix = np.zeros((capacity, self.matrix.shape[1]), dtype='float32')
+        matrix[:self.size] = self.matrix[:self.size]
+        self.matrix = matrix
+        self.added_at = np.resize(self.added_at, capacity)
+        self.dhashes = np.resize(self.dhashes, capacity)
+        self.has_dhash = np.resize(self.has_dhash, capacity)
+        self.reports.extend([None] * (capacity - len(self.reports)))
+
+    def _drop_content_hash(self, row: int):
+        digest = self.reports[row].get("content_hash")
+        ids = self.content_hashes.get(digest)
+        if ids is not None and int(self.ids[row]) in ids:
+            ids.remove(int(self.ids[row]))
+            if not ids:
+                del self.content_hashes[digest]
+
+    def add(self, report_id: int, emb: np.ndarray, added_at: float, report: dict):
+        row = self.rows.get(report_id)
+        if row is not None:
+            self._drop_content_hash(row)
+        else:
+            if self.size == len(self.ids):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.rows[report_id] = row
+        self.ids[row] = report_id
+        self.matrix[row] = emb
+        self.added_at[row] = added_at
+        self.reports[row] = report
+        self.has_dhash[row] = report.get("dhash") is not None
+        self.dhashes[row] = report["dhash"] if self.has_dhash[row] else 0
+        if report.get("content_hash"):
+            self.content_hashes.setdefault(report["content_hash"], []).append(report_id)
+        if self.clusters is not None:
+            self.clusters.add(report_id, self.matrix[row].copy())
+
+    def remove(self, report_id: int) -> bool:
+        row = self.rows.pop(report_id, None)
+        if row is None:
+            return False
+        if self.clusters is not None:
+            self.clusters.remove(report_id)
+        self._drop_content_hash(row)
+        last = self.size - 1
+        if row != last:
+            # 마지막 행을 빈 자리로 이동
+            self.ids[row] = self.ids[last]
+            self.matrix[row] = self.matrix[last]
+            self.added_at[row] = self.added_at[last]
+            self.dhashes[row] = self.dhashes[last]
+            self.has_dhash[row] = self.has_dhash[last]
+            self.reports[row] = self.reports[last]
+            self.rows[int(self.ids[row])] = row
+        self.reports[last] = None
+        self.size = last
+        return True
+
+    def expired_ids(self, cutoff: float) -> List[int]:
+        return self.ids[:self.size][self.added_at[:self.size] < cutoff].tolist()
+
+    def candidate_rows(self, query_emb: np.ndarray, threshold: float) -> Tuple[np.ndarray, int]:
+        """비교할 행 (클러스터가 없으면 전체). Returns (행 번호, 비교한 클러스터 중심 수)"""
+        if self.clusters is None:
+            return np.arange(self.size), 0
+        report_ids, centroids = self.clusters.candidates(query_emb, threshold)
+        rows = np.fromiter((self.rows[i] for i in report_ids), dtype='int64', count=len(report_ids))
+        return np.sort(rows), centroids
+
+    def recluster(self, iterations: int):
+        if self.clusters is not None:
+            self.clusters.rebuild(self.ids[:self.size], self.matrix[:self.size], iterations)
+
+class DuplicateIndex:
+    def __init__(self, max_age_days: float = REPAIR_INDEX_MAX_AGE_DAYS, clustering: bool = REPAIR_CLUSTERING,
+                 cluster_threshold: float = REPAIR_CLUSTER_THRESHOLD):
+        self.max_age = max_age_days * 86400
+        self.clustering = clustering
+        self.cluster_threshold = cluster_threshold
+        # 누적 비교 수: centroid / member (실제 비교), full_scan (클러스터 없이 비교했을 수)
+        self.comparisons = {"centroid": 0, "member": 0, "full_scan": 0}
+        self.partitions: Dict[Tuple[str, str], Partition] = {}
+        self.locations: Dict[int, Tuple[str, str]] = {}  # report id -> partition key
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _evict(self, key, now: float) -> int:
+        part = self.partitions.get(key)
+        if part is None or self.max_age <= 0:
+            return 0
+        expired = part.expired_ids(now - self.max_age)
+        for report_id in expired:
+            self._remove(report_id)
+        return len(expired)
+
+    def _remove(self, report_id: int) -> bool:
+        key = self.locations.pop(report_id, None)
+        if key is None:
+            return False
+        part = self.partitions[key]
+        part.remove(report_id)
+        if part.size == 0:
+            del self.partitions[key]
+        return True
+
+    def add(self, report: dict, added_at: Optional[float] = None) -> bool:
+        """
+        신고 등록 (report: id, floor, room_number, embedding(L2 정규화) + 응답용 정보). 같은 id 는 교체.
+        Returns False 면 partition 과 임베딩 차원이 달라 등록하지 않음 (기존 신고는 그대로).
+        """
+        emb = np.asarray(report["embedding"], dtype='float32').reshape(-1)
+        key = partition_key(report["floor"], report.get("room_number"))
+        now = time.time()
+        with self.lock:
+            self._evict(key, now)
+            part = self.partitions.get(key)
+            if part is not None and part.matrix.shape[1] != emb.shape[0]:
+                logger.warning("Duplicate index embedding dimension mismatch", extra={
+                    "report_id": report["id"], "location": "/".join(key),
+                    "index_dim": int(part.matrix.shape[1]), "embedding_dim": int(emb.shape[0])})
+                return False
+            if self.locations.get(report["id"], key) != key:
+                self._remove(report["id"])
+            if part is None:
+                clusters = ClusterSet(self.cluster_threshold) if self.clustering else None
+                part = self.partitions[key] = Partition(emb.shape[0], clusters=clusters)
+            part.add(report["id"], emb, added_at if added_at is not None else now, report)
+            self.locations[report["id"]] = key
+        return True
+
+    def remove(self, report_id: int) -> bool:
+        """처리 완료 등으로 중복 검사 대상에서 제외"""
+        with self.lock:
+            return self._remove(report_id)
+
+    def evict_expired(self) -> int:
+        """모든 partition 에서 만료된 신고 제거. Returns 제거 수"""
+        now = time.time()
+        with self.lock:
+            return sum(self._evict(key, now) for key in list(self.partitions))
+
+    def search(self, query_emb: np.ndarray, floor: str, room_number: Optional[str], threshold: float,
+               report_ids: Optional[List[int]] = None) -> Tuple[List[Tuple[dict, float]], int]:
+        """
+        같은 위치 partition 에서 유사도 >= threshold 인 신고 (유사도 내림차순).
+        report_ids 가 있으면 그 id 만 대상 ([] 이면 대상 없음). Returns ([(신고, 유사도)], 비교한 수)
+        """
+        if report_ids is not None and len(report_ids) == 0:
+            return [], 0
+        key = partition_key(floor, room_number)
+        with self.lock:
+            self._evict(key, time.time())
+            part = self.partitions.get(key)
+            if part is None or part.size == 0:
+                return [], 0
+            if part.matrix.shape[1] != np.shape(query_emb)[-1]:
+                return [], 0
+            query_emb = np.asarray(query_emb, dtype='float32')
+            ids = part.ids[:part.size]
+            reports = part.reports[:part.size]
+            if report_ids is not None:
+                allowed = np.isin(ids, np.asarray(report_ids, dtype='int64'))
+                full_scan = int(np.count_nonzero(allowed))
+            else:
+                full_scan = part.size
+            rows, centroids = part.candidate_rows(query_emb, threshold)
+            if report_ids is not None:
+                rows = rows[allowed[rows]]
+            sims = part.matrix[rows] @ query_emb
+            self._count(centroids, len(rows), full_scan)
+        hits = np.flatnonzero(sims >= threshold)
+        # 유사도 내림차순, 동점이면 먼저 등록된 행 순서 유지
+        hits = hits[np.argsort(-sims[hits], kind="stable")]
+        return [(reports[rows[i]], float(sims[i])) for i in hits], centroids + len(rows)
+
+    def find_same_image(self, floor: str, room_number: Optional[str], content_hash: Optional[str] = None,
+                        dhash: Optional[int] = None, max_distance: int = 0,
+                        report_ids: Optional[List[int]] = None) -> List[Tuple[dict, int]]:
+        """
+        같은 위치 partition 에서 같은 이미지로 보이는 신고.
+        content_hash 가 주어지면 SHA-256 일치 (거리 0), dhash 가 주어지면 Hamming 거리 <= max_distance.
+        Returns [(신고, 거리)] (거리 오름차순)
+        """
+        if report_ids is not None and len(report_ids) == 0:
+            return []
+        key = partition_key(floor, room_number)
+        allowed = None if report_ids is None else set(report_ids)
+        with self.lock:
+            self._evict(key, time.time())
+            part = self.partitions.get(key)
+            if part is None or part.size == 0:
+                return []
+            if content_hash is not None:
+                found = [(i, 0) for i in part.content_hashes.get(content_hash, [])]
+            else:
+                found = []
+            if dhash is not None:
+                distances = hamming(part.dhashes[:part.size], dhash)
+                rows = np.flatnonzero(part.has_dhash[:part.size] & (distances <= max_distance))
+                found += [(int(part.ids[row]), int(distances[row])) for row in rows]
+            matches = {}
+            for report_id, distance in found:
+                if allowed is None or report_id in allowed:
+                    matches[report_id] = min(distance, matches.get(report_id, distance))
+            hits = sorted(matches.items(), key=lambda item: (item[1], part.rows[item[0]]))
+            return [(part.reports[part.rows[report_id]], distance) for report_id, distance in hits]
+
+    def _count(self, centroids: int, members: int, full_scan: int):
+        for kind, amount in (("centroid", centroids), ("member", members), ("full_scan", full_scan)):
+            self.comparisons[kind] += amount
+            inc(DUPLICATE_COMPARISONS, kind, amount=amount)
+
+    def recluster(self, iterations: int = REPAIR_RECLUSTER_ITERATIONS) -> dict:
+        """모든 partition 의 클러스터를 batch 로 다시 묶음 (만료 신고 먼저 제거). Returns stats()"""
+        now = time.time()
+        with self.lock:
+            for key in list(self.partitions):
+                self._evict(key, now)
+            for part in self.partitions.values():
+                part.recluster(iterations)
+        return self.stats()
+
+    def cluster_count(self) -> int:
+        with self.lock:
+            return sum(len(part.clusters) for part in self.partitions.values() if part.clusters is not None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            sizes = [part.size for part in self.partitions.values()]
+            stats = {"partitions": len(sizes), "reports": sum(sizes), "largest_partition": max(sizes, default=0)}
+            if not self.clustering:
+                return stats
+            clusters = [part.clusters.stats() for part in self.partitions.values()]
+            compared = self.comparisons["centroid"] + self.comparisons["member"]
+            full_scan = self.comparisons["full_scan"]
+        return {
+            **stats,
+            "clusters": sum(c["clusters"] for c in clusters),
+            "largest_cluster": max((c["largest_cluster"] for c in clusters), default=0),
+            "comparisons": compared,
+            "full_scan_comparisons": full_scan,
+            # 전체 비교 대비 줄어든 비율 (음수 = 클러스터가 거의 단독이라 중심 비교가 더 많음)
+            "comparison_savings": round(1 - compared / full_scan, 4) if full_scan else 0.0,
+        }
@@ -0,0 +1,45 @@
+import os
+import hashlib
+import numpy as np
+from PIL import Image
+
+# ==========================================
+# #️⃣ Image Hash (exact / perceptual duplicate fast path)
+# ==========================================
+# 재시도 / 같은 사진 재전송은 CLIP 없이 판정:
+#   1) 원본 바이트 SHA-256 -> 같은 위치에 같은 파일이 있으면 디코딩도 하지 않고 중복
+#   2) dHash (9x8 흑백 축소 후 인접 픽셀 밝기 비교, 64bit) -> 재압축 / 크기 변경된 같은 사진은
+#      Hamming 거리 0~2, 같은 물건을 다시 찍은 사진은 20 이상 -> REPAIR_DHASH_MAX_DISTANCE 이하면 중복
+# 둘 다 일치하지 않으면 기존 CLIP 비교로 진행.
+#   REPAIR_HASH_FAST_PATH      1 (기본) / 0 = 사용 안 함
+#   REPAIR_DHASH_MAX_DISTANCE  dHash 중복 판정 최대 거리 (기본 4, -1 = dHash 사용 안 함)
+
+REPAIR_HASH_FAST_PATH = os.getenv("REPAIR_HASH_FAST_PATH", "1") == "1"
+REPAIR_DHASH_MAX_DISTANCE = int(os.getenv("REPAIR_DHASH_MAX_DISTANCE", "4"))
+
+DHASH_BITS = 64
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def dhash(img: Image.Image) -> int:
+    """64bit difference hash (디코딩된 이미지)"""
+    if img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    # 정수 배율 축소 (reduce, 한 번 훑기) 로 ~64px 까지 줄인 뒤 9x8 -> 전체 이미지 흑백 변환 / 보간 생략
+    factor = max(1, min(img.size) // 64)
+    small = (img.reduce(factor) if factor > 1 else img).resize((9, 8), Image.BOX).convert("L")
+    pixels = np.asarray(small, dtype='int16')
+    bits = pixels[:, :-1] > pixels[:, 1:]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(hashes: np.ndarray, value: int) -> np.ndarray:
+    """uint64 배열의 각 hash 와 value 의 Hamming 거리"""
+    diff = np.bitwise_xor(hashes, np.uint64(value))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff)
+    return np.unpackbits(diff.view('uint8').reshape(-1, 8), axis=1).sum(axis=1)
+
+def hash_similarity(distance: int) -> float:
+    """응답용 유사도 (SHA 일치 = 1.0, dHash 거리 d -> 1 - d/64)"""
+    return 1.0 - distance / DHASH_BITS
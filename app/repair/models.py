@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class RepairAnalysisResult(BaseModel):
     title: str # 게시물 제목 (한글, 간결한 명사형)
@@ -16,15 +16,19 @@ class DuplicateReportInfo(BaseModel):
     description: str
     location: str
     image_url: Optional[str] = None
+    image_urls: Optional[Dict[str, str]] = None  # 크기별 URL (original / thumb / medium)
+    match: str = "clip"  # 판정 방식: exact (같은 파일) / perceptual (dHash) / clip
 
 class RepairResponse(BaseModel):
     analysis: Optional[RepairAnalysisResult] = None  # 중복이면 None
     duplicates: List[DuplicateReportInfo]
     is_new: bool
     newReportId: Optional[int] = None  # 중복이 아닌 경우에만 할당된 새 ID
+    image_urls: Optional[Dict[str, str]] = None  # 새 신고 이미지의 크기별 URL
 
 class RepairRequest(BaseModel):
-    existingReportIds: List[int] = []  # 백엔드에서 위치 필터링한 기존 게시물 ID 목록
+    # 백엔드에서 위치 필터링한 기존 게시물 ID 목록 (None/생략 = 같은 위치 전체, [] = 비교 대상 없음)
+    existingReportIds: Optional[List[int]] = None
     totalReportCount: int  # 현재 총 게시물 수 (새 ID = totalReportCount + 1)
     floor: str  # 층수
     room_number: Optional[str] = None  # 호수 (공용시설이면 null)
@@ -1,7 +1,12 @@
 from typing import Optional
-from fastapi import APIRouter
-from .service import process_repair_request
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+import app.repair.service as repair_service
+from .service import process_repair_request, find_report_image, resolve_report, recluster_reports
 from .models import RepairResponse, RepairRequest
+from .derivatives import load_image, IMMUTABLE_CACHE
+from .thresholds import get_duplicate_thresholds, reload_duplicate_thresholds
+import app.core.storage as storage
 
 router = APIRouter()
 
@@ -18,3 +23,49 @@ async def analyze_repair(request: RepairRequest):
     """
     result = await process_repair_request(request)
     return result
+
+@router.post("/reports/{report_id}/resolve", summary="Exclude a resolved report from duplicate checks")
+async def resolve_repair_report(report_id: int):
+    """처리 완료된 신고를 중복 검사 대상(위치별 인덱스)에서 제외"""
+    return {"reportId": report_id, "removed": resolve_report(report_id)}
+
+@router.get("/clusters", summary="Duplicate index / cluster statistics")
+async def get_duplicate_clusters():
+    """위치별 중복 인덱스 통계: 신고 수, 클러스터 수, 전체 비교 대비 줄어든 비교 비율"""
+    return repair_service.DUPLICATE_INDEX.stats()
+
+@router.post("/clusters/rebuild", summary="Re-cluster open repair reports")
+async def rebuild_duplicate_clusters():
+    """등록 순서로 쌓인 클러스터를 batch 로 다시 묶음 (관리자 / 주기 작업용)"""
+    return await run_in_threadpool(recluster_reports)
+
+@router.get("/thresholds", summary="Duplicate similarity thresholds")
+async def get_thresholds():
+    """위치별 중복 판정 기준 (default / area / locations) + 보정 정보"""
+    return get_duplicate_thresholds().to_dict()
+
+@router.post("/thresholds/reload", summary="Reload calibrated duplicate thresholds")
+async def reload_thresholds():
+    """calibrate_duplicates.py 로 다시 보정한 설정 파일 적용 (재시작 없이)"""
+    try:
+        thresholds = await run_in_threadpool(reload_duplicate_thresholds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return thresholds.to_dict()
+
+@router.get("/images/{report_id}/{size}", summary="Repair image (original / thumbnail / medium)")
+async def get_repair_image(report_id: int, size: str, request: Request):
+    """
+    신고 이미지 조회. size: original / thumb / medium (REPAIR_DERIVATIVE_SIZES)
+    - 축소본이 아직 없으면 생성 후 반환
+    - Cache-Control immutable + ETag (If-None-Match 일치 시 304)
+    """
+    original_key = await storage.run_io(find_report_image, report_id)
+    image = await load_image(report_id, size, original_key)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {report_id}/{size}")
+    data, content_type, etag = image
+    headers = {"Cache-Control": IMMUTABLE_CACHE, "ETag": etag}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
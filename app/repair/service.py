@@ -3,12 +3,27 @@ import numpy as np
 import json
 import base64
 import asyncio
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import List, Dict, Optional
 from PIL import Image
 from io import BytesIO
 from fastapi import UploadFile
 import google.generativeai as genai
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from app.core.vector_format import l2_normalize, ensure_format_dir, decode_vector
+from app.core.metrics import observe, set_value, GEMINI_SECONDS, REPAIR_STAGE_SECONDS, DUPLICATE_SCAN_SIZE, DUPLICATE_CLUSTERS
+from app.core.tracing import span
+from app.core.profiling import annotate
+from app.core.logs import record_stage, error_fields
+import app.core.storage as storage
+from . import derivatives
+from .derivatives import schedule_derivatives, image_urls
+from .duplicate_index import DuplicateIndex
+from .thresholds import get_duplicate_thresholds
+from .image_hash import content_hash, dhash, hash_similarity, REPAIR_HASH_FAST_PATH, REPAIR_DHASH_MAX_DISTANCE
 from .models import RepairAnalysisResult, DuplicateReportInfo, RepairResponse
 
 # ==========================================
@@ -18,21 +33,67 @@ from .models import RepairAnalysisResult, DuplicateReportInfo, RepairResponse
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") # Must be set in .env
 genai.configure(api_key=GOOGLE_API_KEY)
 
+logger = logging.getLogger(__name__)
+
 # Mock Database for Reports
 REPAIR_REPORTS = [] 
 NEXT_REPORT_ID = 1
 
+# 중복 검사용 위치별 임베딩 인덱스 (처리 완료 / 만료된 신고는 제외)
+DUPLICATE_INDEX = DuplicateIndex()
+# 중복 의심 기준 유사도: 위치별 보정값 (config/duplicate_thresholds.json, 없으면 0.80) -> thresholds.py
+
+# 저장 경로
+REPAIR_VECTOR_DIR = "storage/repair_vectors"
+REPAIR_IMAGE_DIR = "storage/repair_images"
+REPAIR_TEMP_DIR = "storage/temp"
+
+def ensure_repair_storage():
+    """저장 디렉토리 준비 (서버 시작 시 한 번)"""
+    ensure_format_dir(REPAIR_VECTOR_DIR)
+    for directory in (REPAIR_IMAGE_DIR, derivatives.REPAIR_DERIVATIVE_DIR, REPAIR_TEMP_DIR):
+        storage.get_storage().ensure_dir(directory)
+
 # Lazy Load Models
 _clip_model = None
 
 def get_clip_model():
     global _clip_model
     if _clip_model is None:
-        print("Loading CLIP Model...")
+        logger.info("Loading CLIP Model...")
+        start = time.perf_counter()
         _clip_model = SentenceTransformer('sentence-transformers/clip-ViT-B-32')
-        print("CLIP Model Loaded.")
+        logger.info("CLIP Model Loaded.", extra={"load_ms": round((time.perf_counter() - start) * 1000, 1)})
     return _clip_model
 
+# 단계별 소요 시간: span (repair.{name}) + 메트릭 (METRICS_ENABLED)
+# + record_stage_timings() 블록 안에서는 dict 로도 기록 (벤치마크용)
+_stage_timings: ContextVar[Optional[dict]] = ContextVar("repair_stage_timings", default=None)
+
+@contextmanager
+def repair_stage(name: str):
+    timings = _stage_timings.get()
+    start = time.perf_counter()
+    try:
+        with span(f"repair.{name}"):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(REPAIR_STAGE_SECONDS, elapsed, name)
+        record_stage(name, elapsed)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+@contextmanager
+def record_stage_timings():
+    """블록 안에서 실행된 process_repair_request 의 단계별 시간(초)을 dict 로 수집"""
+    timings = {}
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
 # ==========================================
 # 🧠 AI Analysis (Gemini)
 # ==========================================
@@ -79,21 +140,28 @@ async def analyze_image_with_gemini(image_bytes: bytes) -> RepairAnalysisResult:
     - description: 상황 요약 (한국어).
     """
     
+    start = time.perf_counter()
     try:
-        response = model.generate_content([prompt, pil_img])
+        with span("gemini.generate_content", model="gemini-3-flash-preview", image_bytes=len(image_bytes)):
+            response = model.generate_content([prompt, pil_img])
     except Exception as e:
-        print(f"Gemini API Error: {e}")
+        observe(GEMINI_SECONDS, time.perf_counter() - start, "api_error")
+        logger.error("Gemini API Error", extra={"error": str(e), **error_fields(e)})
         return RepairAnalysisResult(
             title="", item="unknown", issue="unknown", 
             severity="MEDIUM", priority_score=5, reasoning=f"API 호출 오류: {str(e)}", 
             description="AI 분석 중 오류가 발생했습니다."
         )
     
+    elapsed = time.perf_counter() - start
     try:
         data = json.loads(response.text)
-        return RepairAnalysisResult(**data)
+        result = RepairAnalysisResult(**data)
+        observe(GEMINI_SECONDS, elapsed, "ok")
+        return result
     except Exception as e:
-        print(f"Gemini JSON Parse Error: {e}, Raw: {response.text}")
+        observe(GEMINI_SECONDS, elapsed, "parse_error")
+        logger.error("Gemini JSON Parse Error", extra={"error": str(e), **error_fields(e), "raw": response.text[:2000]})
         return RepairAnalysisResult(
             title="", item="unknown", issue="unknown", 
             severity="MEDIUM", priority_score=5, reasoning="분석 실패", 
@@ -104,79 +172,153 @@ async def analyze_image_with_gemini(image_bytes: bytes) -> RepairAnalysisResult:
 # 🔍 Duplicate Detection (CLIP)
 # ==========================================
 
-async def check_duplicates(query_emb, existing_report_ids: List[int], floor: str, room_number: Optional[str] = None) -> List[DuplicateReportInfo]:
-    """
-    백엔드에서 위치 필터링한 기존 게시물 ID 목록에 대해
-    CLIP 벡터 유사도 비교하여 중복 여부 판단.
-    """
-    duplicates = []
-    
+def rebuild_duplicate_index():
+    """REPAIR_REPORTS 전체로 중복 인덱스 다시 생성 (REPAIR_REPORTS 를 직접 채운 경우)"""
+    global DUPLICATE_INDEX
+    index = DuplicateIndex()
     for report in REPAIR_REPORTS:
-        if report['id'] not in existing_report_ids:
-            continue
-            
         if report.get('embedding') is not None:
-            sim = util.pytorch_cos_sim(query_emb, report['embedding'])[0][0].item()
-            
-            # Threshold: 0.80 (80% 이상 유사 = 중복 의심)
-            if sim >= 0.80:
-                loc_str = f"{report['floor']}층"
-                if report.get('room_number'):
-                    loc_str += f" {report['room_number']}호"
-                else:
-                    loc_str += " (공용)"
-                    
-                duplicates.append(DuplicateReportInfo(
-                    reportId=report['id'],
-                    similarity=round(sim, 2),
-                    description=report['description'],
-                    location=loc_str,
-                    image_url=report.get('image_url')
-                ))
-    
-    duplicates.sort(key=lambda x: x.similarity, reverse=True)
-    return duplicates
+            index.add(report, added_at=report.get('created_at'))
+    DUPLICATE_INDEX = index
+    _publish_cluster_count()
+
+def load_repair_vectors(directory: Optional[str] = None):
+    """저장된 신고 임베딩 전체 (오프라인 도구용). Returns (report ids, L2 정규화 행렬 (n, dim))"""
+    directory = directory or REPAIR_VECTOR_DIR
+    ids, vectors = [], []
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        stem, ext = os.path.splitext(name)
+        if ext != ".npy" or not stem.isdigit():
+            continue
+        ids.append(int(stem))
+        vectors.append(decode_vector(np.load(os.path.join(directory, name))).reshape(-1))
+    order = np.argsort(ids, kind="stable")
+    ids = np.asarray(ids, dtype='int64')[order]
+    matrix = l2_normalize(np.stack(vectors)[order]) if vectors else np.zeros((0, 0), dtype='float32')
+    return ids, matrix
+
+def _publish_cluster_count():
+    set_value(DUPLICATE_CLUSTERS, DUPLICATE_INDEX.cluster_count())
+
+def resolve_report(report_id: int) -> bool:
+    """처리 완료된 신고를 중복 검사 대상에서 제외. Returns 인덱스에 있었는지 여부"""
+    removed = DUPLICATE_INDEX.remove(report_id)
+    _publish_cluster_count()
+    return removed
+
+def recluster_reports() -> dict:
+    """미처리 신고 클러스터를 batch 로 다시 묶음 (블로킹 -> run_in_threadpool). Returns 인덱스 통계"""
+    with span("repair.recluster", reports=len(DUPLICATE_INDEX)):
+        stats = DUPLICATE_INDEX.recluster()
+    _publish_cluster_count()
+    logger.info("Duplicate clusters rebuilt", extra={"clusters": stats.get("clusters"), "reports": stats["reports"]})
+    return stats
+
+async def check_duplicates(query_emb, existing_report_ids: Optional[List[int]], floor: str, room_number: Optional[str] = None) -> List[DuplicateReportInfo]:
+    """
+    같은 위치(층, 호수 / 공용) partition 의 신고들과 CLIP 벡터 유사도 비교하여 중복 여부 판단
+    (클러스터 중심과 먼저 비교 후 가능성이 있는 클러스터의 신고만).
+    existing_report_ids 가 있으면 그 중에서만 비교 (백엔드가 처리 완료 건 등을 제외한 목록, [] 이면 비교 대상 없음),
+    None 이면 같은 위치의 모든 신고와 비교.
+    query_emb 및 저장된 임베딩은 L2 정규화되어 있으므로 내적 == 코사인 유사도.
+    기준 유사도는 위치별 보정값 (get_duplicate_thresholds).
+    """
+    threshold = get_duplicate_thresholds().for_location(floor, room_number)
+    matches, compared = DUPLICATE_INDEX.search(
+        query_emb, floor, room_number, threshold, existing_report_ids)
+    observe(DUPLICATE_SCAN_SIZE, compared)
+    return [_duplicate_info(report, sim) for report, sim in matches]
 
-async def save_report_files(new_id: int, temp_image_path: str, query_emb, floor: str, room_number: Optional[str] = None, description: str = ""):
+def find_same_image(existing_report_ids: Optional[List[int]], floor: str, room_number: Optional[str] = None,
+                    digest: Optional[str] = None, perceptual: Optional[int] = None) -> List[DuplicateReportInfo]:
+    """
+    CLIP 전 단계: 같은 위치에 같은 파일 (SHA-256) 또는 거의 같은 사진 (dHash) 이 있는지 확인.
+    digest / perceptual 중 주어진 것만 비교. 일치하는 신고가 없으면 []
+    """
+    max_distance = REPAIR_DHASH_MAX_DISTANCE if perceptual is not None else 0
+    matches = DUPLICATE_INDEX.find_same_image(
+        floor, room_number, content_hash=digest, dhash=perceptual, max_distance=max_distance,
+        report_ids=existing_report_ids)
+    return [_duplicate_info(report, hash_similarity(distance), "exact" if perceptual is None else "perceptual")
+            for report, distance in matches]
+
+def _duplicate_info(report: dict, sim: float, match: str = "clip") -> DuplicateReportInfo:
+    loc_str = f"{report['floor']}층"
+    if report.get('room_number'):
+        loc_str += f" {report['room_number']}호"
+    else:
+        loc_str += " (공용)"
+
+    return DuplicateReportInfo(
+        reportId=report['id'],
+        similarity=round(sim, 2),
+        description=report['description'],
+        location=loc_str,
+        image_url=report.get('image_url'),
+        image_urls=image_urls(report['id']),
+        match=match
+    )
+
+async def save_report_files(new_id: int, temp_image_path: str, query_emb, floor: str, room_number: Optional[str] = None, description: str = "",
+                            digest: Optional[str] = None, perceptual: Optional[int] = None):
     """
     중복이 아닌 경우: 임시 이미지를 영구 저장소로 이동, 임베딩 저장.
+    digest / perceptual: 이미지 hash (다음 신고의 CLIP 전 중복 확인용, 인덱스에 함께 등록)
     - 임베딩 벡터: storage/repair_vectors/{new_id}.npy
     - 이미지 이동: storage/temp/pending.jpg → storage/repair_images/{new_id}.jpg
+    - 축소본 (thumb / medium): 백그라운드에서 생성 (완료를 기다리지 않음)
+    파일 작업은 storage I/O 스레드풀에서 실행 (벡터는 atomic 쓰기).
     """
-    import shutil
-    
-    # 디렉토리 생성
-    os.makedirs("storage/repair_vectors", exist_ok=True)
-    os.makedirs("storage/repair_images", exist_ok=True)
-    
-    # 1. 임베딩 저장
-    vector_path = f"storage/repair_vectors/{new_id}.npy"
-    np.save(vector_path, query_emb)
+    # 1. 임베딩 저장 (L2 정규화 후 저장)
+    query_emb = l2_normalize(query_emb)
+    vector_path = f"{REPAIR_VECTOR_DIR}/{new_id}.npy"
+    await storage.write_bytes(vector_path, storage.npy_bytes(query_emb))
     
     # 2. 임시 이미지 → 영구 저장소로 이동
     _, ext = os.path.splitext(temp_image_path)
-    new_image_path = f"storage/repair_images/{new_id}{ext}"
-    shutil.move(temp_image_path, new_image_path)
+    new_image_path = f"{REPAIR_IMAGE_DIR}/{new_id}{ext}"
+    await storage.move(temp_image_path, new_image_path)
+    schedule_derivatives(new_id, new_image_path)
     
-    # 3. In-memory 저장 (테스트용)
-    REPAIR_REPORTS.append({
+    # 3. In-memory 저장 (테스트용) + 중복 인덱스 등록
+    report = {
         "id": new_id,
         "floor": floor,
         "room_number": room_number,
         "description": description,
         "image_url": new_image_path,
-        "embedding": query_emb
-    })
+        "embedding": query_emb,
+        "content_hash": digest,
+        "dhash": perceptual,
+        "created_at": time.time()
+    }
+    REPAIR_REPORTS.append(report)
+    DUPLICATE_INDEX.add(report, added_at=report["created_at"])
+    _publish_cluster_count()
     
     return new_image_path
 
-def delete_temp_image(temp_image_path: str):
+async def delete_temp_image(temp_image_path: str):
     """중복 신고인 경우 임시 이미지 삭제"""
     try:
-        if os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
+        await storage.delete(temp_image_path)
     except Exception as e:
-        print(f"Failed to delete temp image: {e}")
+        logger.warning("Failed to delete temp image", extra={"path": temp_image_path, "error": str(e), **error_fields(e)})
+
+# 원본 이미지 확장자 후보 (메모리에 없는 이전 신고는 저장소에서 확인)
+REPAIR_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+def find_report_image(report_id: int) -> Optional[str]:
+    """신고 원본 이미지 key (없으면 None). 블로킹 -> storage.run_io 로 호출"""
+    for report in REPAIR_REPORTS:
+        if report['id'] == report_id and report.get('image_url'):
+            return report['image_url']
+    store = storage.get_storage()
+    for ext in REPAIR_IMAGE_EXTENSIONS:
+        key = f"{REPAIR_IMAGE_DIR}/{report_id}{ext}"
+        if store.exists(key):
+            return key
+    return None
 
 # ==========================================
 # 🚀 Main Logic
@@ -185,34 +327,68 @@ def delete_temp_image(temp_image_path: str):
 from .models import RepairRequest
 
 # 고정 임시 이미지 경로
-TEMP_IMAGE_PATH = "storage/temp/pending.jpg"
+TEMP_IMAGE_PATH = f"{REPAIR_TEMP_DIR}/pending.jpg"
+
+def _scan_size(req: RepairRequest) -> Optional[int]:
+    """요청에 포함된 비교 대상 수 (None = 같은 위치 전체)"""
+    return None if req.existingReportIds is None else len(req.existingReportIds)
+
+async def process_repair_request(req: RepairRequest, image_path: Optional[str] = None) -> RepairResponse:
+    """image_path: 신고 이미지 경로 (기본: 고정 임시 경로 TEMP_IMAGE_PATH)"""
+    with span("repair.process", floor=req.floor, scan_size=_scan_size(req)) as s:
+        response = await _process_repair_request(req, image_path or TEMP_IMAGE_PATH)
+        s.set_attribute("is_new", response.is_new)
+        return response
+
+async def _process_repair_request(req: RepairRequest, image_path: str) -> RepairResponse:
 
-async def process_repair_request(req: RepairRequest) -> RepairResponse:
     # 1. Read Image from Fixed Path
-    try:
-        with open(TEMP_IMAGE_PATH, "rb") as f:
-            content = f.read()
-    except Exception as e:
-        raise ValueError(f"Image not found at {TEMP_IMAGE_PATH}")
+    with repair_stage("file_read"):
+        try:
+            content = await storage.read_bytes(image_path)
+        except Exception as e:
+            raise ValueError(f"Image not found at {image_path}")
+    annotate(image_bytes=len(content), scan=_scan_size(req))
+
+    # 2. 같은 파일 재전송 (재시도 등): 디코딩 / CLIP 없이 중복 응답
+    digest = perceptual = None
+    if REPAIR_HASH_FAST_PATH:
+        with repair_stage("content_hash"):
+            digest = content_hash(content)
+            duplicates = find_same_image(req.existingReportIds, req.floor, req.room_number, digest=digest)
+        if duplicates:
+            return await _duplicate_response(image_path, duplicates)
 
-    # 2. Calculate CLIP Embedding (신규 이미지 벡터 계산)
-    pil_img = Image.open(BytesIO(content))
-    clip_model = get_clip_model()
-    query_emb = clip_model.encode(pil_img, convert_to_numpy=True)
+    # 3. Calculate CLIP Embedding (신규 이미지 벡터 계산)
+    with repair_stage("decode"):
+        pil_img = Image.open(BytesIO(content))
+        pil_img.load()
+    if REPAIR_HASH_FAST_PATH and REPAIR_DHASH_MAX_DISTANCE >= 0:
+        # 재압축 / 크기만 바뀐 같은 사진: CLIP 없이 중복 응답
+        with repair_stage("perceptual_hash"):
+            perceptual = dhash(pil_img)
+            duplicates = find_same_image(req.existingReportIds, req.floor, req.room_number, perceptual=perceptual)
+        if duplicates:
+            return await _duplicate_response(image_path, duplicates)
+    with repair_stage("clip_encode"):
+        clip_model = get_clip_model()
+        query_emb = l2_normalize(clip_model.encode(pil_img, convert_to_numpy=True))
     
-    # 3. Check Duplicates FIRST (중복이면 Gemini 호출 안함 = 토큰 절약)
-    duplicates = await check_duplicates(
-        query_emb, 
-        req.existingReportIds,
-        req.floor, 
-        req.room_number
-    )
+    # 4. Check Duplicates FIRST (중복이면 Gemini 호출 안함 = 토큰 절약)
+    with repair_stage("duplicate_scan"):
+        duplicates = await check_duplicates(
+            query_emb, 
+            req.existingReportIds,
+            req.floor, 
+            req.room_number
+        )
     
     is_new = len(duplicates) == 0
     
     if is_new:
-        # 4. 신규일 때만 Gemini 분석
-        analysis = await analyze_image_with_gemini(content)
+        # 5. 신규일 때만 Gemini 분석
+        with repair_stage("analysis"):
+            analysis = await analyze_image_with_gemini(content)
         
         # Title 자동 생성 (규칙: {층}층 [{호수}호] {물건})
         location_str = f"{req.floor}층"
@@ -223,18 +399,27 @@ async def process_repair_request(req: RepairRequest) -> RepairResponse:
         
         new_id = req.totalReportCount + 1
         
-        # 5. 파일 저장 (description 포함)
-        await save_report_files(new_id, TEMP_IMAGE_PATH, query_emb, req.floor, req.room_number, analysis.description)
+        # 6. 파일 저장 (description, 이미지 hash 포함)
+        with repair_stage("file_move"):
+            await save_report_files(new_id, image_path, query_emb, req.floor, req.room_number, analysis.description,
+                                    digest=digest, perceptual=perceptual)
     else:
         # 중복: Gemini 스킵, 임시 파일 삭제
         analysis = None
         new_id = None
-        delete_temp_image(TEMP_IMAGE_PATH)
+        with repair_stage("file_move"):
+            await delete_temp_image(image_path)
     
     return RepairResponse(
         analysis=analysis,
         duplicates=duplicates,
         is_new=is_new,
-        newReportId=new_id
+        newReportId=new_id,
+        image_urls=image_urls(new_id) if new_id is not None else None
     )
 
+async def _duplicate_response(image_path: str, duplicates: List[DuplicateReportInfo]) -> RepairResponse:
+    """hash 로 중복 판정된 경우: 임시 파일 삭제 후 중복 응답 (Gemini / CLIP 생략)"""
+    with repair_stage("file_move"):
+        await delete_temp_image(image_path)
+    return RepairResponse(analysis=None, duplicates=duplicates, is_new=False)
@@ -0,0 +1,197 @@
+import os
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .duplicate_index import partition_key, PUBLIC_AREA
+
+# ==========================================
+# 🎚️ Duplicate Thresholds (calibrated offline)
+# ==========================================
+# 중복 판정 유사도 기준을 위치별로 설정 (calibrate_duplicates.py 가 라벨된 쌍으로 계산해 저장).
+# 설정 파일 (DUPLICATE_THRESHOLDS_PATH, 기본 config/duplicate_thresholds.json):
+#   {"default": 0.77, "area": {"public": 0.8, "room": 0.76}, "locations": {"3/301": 0.82}, "calibration": {...}}
+# 조회 순서: locations["층/호수" 또는 "층/public"] -> area["room" | "public"] -> default.
+# 중복 검사 시점에는 Gemini 분석 전이라 고장 항목(category) 을 모름 -> 위치 기준만 사용.
+# 파일이 없으면 모든 위치에 DEFAULT_DUPLICATE_THRESHOLD (0.80, 기존 값).
+
+DUPLICATE_THRESHOLDS_PATH = os.getenv("DUPLICATE_THRESHOLDS_PATH", "config/duplicate_thresholds.json")
+DEFAULT_DUPLICATE_THRESHOLD = 0.80
+ROOM_AREA = "room"
+# 위치 정보 없는 쌍 / 분포 (default 계산에만 사용)
+ANY_LOCATION = "*"
+
+_thresholds = None
+
+def location_key(floor: str, room_number: Optional[str]) -> str:
+    """'층/호수' (호수가 없으면 '층/public') - duplicate_index 의 partition 과 같은 기준"""
+    return "/".join(partition_key(floor, room_number))
+
+def area_of(room_number: Optional[str]) -> str:
+    return ROOM_AREA if room_number else PUBLIC_AREA
+
+def _check(name: str, value) -> float:
+    if not isinstance(value, (int, float)) or not -1.0 <= value <= 1.0:
+        raise ValueError(f"Duplicate threshold '{name}' must be a cosine similarity in [-1, 1]")
+    return float(value)
+
+class DuplicateThresholds:
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        unknown = set(config) - {"default", "area", "locations", "calibration"}
+        if unknown:
+            raise ValueError(f"Unknown duplicate threshold keys: {sorted(unknown)}")
+        self.default = _check("default", config.get("default", DEFAULT_DUPLICATE_THRESHOLD))
+        self.area = {k: _check(f"area.{k}", v) for k, v in config.get("area", {}).items()}
+        extra = set(self.area) - {PUBLIC_AREA, ROOM_AREA}
+        if extra:
+            raise ValueError(f"Unknown duplicate threshold areas: {sorted(extra)}")
+        self.locations = {k: _check(f"locations.{k}", v) for k, v in config.get("locations", {}).items()}
+        self.calibration = config.get("calibration")
+
+    def for_location(self, floor: str, room_number: Optional[str]) -> float:
+        threshold = self.locations.get(location_key(floor, room_number))
+        if threshold is None:
+            threshold = self.area.get(area_of(room_number), self.default)
+        return threshold
+
+    def to_dict(self) -> dict:
+        config = {"default": self.default, "area": self.area, "locations": self.locations}
+        if self.calibration is not None:
+            config["calibration"] = self.calibration
+        return config
+
+def load_duplicate_thresholds(path: str = DUPLICATE_THRESHOLDS_PATH) -> DuplicateThresholds:
+    """설정 파일 로드 (파일이 없으면 모든 위치 0.80)"""
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return DuplicateThresholds(json.load(f))
+    return DuplicateThresholds()
+
+def get_duplicate_thresholds() -> DuplicateThresholds:
+    """프로세스당 설정 파일 한 번 로드 (재보정 후에는 reload_duplicate_thresholds)"""
+    global _thresholds
+    if _thresholds is None:
+        _thresholds = load_duplicate_thresholds()
+    return _thresholds
+
+def reload_duplicate_thresholds(path: str = DUPLICATE_THRESHOLDS_PATH) -> DuplicateThresholds:
+    global _thresholds
+    _thresholds = load_duplicate_thresholds(path)
+    return _thresholds
+
+# ==========================================
+# 📐 Calibration (offline, numpy only)
+# ==========================================
+# 라벨된 쌍 (중복 / 중복 아님) 의 유사도로 기준 선택:
+#   비용(t) = fp_cost * (유사도 >= t 인 "중복 아님" 쌍 수)  -> 잘못 중복 처리 = 사용자가 다시 신고
+#           + fn_cost * (유사도 <  t 인 "중복" 쌍 수)      -> 놓친 중복 = Gemini 호출 1회
+# 후보 기준 전체를 행렬 비교 한 번으로 계산하고, 비용이 최소인 구간의 가운데를 선택 (양쪽 여유 최대).
+# 저장된 신고 벡터 전체의 쌍 유사도 분포 (대부분 서로 다른 고장) 는 하한으로 사용:
+#   무작위 쌍 중 기준 이상인 비율이 max_background_rate 를 넘지 않도록.
+
+THRESHOLD_GRID = np.round(np.arange(0.50, 0.99 + 1e-9, 0.0025), 4)
+HISTOGRAM_BINS = np.linspace(-1.0, 1.0, 4001)
+
+def pair_similarities(matrix: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """L2 정규화 행렬에서 (left[i], right[i]) 쌍의 코사인 유사도 (행 단위 내적 한 번)"""
+    return np.einsum("ij,ij->i", matrix[left], matrix[right])
+
+def similarity_histogram(matrix: np.ndarray, groups: Optional[np.ndarray] = None,
+                         batch_size: int = 1024) -> Dict[object, np.ndarray]:
+    """
+    서로 다른 두 벡터 쌍 (i < j) 의 유사도 히스토그램 (HISTOGRAM_BINS). 행렬 곱을 batch_size 행씩 -> 메모리 O(batch * n).
+    groups 가 있으면 같은 그룹 (위치) 안의 쌍만, 그룹별로. Returns {그룹: 히스토그램}
+    """
+    n = len(matrix)
+    groups = np.zeros(n, dtype='int64') if groups is None else np.asarray(groups)
+    labels, codes = np.unique(groups, return_inverse=True)
+    n_bins = len(HISTOGRAM_BINS) - 1
+    counts = np.zeros(len(labels) * n_bins, dtype='int64')
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        sims = matrix[start:stop] @ matrix.T
+        rows, cols = np.nonzero((np.arange(n)[None, :] > np.arange(start, stop)[:, None])
+                                & (codes[start:stop, None] == codes[None, :]))
+        bins = np.clip(np.searchsorted(HISTOGRAM_BINS, sims[rows, cols], side="right") - 1, 0, n_bins - 1)
+        counts += np.bincount(codes[start + rows] * n_bins + bins, minlength=len(counts))
+    counts = counts.reshape(len(labels), n_bins)
+    return {label: counts[i] for i, label in enumerate(labels.tolist())}
+
+def background_floor(histogram: np.ndarray, max_rate: float) -> float:
+    """유사도 >= 기준 인 쌍 비율이 max_rate 이하가 되는 가장 작은 기준 (히스토그램 bin 경계)"""
+    total = histogram.sum()
+    if total == 0:
+        return -1.0
+    # above[k] = bin k 이상의 쌍 수 -> HISTOGRAM_BINS[k] 를 기준으로 했을 때 통과하는 쌍
+    above = np.concatenate([np.cumsum(histogram[::-1])[::-1], [0]])
+    return round(float(HISTOGRAM_BINS[np.argmax(above <= max_rate * total)]), 4)
+
+def choose_threshold(positive: np.ndarray, negative: np.ndarray, fp_cost: float = 3.0, fn_cost: float = 1.0,
+                     floor: float = -1.0) -> Tuple[float, dict]:
+    """
+    라벨된 쌍 유사도로 기준 선택 (floor 미만은 후보에서 제외). Returns (기준, 선택 근거)
+    """
+    grid = THRESHOLD_GRID[THRESHOLD_GRID >= floor]
+    if len(grid) == 0:
+        grid = THRESHOLD_GRID[-1:]
+    positive, negative = np.asarray(positive), np.asarray(negative)
+    false_pos = (negative[None, :] >= grid[:, None]).sum(axis=1)
+    false_neg = (positive[None, :] < grid[:, None]).sum(axis=1)
+    cost = fp_cost * false_pos + fn_cost * false_neg
+    best = np.flatnonzero(cost == cost.min())
+    # 비용이 최소인 첫 연속 구간의 가운데
+    run_end = best[0] + np.argmax(np.diff(np.append(best, best[-1] + 2)) > 1)
+    pick = (best[0] + run_end) // 2
+    return float(grid[pick]), {
+        "positive_pairs": int(len(positive)),
+        "negative_pairs": int(len(negative)),
+        "false_positives": int(false_pos[pick]),
+        "false_negatives": int(false_neg[pick]),
+        "cost": float(cost[pick]),
+    }
+
+def calibrate(positive: Dict[str, List[float]], negative: Dict[str, List[float]],
+              backgrounds: Optional[Dict[str, np.ndarray]] = None, fp_cost: float = 3.0, fn_cost: float = 1.0,
+              max_background_rate: float = 0.001, min_pairs: int = 20) -> dict:
+    """
+    위치별 라벨 쌍 유사도 -> 설정 파일 dict.
+    positive / negative: {location_key 또는 ANY_LOCATION: [유사도]}, backgrounds: {같은 key: 히스토그램}.
+    default 는 전체 쌍으로, area / location 은 중복 / 중복 아님 쌍이 각각 min_pairs 이상일 때만 따로 계산.
+    """
+    backgrounds = backgrounds or {}
+    merged_background = sum(backgrounds.values()) if backgrounds else None
+
+    def pick(keys: List[str], background) -> Tuple[float, dict]:
+        pos = np.concatenate([np.asarray(positive.get(k, []), dtype='float64') for k in keys] or [np.zeros(0)])
+        neg = np.concatenate([np.asarray(negative.get(k, []), dtype='float64') for k in keys] or [np.zeros(0)])
+        floor = background_floor(background, max_background_rate) if background is not None else -1.0
+        threshold, info = choose_threshold(pos, neg, fp_cost, fn_cost, floor)
+        if background is not None:
+            info["background_floor"] = floor
+        return threshold, info
+
+    def enough(keys: List[str]) -> bool:
+        return (sum(len(positive.get(k, [])) for k in keys) >= min_pairs
+                and sum(len(negative.get(k, [])) for k in keys) >= min_pairs)
+
+    keys = sorted(set(positive) | set(negative))
+    if not any(positive.values()) or not any(negative.values()):
+        raise ValueError("Calibration needs both duplicate and non-duplicate pairs")
+    located = [k for k in keys if k != ANY_LOCATION]
+    default, default_info = pick(keys, merged_background)
+    config = {"default": default, "area": {}, "locations": {}}
+    groups = {"default": default_info}
+
+    for area in (ROOM_AREA, PUBLIC_AREA):
+        area_keys = [k for k in located if (k.rsplit("/", 1)[-1] == PUBLIC_AREA) == (area == PUBLIC_AREA)]
+        if enough(area_keys):
+            area_background = [backgrounds[k] for k in area_keys if k in backgrounds]
+            background = sum(area_background) if area_background else merged_background
+            config["area"][area], groups[f"area:{area}"] = pick(area_keys, background)
+    for key in located:
+        if enough([key]):
+            config["locations"][key], groups[key] = pick([key], backgrounds.get(key, merged_background))
+
+    config["calibration"] = {"fp_cost": fp_cost, "fn_cost": fn_cost, "max_background_rate": max_background_rate,
+                             "min_pairs": min_pairs, "groups": groups}
+    return config
@@ -0,0 +1,259 @@
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.embedding import get_embeddings
+from app.core.metrics import inc, observe, VECTOR_JOBS, VECTOR_JOB_SECONDS, VECTOR_JOB_BATCH
+from app.core.tracing import span
+from app.matching.rank_cache import get_rank_cache
+from .service import store_user_vectors
+
+# ==========================================
+# 📮 User Vector Jobs (write-behind queue)
+# ==========================================
+# POST /api/users/vector 는 작업을 SQLite 에 기록하고 바로 202 + job id 반환.
+# 백그라운드 워커가 쌓인 작업을 최대 VECTOR_JOB_BATCH 개씩 가져와
+#   임베딩 API 호출 (passage / query 각각 한 번, 배치) -> 벡터 저장 -> 매칭 결과 캐시 갱신.
+# 작업 상태: queued -> running -> done / failed (실패 시 VECTOR_JOB_MAX_ATTEMPTS 번까지 다시 queued)
+# 서버가 도중에 종료되어 running 으로 남은 작업은 다음 시작 시 다시 queued (벡터 저장은 덮어쓰기라 재실행 안전).
+# 같은 사용자의 작업은 생성 순서대로 저장되므로 마지막 수정 내용이 남음.
+#   VECTOR_JOB_DB             SQLite 파일 (기본 storage/vector_jobs.sqlite3)
+#   VECTOR_JOB_WORKERS        워커 수 (기본 1)
+#   VECTOR_JOB_BATCH          워커 한 번에 처리할 최대 작업 수 (기본 16)
+#   VECTOR_JOB_MAX_ATTEMPTS   최대 시도 횟수 (기본 3)
+#   VECTOR_JOB_POLL_INTERVAL  새 작업 알림이 없을 때 DB 확인 주기 (초, 기본 1.0)
+
+VECTOR_JOB_DB = os.getenv("VECTOR_JOB_DB", "storage/vector_jobs.sqlite3")
+VECTOR_JOB_WORKERS = int(os.getenv("VECTOR_JOB_WORKERS", "1"))
+VECTOR_JOB_BATCH = int(os.getenv("VECTOR_JOB_BATCH", "16"))
+VECTOR_JOB_MAX_ATTEMPTS = int(os.getenv("VECTOR_JOB_MAX_ATTEMPTS", "3"))
+VECTOR_JOB_POLL_INTERVAL = float(os.getenv("VECTOR_JOB_POLL_INTERVAL", "1.0"))
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+
+class JobStore:
+    """SQLite 작업 저장소 (WAL, 연결 하나를 lock 으로 공유)"""
+
+    def __init__(self, path: str = VECTOR_JOB_DB, max_attempts: int = VECTOR_JOB_MAX_ATTEMPTS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # WAL + synchronous=NORMAL: 커밋된 작업은 프로세스가 죽어도 유지
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS vector_jobs (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                self_desc TEXT,
+                room_desc TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS vector_jobs_status ON vector_jobs (status, created_at)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def enqueue(self, user_id: int, self_desc: Optional[str], room_desc: Optional[str]) -> dict:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO vector_jobs (id, user_id, self_desc, room_desc, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, user_id, self_desc, room_desc, now, now))
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM vector_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self, limit: int) -> List[dict]:
+        """가장 오래된 queued 작업을 최대 limit 개 running 으로 바꾸고 반환 (생성 순서)"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 다른 워커가 처리 중인 사용자의 작업은 건너뜀 (같은 사용자의 저장 순서 보장)
+                rows = self.conn.execute(
+                    "SELECT * FROM vector_jobs WHERE status = 'queued' AND user_id NOT IN "
+                    "(SELECT user_id FROM vector_jobs WHERE status = 'running') ORDER BY created_at LIMIT ?",
+                    (limit,)).fetchall()
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE vector_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(now, row["id"]) for row in rows])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [{**dict(row), "status": "running", "attempts": row["attempts"] + 1} for row in rows]
+
+    def complete(self, job_ids: List[str]):
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE vector_jobs SET status = 'done', error = NULL, updated_at = ? WHERE id = ?",
+                [(time.time(), job_id) for job_id in job_ids])
+
+    def fail(self, jobs: List[dict], error: str) -> List[dict]:
+        """시도 횟수가 남은 작업은 다시 queued, 나머지는 failed. Returns 최종 실패한 작업"""
+        failed = [job for job in jobs if job["attempts"] >= self.max_attempts]
+        failed_ids = {job["id"] for job in failed}
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE vector_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                [("failed" if job["id"] in failed_ids else "queued", error, now, job["id"]) for job in jobs])
+        return failed
+
+    def recover(self) -> int:
+        """이전 프로세스에서 처리 중이던 작업을 다시 queued"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE vector_jobs SET status = 'queued', updated_at = ? WHERE status = 'running'", (time.time(),))
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM vector_jobs GROUP BY status").fetchall()
+        return {status: 0 for status in JOB_STATUSES} | {row[0]: row[1] for row in rows}
+
+def process_jobs(jobs: List[dict]):
+    """작업 묶음 처리: 임베딩 배치 호출 (passage / query 각 1회) + 생성 순서대로 저장. 실패 시 RuntimeError"""
+    with span("users.vector_jobs", batch=len(jobs)):
+        embeddings = {}
+        for field, model_type in (("self_desc", "passage"), ("room_desc", "query")):
+            texts = sorted({job[field] for job in jobs if job[field]})
+            if not texts:
+                continue
+            matrix = get_embeddings(texts, model_type)
+            if matrix is None or len(matrix) != len(texts):
+                raise RuntimeError(f"Embedding request failed ({model_type}, {len(texts)} texts)")
+            embeddings.update({(field, text): vec for text, vec in zip(texts, matrix)})
+
+        for job in jobs:
+            store_user_vectors(
+                job["user_id"],
+                self_emb=embeddings.get(("self_desc", job["self_desc"])),
+                criteria_emb=embeddings.get(("room_desc", job["room_desc"])),
+            )
+
+def _update_rank_cache(jobs: List[dict]):
+    cache = get_rank_cache()
+    if cache is None:
+        return
+    for job in jobs:
+        if job["self_desc"]:
+            cache.update_candidate(job["user_id"])
+        if job["room_desc"]:
+            cache.invalidate_seeker(job["user_id"])
+
+class VectorJobQueue:
+    def __init__(self, store: JobStore, workers: int = VECTOR_JOB_WORKERS, batch_size: int = VECTOR_JOB_BATCH,
+                 poll_interval: float = VECTOR_JOB_POLL_INTERVAL):
+        self.store = store
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = None
+        self._tasks = []
+
+    async def enqueue(self, user_id: int, self_desc: Optional[str], room_desc: Optional[str]) -> dict:
+        job = await run_in_threadpool(self.store.enqueue, user_id, self_desc, room_desc)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await run_in_threadpool(self.store.get, job_id)
+
+    def start(self):
+        """이벤트 루프에서 호출: 중단된 작업 복구 + 워커 시작"""
+        recovered = self.store.recover()
+        if recovered:
+            logger.info("Recovered interrupted vector jobs", extra={"jobs": recovered})
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """워커 종료 (처리 중이던 작업은 running 으로 남고 다음 시작 시 복구)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    async def drain(self):
+        """queued 작업이 없을 때까지 현재 태스크에서 처리 (테스트 / 스크립트용)"""
+        while await self.run_once():
+            pass
+
+    async def run_once(self) -> int:
+        """작업 묶음 하나 처리. Returns 처리한 작업 수 (없으면 0)"""
+        jobs = await run_in_threadpool(self.store.claim, self.batch_size)
+        if not jobs:
+            return 0
+        observe(VECTOR_JOB_BATCH, len(jobs))
+        try:
+            await run_in_threadpool(process_jobs, jobs)
+        except Exception as e:
+            failed = await run_in_threadpool(self.store.fail, jobs, str(e))
+            inc(VECTOR_JOBS, "failed", amount=len(failed))
+            logger.warning("Vector job batch failed", extra={"jobs": len(jobs), "failed": len(failed), "error": str(e)})
+            return len(jobs)
+
+        await run_in_threadpool(self.store.complete, [job["id"] for job in jobs])
+        await run_in_threadpool(_update_rank_cache, jobs)
+        now = time.time()
+        for job in jobs:
+            observe(VECTOR_JOB_SECONDS, now - job["created_at"])
+        inc(VECTOR_JOBS, "done", amount=len(jobs))
+        logger.info("Vector jobs done", extra={"jobs": len(jobs)})
+        return len(jobs)
+
+    async def _run(self):
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Vector job worker error", extra={"error": str(e)})
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+def get_job_queue() -> VectorJobQueue:
+    """프로세스당 하나의 작업 큐 (VECTOR_JOB_DB). 워커는 서버 시작 시 start() 로 실행"""
+    global _queue
+    if _queue is None:
+        _queue = VectorJobQueue(JobStore(VECTOR_JOB_DB))
+    return _queue
+
+async def shutdown_job_queue():
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue.store.close()
+        _queue = None
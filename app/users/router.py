@@ -1,31 +1,73 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from app.users.models import VectorGenerationRequest
 from app.users.service import save_user_vectors
+from app.users.jobs import get_job_queue
+from app.matching.rank_cache import get_rank_cache
 
 router = APIRouter()
 
-@router.post("/vector", summary="Generate and save user vectors")
-async def generate_user_vectors(request: VectorGenerationRequest):
+def _job_response(job: dict) -> dict:
+    return {
+        "jobId": job["id"],
+        "userId": job["user_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+    }
+
+@router.post("/vector", status_code=202, summary="Generate and save user vectors")
+async def generate_user_vectors(
+    request: VectorGenerationRequest,
+    wait: bool = Query(False, description="true 이면 저장 완료까지 기다린 후 200 (기존 동작)"),
+):
     """
     Generate embedding vectors for user descriptions and save them to storage.
     These vectors are used for roommate matching.
+    - 기본: 작업을 큐에 넣고 바로 202 + jobId. 완료 여부는 GET /api/users/vector/jobs/{jobId}
+    - wait=true: 임베딩 생성 + 저장까지 기다린 후 200
     """
+    if not wait:
+        job = await get_job_queue().enqueue(request.userId, request.selfDescription, request.roommateDescription)
+        return {**_job_response(job), "statusUrl": f"/api/users/vector/jobs/{job['id']}"}
+
     try:
         # Generate and save vectors
         # If descriptions are None, save_user_vectors handles it gracefully (skips saving)
-        save_user_vectors(
+        # Embedding API calls + file writes block -> run off the event loop
+        await run_in_threadpool(
+            save_user_vectors,
             user_id=request.userId,
             self_desc=request.selfDescription,
             room_desc=request.roommateDescription
         )
-        
-        return {
+
+        # Cached rankings: re-score this user as a candidate / drop their own rankings
+        cache = get_rank_cache()
+        if cache is not None:
+            if request.selfDescription:
+                cache.update_candidate(request.userId)
+            if request.roommateDescription:
+                cache.invalidate_seeker(request.userId)
+
+        return JSONResponse({
             "status": "ok",
             "message": f"Vectors saved for user {request.userId}",
             "details": {
                 "self_vector": "Saved" if request.selfDescription else "Skipped",
                 "criteria_vector": "Saved" if request.roommateDescription else "Skipped"
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/vector/jobs/{job_id}", summary="User vector job status")
+async def get_vector_job(job_id: str):
+    """벡터 생성 작업 상태: queued / running / done / failed"""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return _job_response(job)
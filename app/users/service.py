@@ -1,17 +1,60 @@
 import os
 import numpy as np
 from app.core.embedding import get_embedding
+from app.core.vector_format import l2_normalize, ensure_format_dir, is_normalized_storage, encode_vector, decode_vector
+from app.core.projection import get_active_projection
+from app.core.metrics import inc, timed, VECTOR_LOOKUPS, VECTOR_LOAD_SECONDS
+from app.core.tracing import span
+from app.core.storage import get_storage, npy_bytes
 
 VECTOR_STORAGE_PATH = "storage/vectors"
+# On-disk dtype for new vectors: 'float32' (default), 'float16' or 'int8'
+VECTOR_STORAGE_DTYPE = os.getenv("VECTOR_STORAGE_DTYPE", "float32")
+
+# Memory-mapped vector snapshot (matching worker processes only, see attach_snapshot)
+_snapshot = None
+# Storage directories already prepared (created at startup, not on every save)
+_ensured_paths = set()
 
 def ensure_vector_storage():
-    if not os.path.exists(VECTOR_STORAGE_PATH):
-        os.makedirs(VECTOR_STORAGE_PATH)
+    """Create the vector directory + format manifest (once per path; called at startup)."""
+    if VECTOR_STORAGE_PATH not in _ensured_paths:
+        ensure_format_dir(VECTOR_STORAGE_PATH)
+        _ensured_paths.add(VECTOR_STORAGE_PATH)
+
+def _save_vector(user_id: int, vector_type: str, emb: np.ndarray):
+    # Atomic write (temp file + rename): concurrent matching never reads a partial file
+    file_name = f"{user_id}_{vector_type}.npy"
+    emb = l2_normalize(emb)
+    store = get_storage()
+    store.write(os.path.join(VECTOR_STORAGE_PATH, file_name), npy_bytes(encode_vector(emb, VECTOR_STORAGE_DTYPE)))
+
+    # Active PCA projection: also store the reduced vector in the projection version directory
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    if projection is not None:
+        store.write(os.path.join(projection.directory, file_name),
+                    npy_bytes(encode_vector(projection.apply(emb), VECTOR_STORAGE_DTYPE)))
+
+def store_user_vectors(user_id: int, self_emb: np.ndarray = None, criteria_emb: np.ndarray = None):
+    """Persist already-computed embeddings (None / empty = keep the stored vector)."""
+    ensure_vector_storage()
+    if self_emb is not None and self_emb.size > 0:
+        with span("users.save_vector", vector_type="self"):
+            _save_vector(user_id, "self", self_emb)
+    if criteria_emb is not None and criteria_emb.size > 0:
+        with span("users.save_vector", vector_type="criteria"):
+            _save_vector(user_id, "criteria", criteria_emb)
 
 def save_user_vectors(user_id: int, self_desc: str, room_desc: str):
     """
     Generate and save embeddings for a user.
+    Vectors are L2-normalized before saving so matching can use a plain dot product,
+    and encoded with VECTOR_STORAGE_DTYPE.
     """
+    with span("users.save_vectors", user_id=user_id):
+        _save_user_vectors(user_id, self_desc, room_desc)
+
+def _save_user_vectors(user_id: int, self_desc: str, room_desc: str):
     ensure_vector_storage()
     
     # 1. Self Description Embedding (Candidate uses this)
@@ -19,7 +62,8 @@ def save_user_vectors(user_id: int, self_desc: str, room_desc: str):
     if self_desc:
         self_emb = get_embedding(self_desc, "passage")
         if self_emb.size > 0:
-            np.save(os.path.join(VECTOR_STORAGE_PATH, f"{user_id}_self.npy"), self_emb)
+            with span("users.save_vector", vector_type="self"):
+                _save_vector(user_id, "self", self_emb)
             
     # 2. Roommate Description Embedding (Seeker uses this)
     # Stored as 'query' type (to search with) -> Wait, usually query is generated at runtime.
@@ -31,14 +75,95 @@ def save_user_vectors(user_id: int, self_desc: str, room_desc: str):
     if room_desc:
         room_emb = get_embedding(room_desc, "query")
         if room_emb.size > 0:
-            np.save(os.path.join(VECTOR_STORAGE_PATH, f"{user_id}_criteria.npy"), room_emb)
+            with span("users.save_vector", vector_type="criteria"):
+                _save_vector(user_id, "criteria", room_emb)
+
+def attach_snapshot(snapshot):
+    """Serve load_user_vector from a VectorSnapshot first (None to detach)."""
+    global _snapshot
+    _snapshot = snapshot
 
 def load_user_vector(user_id: int, vector_type: str) -> np.ndarray:
     """
-    Load vector from storage.
+    Load vector from storage (always an L2-normalized float32 vector,
+    whatever the on-disk dtype). If a PCA projection is active, the reduced vector is returned.
     vector_type: 'self' or 'criteria'
     """
-    path = os.path.join(VECTOR_STORAGE_PATH, f"{user_id}_{vector_type}.npy")
+    if _snapshot is not None:
+        vec = _snapshot.lookup(user_id, vector_type)
+        if vec is not None:
+            inc(VECTOR_LOOKUPS, "snapshot")
+            return vec
+
+    file_name = f"{user_id}_{vector_type}.npy"
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    if projection is not None:
+        projected_path = os.path.join(projection.directory, file_name)
+        if os.path.exists(projected_path):
+            inc(VECTOR_LOOKUPS, "disk")
+            return decode_vector(np.load(projected_path))
+
+    path = os.path.join(VECTOR_STORAGE_PATH, file_name)
     if os.path.exists(path):
-        return np.load(path)
+        vec = decode_vector(np.load(path))
+        if not is_normalized_storage(VECTOR_STORAGE_PATH):
+            # Legacy (v1) storage: normalize on read until migrated
+            vec = l2_normalize(vec)
+        if projection is not None:
+            # Not backfilled yet: project on the fly
+            vec = projection.apply(vec)
+        inc(VECTOR_LOOKUPS, "disk")
+        return vec
+    inc(VECTOR_LOOKUPS, "missing")
     return None
+
+def gather_user_vectors(user_ids: list, vector_type: str):
+    """
+    Load many users' vectors at once (one snapshot gather when a snapshot is attached).
+    Returns (positions in user_ids that have a vector, float32 matrix or None).
+    """
+    rows, matrix = [], None
+    with timed(VECTOR_LOAD_SECONDS, "gather"):
+        if _snapshot is not None:
+            rows, matrix = _snapshot.gather(user_ids, vector_type)
+            inc(VECTOR_LOOKUPS, "snapshot", amount=len(rows))
+        found = set(rows)
+        extra_rows, extra = [], []
+        for i, uid in enumerate(user_ids):
+            if i in found:
+                continue
+            vec = load_user_vector(uid, vector_type)
+            if vec is not None:
+                extra_rows.append(i)
+                extra.append(vec)
+    if extra:
+        extra = np.array(extra, dtype='float32')
+        matrix = extra if matrix is None else np.vstack([matrix, extra])
+        rows = rows + extra_rows
+    return rows, matrix
+
+def vector_mtime_ns(user_id: int, vector_type: str):
+    """Last write time of a stored vector (ns), or None if missing."""
+    try:
+        return os.stat(os.path.join(VECTOR_STORAGE_PATH, f"{user_id}_{vector_type}.npy")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def vector_version(user_id: int, vector_type: str):
+    """Version stamp of a stored vector (file mtime + active projection), or None if missing."""
+    mtime = vector_mtime_ns(user_id, vector_type)
+    if mtime is None:
+        return None
+    projection = get_active_projection(VECTOR_STORAGE_PATH)
+    return (mtime, projection.name if projection else None)
+
+def list_user_ids(vector_type: str) -> list:
+    """IDs of all users with a stored vector of `vector_type` ('self' or 'criteria')."""
+    if not os.path.isdir(VECTOR_STORAGE_PATH):
+        return []
+    suffix = f"_{vector_type}.npy"
+    ids = []
+    for name in os.listdir(VECTOR_STORAGE_PATH):
+        if name.endswith(suffix) and name[:-len(suffix)].isdigit():
+            ids.append(int(name[:-len(suffix)]))
+    return sorted(ids)
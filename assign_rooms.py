@@ -0,0 +1,33 @@
+import sys
+import json
+import argparse
+from app.matching.models import AssignmentRequest
+from app.matching.assignment import assign_rooms
+
+def main():
+    parser = argparse.ArgumentParser(description="기숙사 2인실 전체 배정 오프라인 작업")
+    parser.add_argument("--input", required=True, help="AssignmentRequest JSON 파일 (applicants, method)")
+    parser.add_argument("--output", default="-", help="결과 JSON 파일 (기본: stdout)")
+    parser.add_argument("--method", choices=["auto", "exact", "greedy"], default=None, help="입력 파일의 method 대신 사용")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        request = AssignmentRequest(**json.load(f))
+    if args.method:
+        request.method = args.method
+
+    print(f"=== 방 배정: 지원자 {len(request.applicants)}명 (method={request.method}) ===", file=sys.stderr)
+    result = assign_rooms(request)
+
+    text = json.dumps(result.model_dump(), ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    print(f"✅ 완료: {len(result.rooms)}실 배정, 미배정 {len(result.unassigned)}명, "
+          f"총점 {result.totalScore} ({result.method}, {result.elapsedSeconds}s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
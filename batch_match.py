@@ -0,0 +1,32 @@
+import sys
+import json
+import argparse
+import time
+from app.matching.models import BatchMatchRequest
+from app.matching.batch import iter_batch_matches
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 매칭 오프라인 작업 (배정 시즌용)")
+    parser.add_argument("--input", required=True, help="BatchMatchRequest JSON 파일 (seekers, candidates, topK)")
+    parser.add_argument("--output", default="-", help="결과 JSONL 파일 (기본: stdout)")
+    parser.add_argument("--block", type=int, default=None, help="seeker 블록 크기 (메모리 상한)")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        request = BatchMatchRequest(**json.load(f))
+
+    print(f"=== 배치 매칭: seeker {len(request.seekers)}명 x 후보자 {len(request.candidates)}명 ===", file=sys.stderr)
+    start = time.perf_counter()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for item in iter_batch_matches(request, args.block):
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ 완료: {len(request.seekers)}명, {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+A/B harness for scoring profiles: ranks the same synthetic seekers / candidates under two
+profiles and reports how much the top-K changes, plus kernel time per profile.
+
+    python -m benchmarks.ab_scoring --a default --b quiet_dorm --seekers 200 --candidates 5000
+
+Profiles are read from SCORING_PROFILES_PATH (default config/scoring_profiles.json).
+Text similarity is the same for both arms (criteria x self dot products), so differences come
+from the profile weights / ranges only (text weight still scales it).
+"""
+import argparse
+import json
+import time
+import numpy as np
+from app.matching.models import UserPreferences
+from app.matching.profiles import get_scoring_profile
+from app.matching.scoring import candidate_features, compute_tag_score_matrix, compute_pref_score_matrix
+from .synthetic import synthetic_vectors, synthetic_profiles, topk_overlap, rank_agreement
+
+def _scores(profile, seekers, prefs, feats, sims, repeat: int):
+    """총점 행렬 (S, C) 과 Tag + Preference 커널 시간 (최소값, 초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        base = compute_tag_score_matrix(seekers, feats, profile) + compute_pref_score_matrix(prefs, feats, profile)
+        best = min(best, time.perf_counter() - start)
+    return base + sims * profile.w_text, best
+
+def _ranking(totals: np.ndarray) -> np.ndarray:
+    # 총점 내림차순, 동점이면 후보자 순서 (calculate_hybrid_match 와 동일)
+    return np.argsort(-np.round(totals, 1), axis=1, kind="stable")
+
+def run(name_a: str, name_b: str, n_seekers: int, n_candidates: int, d: int, k: int,
+        repeat: int = 3, seed: int = 0) -> dict:
+    profile_a, profile_b = get_scoring_profile(name_a), get_scoring_profile(name_b)
+    seekers = synthetic_profiles(n_seekers, seed=seed, start_id=n_candidates + 1)
+    candidates = synthetic_profiles(n_candidates, seed=seed + 1)
+    flags = np.random.default_rng(seed).random((n_seekers, 3)) < 0.4
+    prefs = [UserPreferences(preferNonSmoker=bool(f[0]), preferGoodAtBugs=bool(f[1]), preferQuietSleeper=bool(f[2]))
+             for f in flags]
+    feats = candidate_features(candidates)
+    sims = np.maximum(0.0, synthetic_vectors(n_seekers, d, seed=seed + 2) @ synthetic_vectors(n_candidates, d, seed=seed + 3).T)
+
+    totals_a, t_a = _scores(profile_a, seekers, prefs, feats, sims, repeat)
+    totals_b, t_b = _scores(profile_b, seekers, prefs, feats, sims, repeat)
+    rank_a, rank_b = _ranking(totals_a), _ranking(totals_b)
+
+    # 상위 K 이동: A 의 상위 K 후보자가 B 에서 몇 위인지
+    position_b = np.argsort(rank_b, axis=1)
+    moved = np.take_along_axis(position_b, rank_a[:, :k], axis=1) - np.arange(k)
+    top_a = np.take_along_axis(totals_a, rank_a[:, :k], axis=1)
+    top_b = np.take_along_axis(totals_b, rank_a[:, :k], axis=1)
+
+    return {
+        "a": profile_a.to_dict(),
+        "b": profile_b.to_dict(),
+        "seekers": n_seekers,
+        "candidates": n_candidates,
+        "k": k,
+        f"top{k}_overlap": round(topk_overlap(rank_a, rank_b, k), 4),
+        f"top{k}_rank_agreement": round(rank_agreement(rank_a, rank_b, k), 4),
+        "top1_same": round(float(np.mean(rank_a[:, 0] == rank_b[:, 0])), 4),
+        "mean_abs_score_delta": round(float(np.mean(np.abs(totals_a - totals_b))), 3),
+        f"top{k}_mean_abs_rank_shift": round(float(np.mean(np.abs(moved))), 2),
+        f"top{k}_max_rank_shift": int(np.abs(moved).max()),
+        f"top{k}_mean_score_a": round(float(top_a.mean()), 2),
+        f"top{k}_mean_score_b_same_pairs": round(float(top_b.mean()), 2),
+        "kernel_ms_a": round(t_a * 1000, 2),
+        "kernel_ms_b": round(t_b * 1000, 2),
+        "kernel_ns_per_pair_a": round(t_a * 1e9 / (n_seekers * n_candidates), 2),
+        "kernel_ns_per_pair_b": round(t_b * 1e9 / (n_seekers * n_candidates), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--a", type=str, default="default", help="baseline profile")
+    parser.add_argument("--b", type=str, required=True, help="candidate profile")
+    parser.add_argument("--seekers", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    r = run(args.a, args.b, args.seekers, args.candidates, args.dim, args.k, args.repeat)
+
+    print(f"=== Scoring profile A/B: {args.a} vs {args.b} ({args.seekers} seekers x {args.candidates} candidates) ===")
+    for key, value in r.items():
+        if key not in ("a", "b"):
+            print(f"{key:>32}: {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(r, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+ANN backend benchmark: recall@20 of HNSW / IVF-PQ against the exact IndexFlatIP path.
+
+    python -m benchmarks.bench_ann --n 50000 --dim 256 --backends hnsw ivfpq
+"""
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from app.matching.ann_index import build_ann_index, ANN_BACKENDS
+from app.matching.vector_index import build_text_index
+from .synthetic import synthetic_vectors, topk_overlap, SOLAR_DIM
+
+TOP_K = 20
+
+def _index_bytes(index) -> int:
+    return len(faiss.serialize_index(index))
+
+def run(n: int, n_queries: int, d: int, backends: list, top_m: int, args) -> list:
+    base = synthetic_vectors(n, d, seed=0)
+    queries = synthetic_vectors(n_queries, d, seed=1)
+    ids = np.arange(n, dtype='int64')
+
+    exact = build_text_index(base, "flat")
+    start = time.perf_counter()
+    _, exact_ids = exact.search(queries, TOP_K)
+    exact_time = time.perf_counter() - start
+
+    rows = [{
+        "backend": "flat",
+        "build_s": 0.0,
+        "index_mb": round(_index_bytes(exact) / 1e6, 2),
+        "search_ms_per_query": round(1000.0 * exact_time / n_queries, 3),
+        "recall_at_20": 1.0,
+        "recall_at_20_in_top_m": 1.0,
+    }]
+    for backend in backends:
+        ann = build_ann_index(base, ids, backend, hnsw_m=args.hnsw_m, nlist=args.nlist, pq_m=args.pq_m, opq=args.opq)
+        ann.set_search_params(ef_search=args.ef_search, nprobe=args.nprobe)
+
+        start = time.perf_counter()
+        _, ann_ids = ann.search_batch(queries, max(TOP_K, top_m))
+        elapsed = time.perf_counter() - start
+
+        # 매칭에서는 상위 M명을 하이브리드 점수 대상으로 쓰므로, 정확한 top-20이 top-M 안에 들어오는 비율도 측정
+        in_top_m = np.mean([
+            len(set(e.tolist()) & set(a.tolist())) / TOP_K for e, a in zip(exact_ids, ann_ids)
+        ])
+        rows.append({
+            "backend": backend,
+            "build_s": ann.meta["build_seconds"],
+            "index_mb": round(_index_bytes(ann.index) / 1e6, 2),
+            "search_ms_per_query": round(1000.0 * elapsed / n_queries, 3),
+            "recall_at_20": round(topk_overlap(exact_ids, ann_ids, TOP_K), 4),
+            "recall_at_20_in_top_m": round(float(in_top_m), 4),
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50000, help="candidate pool size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--backends", nargs="+", choices=ANN_BACKENDS, default=list(ANN_BACKENDS))
+    parser.add_argument("--top-m", type=int, default=200)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=128)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--opq", action="store_true")
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.n, args.queries, args.dim, args.backends, args.top_m, args)
+
+    print(f"=== ANN benchmark (n={args.n}, dim={args.dim}, queries={args.queries}, top_m={args.top_m}) ===")
+    print(f"{'backend':<8} {'build s':>8} {'MB':>9} {'ms/q':>8} {'recall@20':>10} {'@20 in M':>9}")
+    for r in rows:
+        print(f"{r['backend']:<8} {r['build_s']:>8} {r['index_mb']:>9} {r['search_ms_per_query']:>8} "
+              f"{r['recall_at_20']:>10} {r['recall_at_20_in_top_m']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
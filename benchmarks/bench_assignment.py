@@ -0,0 +1,108 @@
+"""
+Global room assignment benchmark: exact blossom matching vs. top-K neighbour greedy + 2-opt.
+
+Applicants get random preferences and self / criteria vectors in a temporary storage directory.
+Quality is reported as total pair score relative to the exact optimum (when exact runs) and to
+the per-applicant upper bound sum(best pair score) / 2, which holds for any pairing.
+
+    python -m benchmarks.bench_assignment --sizes 100 200 2000 5000 --dim 256
+"""
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+import app.users.service as user_service
+import app.matching.assignment as assignment
+from app.matching.models import BatchSeeker, UserPreferences
+from .synthetic import synthetic_vectors, synthetic_profiles, write_vector_storage, SOLAR_DIM
+
+def _applicants(n: int, d: int, storage_dir: str, seed: int) -> list:
+    profiles = synthetic_profiles(n, seed=seed)
+    ids = [p.id for p in profiles]
+    write_vector_storage(storage_dir, ids, synthetic_vectors(n, d, seed=seed))
+    write_vector_storage(storage_dir, ids, synthetic_vectors(n, d, seed=seed + 1), "criteria")
+    flags = np.random.default_rng(seed).random((n, 3)) < 0.4
+    return [
+        BatchSeeker(profile=p, preferences=UserPreferences(
+            preferNonSmoker=bool(f[0]), preferGoodAtBugs=bool(f[1]), preferQuietSleeper=bool(f[2])))
+        for p, f in zip(profiles, flags)
+    ]
+
+def upper_bound(scorer, members: np.ndarray) -> float:
+    """모든 배정의 총점 상한: 지원자별 최고 쌍 점수 합 / 2"""
+    best = []
+    for start in range(0, len(members), assignment.ASSIGN_BLOCK):
+        best.append(scorer.block(members[start:start + assignment.ASSIGN_BLOCK], members).max(axis=1))
+    return float(np.concatenate(best).sum() / 2.0)
+
+def _total(scorer, pairs) -> float:
+    a, b = np.array(pairs).T
+    return float(scorer.pairs(a, b).sum())
+
+def run(sizes: list, d: int, k: int, exact_max: int, seed: int = 0) -> list:
+    rows = []
+    original_path = user_service.VECTOR_STORAGE_PATH
+    try:
+        for n in sizes:
+            with tempfile.TemporaryDirectory() as storage_dir:
+                user_service.VECTOR_STORAGE_PATH = storage_dir
+                scorer = assignment.PairScorer(_applicants(n, d, storage_dir, seed))
+                members = np.arange(n)
+                bound = upper_bound(scorer, members)
+
+                start = time.perf_counter()
+                greedy_pairs = assignment.solve_greedy(scorer, members, k=k, passes=0)
+                t_greedy = time.perf_counter() - start
+                greedy_total = _total(scorer, greedy_pairs)
+
+                start = time.perf_counter()
+                ls_pairs = assignment.solve_greedy(scorer, members, k=k)
+                t_ls = time.perf_counter() - start
+                ls_total = _total(scorer, ls_pairs)
+
+                row = {
+                    "n": n,
+                    "k": k,
+                    "greedy_s": round(t_greedy, 3),
+                    "greedy_ls_s": round(t_ls, 3),
+                    "greedy_vs_bound": round(greedy_total / bound, 4),
+                    "greedy_ls_vs_bound": round(ls_total / bound, 4),
+                    "exact_s": None,
+                    "exact_vs_bound": None,
+                    "greedy_ls_vs_exact": None,
+                }
+                if n <= exact_max:
+                    start = time.perf_counter()
+                    exact_total = _total(scorer, assignment.solve_exact(scorer, members))
+                    row["exact_s"] = round(time.perf_counter() - start, 3)
+                    row["exact_vs_bound"] = round(exact_total / bound, 4)
+                    row["greedy_ls_vs_exact"] = round(ls_total / exact_total, 4)
+                rows.append(row)
+    finally:
+        user_service.VECTOR_STORAGE_PATH = original_path
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 2000, 5000])
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--k", type=int, default=assignment.ASSIGN_NEIGHBORS_K, help="neighbours per applicant")
+    parser.add_argument("--exact-max", type=int, default=400, help="run exact matching up to this n")
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.dim, args.k, args.exact_max)
+
+    print(f"=== Room assignment benchmark (dim={args.dim}, k={args.k}) ===")
+    print(f"{'n':>6} {'exact s':>8} {'greedy s':>9} {'+2opt s':>8} {'exact/UB':>9} {'greedy/UB':>10} {'+2opt/UB':>9} {'+2opt/exact':>12}")
+    for r in rows:
+        print(f"{r['n']:>6} {str(r['exact_s']):>8} {r['greedy_s']:>9} {r['greedy_ls_s']:>8} {str(r['exact_vs_bound']):>9} "
+              f"{r['greedy_vs_bound']:>10} {r['greedy_ls_vs_bound']:>9} {str(r['greedy_ls_vs_exact']):>12}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Matching micro-benchmark: calculate_hybrid_match end-to-end plus a per-stage breakdown.
+
+Synthetic UserProfile pools get random L2-normalized embeddings written to a temporary storage
+directory, so vector loading is part of the cost as in production. Stages follow the exhaustive
+path of calculate_hybrid_match using the same functions:
+
+    vector_load    load_seeker_vector + load_candidate_vectors
+    index_build    build_text_index (flat)
+    search         index search (exact inner product)
+    scoring        candidate features, tag / preference kernels, MatchResult loop
+    sort           sort by total score + top-K
+    serialize      response JSON (pydantic, as FastAPI does for response_model)
+
+Results (best of --repeat, ms) can be saved with --json and compared against an earlier run
+with --compare; the exit code is 1 if any timing regressed by more than --tolerance.
+
+    python -m benchmarks.bench_match --sizes 1000 10000 --json bench_match.json
+    python -m benchmarks.bench_match --sizes 1000 10000 --compare bench_match.json
+    python -m benchmarks.bench_match --sizes 100000 --dim 1024   # 100k x 4096 needs ~1.6 GB of vectors
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+import numpy as np
+from pydantic import TypeAdapter
+import app.users.service as user_service
+import app.matching.service as matching_service
+from app.matching.models import MatchRequest, MatchResult, UserPreferences
+from app.matching.scoring import candidate_features, compute_tag_scores, compute_pref_scores
+from app.matching.vector_index import build_text_index
+from .synthetic import synthetic_vectors, synthetic_profiles, write_vector_storage, SOLAR_DIM
+
+STAGES = ("vector_load", "index_build", "search", "scoring", "sort", "serialize")
+
+_response_adapter = TypeAdapter(List[MatchResult])
+
+def staged_match(request: MatchRequest) -> tuple:
+    """calculate_hybrid_match 의 전수 계산 경로를 단계별로 실행. Returns (결과, {단계: 초})"""
+    timings = {}
+    seeker = request.myProfile
+
+    start = time.perf_counter()
+    seeker_vec = matching_service.load_seeker_vector(seeker)
+    candidates = [c for c in request.candidates if c.id != seeker.id and c.gender == seeker.gender]
+    rows, matrix = matching_service.load_candidate_vectors(candidates)
+    timings["vector_load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = build_text_index(matrix, "flat")
+    timings["index_build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    D, I = index.search(seeker_vec, len(rows))
+    sims = np.zeros(len(candidates))
+    for dist, idx in zip(D[0], I[0]):
+        if idx == -1: continue
+        sims[rows[idx]] = max(0.0, float(dist))
+    timings["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    feats = candidate_features(candidates)
+    tag_scores = compute_tag_scores(seeker, feats)
+    pref_scores = compute_pref_scores(request.preferences, feats)
+    results = [matching_service.build_match_result(c, tag_scores[i], pref_scores[i], sims[i]) for i, c in enumerate(candidates)]
+    timings["scoring"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results.sort(key=lambda x: x.totalScore, reverse=True)
+    results = results[:matching_service.MATCH_TOP_K]
+    for rank, res in enumerate(results):
+        res.rank = rank + 1
+    timings["sort"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _response_adapter.dump_json(results)
+    timings["serialize"] = time.perf_counter() - start
+    return results, timings
+
+def _best_of(fn, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+def run(sizes: list, d: int, repeat: int, seed: int = 0) -> list:
+    rows = []
+    original_path = user_service.VECTOR_STORAGE_PATH
+    original_flag = matching_service.MATCH_TWO_STAGE
+    try:
+        for n in sizes:
+            with tempfile.TemporaryDirectory() as storage_dir:
+                user_service.VECTOR_STORAGE_PATH = storage_dir
+                candidates = synthetic_profiles(n, seed=seed)
+                write_vector_storage(storage_dir, [c.id for c in candidates], synthetic_vectors(n, d, seed=seed))
+                seeker = synthetic_profiles(1, seed=seed + 1, start_id=0)[0]
+                write_vector_storage(storage_dir, [0], synthetic_vectors(1, d, seed=seed + 1), "criteria")
+                request = MatchRequest(
+                    myProfile=seeker,
+                    preferences=UserPreferences(preferNonSmoker=True, preferQuietSleeper=True),
+                    candidates=candidates,
+                )
+
+                matching_service.MATCH_TWO_STAGE = False
+                exhaustive, t_exhaustive = _best_of(lambda: matching_service.calculate_hybrid_match(request), repeat)
+                matching_service.MATCH_TWO_STAGE = True
+                _, t_two_stage = _best_of(lambda: matching_service.calculate_hybrid_match(request), repeat)
+
+                stages = {stage: float("inf") for stage in STAGES}
+                for _ in range(repeat):
+                    staged, timings = staged_match(request)
+                    for stage, t in timings.items():
+                        stages[stage] = min(stages[stage], t)
+
+                row = {
+                    "n": n,
+                    "dim": d,
+                    "end_to_end_ms": round(1000 * t_exhaustive, 2),
+                    "two_stage_ms": round(1000 * t_two_stage, 2),
+                }
+                row.update({f"{stage}_ms": round(1000 * stages[stage], 2) for stage in STAGES})
+                row["staged_matches_service"] = [r.model_dump() for r in staged] == [r.model_dump() for r in exhaustive]
+                rows.append(row)
+    finally:
+        user_service.VECTOR_STORAGE_PATH = original_path
+        matching_service.MATCH_TWO_STAGE = original_flag
+    return rows
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def metadata(repeat: int) -> dict:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "top_k": matching_service.MATCH_TOP_K,
+    }
+
+def compare(rows: list, baseline: dict, tolerance: float) -> list:
+    """같은 (n, dim) 행끼리 비교. Returns [(n, 지표, 이전 ms, 현재 ms, 비율)] 중 허용치를 넘은 항목"""
+    previous = {(r["n"], r["dim"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in rows:
+        old = previous.get((r["n"], r["dim"]))
+        if old is None:
+            continue
+        for key, value in r.items():
+            if not key.endswith("_ms") or not old.get(key):
+                continue
+            ratio = value / old[key]
+            flag = " <- regression" if ratio > 1 + tolerance else ""
+            print(f"{r['n']:>7} {key:>16} {old[key]:>10} -> {value:>10}  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append((r["n"], key, old[key], value, round(ratio, 2)))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    parser.add_argument("--compare", type=str, default=None, help="baseline results file (from --json)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.dim, args.repeat)
+
+    print(f"=== Matching benchmark (dim={args.dim}, best of {args.repeat}, ms) ===")
+    header = ["end_to_end", "two_stage", *STAGES]
+    print(f"{'n':>7} " + " ".join(f"{h:>11}" for h in header) + f" {'identical':>10}")
+    for r in rows:
+        print(f"{r['n']:>7} " + " ".join(f"{r[h + '_ms']:>11}" for h in header) + f" {str(r['staged_matches_service']):>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(args.repeat), "results": rows}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n=== vs {args.compare} (commit {baseline.get('meta', {}).get('commit')}, tolerance {args.tolerance:.0%}) ===")
+        if compare(rows, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+PCA dimensionality reduction benchmark.
+
+Trains PCA on a synthetic pool and compares exact search in the reduced space against the
+full-dimensional IndexFlatIP path: latency, memory and top-20 agreement per target dimension.
+
+    python -m benchmarks.bench_projection --n 20000 --dims 64 128 256 512
+"""
+import argparse
+import json
+import time
+from app.core.projection import train_pca, Projection
+from app.matching.vector_index import build_text_index, index_memory_bytes
+from .synthetic import synthetic_vectors, topk_overlap, rank_agreement, SOLAR_DIM
+
+TOP_K = 20
+
+def _timed_search(index, queries, k):
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, time.perf_counter() - start
+
+def run(n: int, n_queries: int, d: int, dims: list, n_train: int, latent_dim: int, seed: int = 0) -> list:
+    base = synthetic_vectors(n, d, seed=seed, latent_dim=latent_dim)
+    queries = synthetic_vectors(n_queries, d, seed=seed + 1, latent_dim=latent_dim)
+
+    exact_index = build_text_index(base, "flat")
+    exact_ids, exact_time = _timed_search(exact_index, queries, TOP_K)
+
+    rows = [{
+        "dim": d,
+        "train_s": 0.0,
+        "memory_mb": round(index_memory_bytes(exact_index) / 1e6, 2),
+        "search_ms_per_query": round(1000.0 * exact_time / n_queries, 3),
+        "recall_at_20": 1.0,
+        "rank_agreement_at_20": 1.0,
+    }]
+    # PCA 성분은 중첩 구조 -> 최대 차원으로 한 번 학습 후 잘라서 사용
+    start = time.perf_counter()
+    mean, components = train_pca(base[:n_train], max(dims))
+    train_time = time.perf_counter() - start
+
+    for dim in sorted(dims):
+        projection = Projection(f"pca_{dim}", "", mean, components[:dim])
+
+        index = build_text_index(projection.apply(base), "flat")
+        ids, elapsed = _timed_search(index, projection.apply(queries), TOP_K)
+        rows.append({
+            "dim": dim,
+            "train_s": round(train_time, 2),
+            "memory_mb": round(index_memory_bytes(index) / 1e6, 2),
+            "search_ms_per_query": round(1000.0 * elapsed / n_queries, 3),
+            "recall_at_20": round(topk_overlap(exact_ids, ids, TOP_K), 4),
+            "rank_agreement_at_20": round(rank_agreement(exact_ids, ids, TOP_K), 4),
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="candidate pool size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256, 512])
+    parser.add_argument("--train", type=int, default=3000, help="PCA training sample size")
+    parser.add_argument("--latent-dim", type=int, default=256, help="intrinsic dimension of synthetic data (0 = isotropic)")
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.n, args.queries, args.dim, args.dims, min(args.train, args.n), args.latent_dim or None)
+
+    print(f"=== PCA benchmark (n={args.n}, dim={args.dim}, queries={args.queries}, latent={args.latent_dim}) ===")
+    print(f"{'dim':>6} {'train s':>8} {'MB':>9} {'ms/q':>8} {'recall@20':>10} {'rank@20':>8}")
+    for r in rows:
+        print(f"{r['dim']:>6} {r['train_s']:>8} {r['memory_mb']:>9} {r['search_ms_per_query']:>8} "
+              f"{r['recall_at_20']:>10} {r['rank_agreement_at_20']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Reduced-precision embedding benchmark.
+
+Exact IndexFlatIP vs. fp16 / sq8 (IndexScalarQuantizer), with and without float32 rescoring.
+Reports memory, search latency and top-20 agreement against the exact path.
+
+    python -m benchmarks.bench_quantization --n 20000 --queries 100
+"""
+import argparse
+import json
+import time
+from app.core.vector_format import encode_vector
+from app.matching.vector_index import build_text_index, search_text_index, index_memory_bytes, INDEX_TYPES
+from .synthetic import synthetic_vectors, topk_overlap, rank_agreement, SOLAR_DIM
+
+TOP_K = 20
+
+def run(n: int, n_queries: int, d: int, rescore_k: int, seed: int = 0) -> list:
+    base = synthetic_vectors(n, d, seed=seed)
+    queries = synthetic_vectors(n_queries, d, seed=seed + 1)
+
+    exact_index = build_text_index(base, "flat")
+    _, exact_ids = exact_index.search(queries, TOP_K)
+    flat_bytes = index_memory_bytes(exact_index)
+
+    rows = []
+    for index_type in INDEX_TYPES:
+        index = build_text_index(base, index_type)
+        for rk in ([0, rescore_k] if index_type != "flat" and rescore_k > 0 else [0]):
+            k = max(TOP_K, rk)
+            start = time.perf_counter()
+            _, ids = search_text_index(index, queries, k, exact_matrix=base, rescore_k=rk)
+            elapsed = time.perf_counter() - start
+
+            mem = index_memory_bytes(index)
+            rows.append({
+                "index": index_type,
+                "rescore_k": rk,
+                "n": n,
+                "dim": d,
+                "memory_mb": round(mem / 1e6, 2),
+                "memory_saved_pct": round(100.0 * (1 - mem / flat_bytes), 1),
+                "search_ms_per_query": round(1000.0 * elapsed / n_queries, 3),
+                "recall_at_20": round(topk_overlap(exact_ids, ids, TOP_K), 4),
+                "rank_agreement_at_20": round(rank_agreement(exact_ids, ids, TOP_K), 4),
+            })
+    return rows
+
+def storage_bytes_per_vector(d: int) -> dict:
+    """Per-user .npy payload size for each storage dtype (without the .npy header)."""
+    vec = synthetic_vectors(1, d)[0]
+    return {dtype: encode_vector(vec, dtype).nbytes for dtype in ("float32", "float16", "int8")}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="candidate pool size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--rescore-k", type=int, default=100, help="float32 rescoring shortlist (0 = off)")
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.n, args.queries, args.dim, args.rescore_k)
+    storage = storage_bytes_per_vector(args.dim)
+
+    print(f"=== Quantization benchmark (n={args.n}, dim={args.dim}, queries={args.queries}) ===")
+    print(f"{'index':<6} {'rescore':>7} {'MB':>9} {'saved%':>7} {'ms/q':>8} {'recall@20':>10} {'rank@20':>8}")
+    for r in rows:
+        print(f"{r['index']:<6} {r['rescore_k']:>7} {r['memory_mb']:>9} {r['memory_saved_pct']:>7} "
+              f"{r['search_ms_per_query']:>8} {r['recall_at_20']:>10} {r['rank_agreement_at_20']:>8}")
+    print("\nPer-vector storage (bytes):", storage)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows, "storage_bytes_per_vector": storage}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
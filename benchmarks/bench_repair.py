@@ -0,0 +1,230 @@
+"""
+Repair pipeline benchmark: drives process_repair_request with many concurrent synthetic reports,
+fully offline.
+
+- Gemini: `genai` is replaced by a local stub that blocks for --gemini-latency ms (like the real
+  synchronous SDK call) and returns a fixed analysis.
+- CLIP: the real clip-ViT-B-32 model if it is in the local Hugging Face cache (--clip model),
+  otherwise a deterministic stub encoder (224x224 resize + fixed random projection), so
+  encode times are only representative with the real model. --clip auto picks whichever is available.
+- Images: the bundled test1..4.jpg, copied to a per-report temp file (the API uses one fixed path).
+- Reports: REPAIR_REPORTS is seeded with --existing synthetic reports (random floors) plus one
+  report per test image at the requests' location (3층 301호); each request lists --scan of them
+  and, with probability --dup-ratio, includes the report of its own image (-> duplicate path, no
+  Gemini call). Only listed reports in the request's location partition are compared.
+  With --hash-seed the image reports also carry content hashes, so those duplicates are caught by
+  the hash fast path (no decode / CLIP) instead of the CLIP comparison.
+
+Reports per-stage latency (file read, content hash, decode, perceptual hash, CLIP encode, duplicate scan,
+analysis, file move)
+and end-to-end p50 / p95 / p99 for --concurrency closed-loop clients. End-to-end is measured from
+submission, so it includes waiting behind other clients' reports (the pipeline blocks the event loop).
+
+    python -m benchmarks.bench_repair --reports 200 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+import numpy as np
+from PIL import Image
+import app.repair.service as repair_service
+import app.repair.derivatives as derivatives
+from app.repair.models import RepairRequest
+from app.repair.image_hash import content_hash, dhash
+
+IMAGES = ["test1.jpg", "test2.jpg", "test3.jpg", "test4.jpg"]
+STAGES = ("file_read", "content_hash", "decode", "perceptual_hash", "clip_encode", "duplicate_scan", "analysis",
+          "file_move")
+CLIP_DIM = 512
+
+STUB_ANALYSIS = {
+    "title": "", "item": "세면대", "issue": "배수구 막힘", "severity": "HIGH", "priority_score": 7,
+    "reasoning": "필수 생활 기능 (벤치마크용 고정 응답)", "description": "세면대 배수가 되지 않음",
+}
+
+class StubGenerativeModel:
+    """genai.GenerativeModel 대체: 고정 지연 후 고정 JSON 응답"""
+    latency = 0.0
+
+    def __init__(self, model_name=None, generation_config=None):
+        self.model_name = model_name
+
+    def generate_content(self, contents):
+        time.sleep(self.latency)  # 실제 SDK 와 같은 동기 호출
+        return SimpleNamespace(text=json.dumps(STUB_ANALYSIS, ensure_ascii=False))
+
+stub_genai = SimpleNamespace(GenerativeModel=StubGenerativeModel, configure=lambda **kwargs: None)
+
+class StubClipEncoder:
+    """오프라인 CLIP 대체: 224x224 리사이즈 -> 32x32 평균 풀링 -> 고정 랜덤 투영 (같은 이미지 = 같은 벡터)"""
+
+    def __init__(self, dim: int = CLIP_DIM, seed: int = 0):
+        self.projection = np.random.default_rng(seed).standard_normal((32 * 32 * 3, dim)).astype('float32')
+
+    def encode(self, img, convert_to_numpy=True):
+        pixels = np.asarray(img.convert("RGB").resize((224, 224), Image.BICUBIC), dtype='float32') / 255.0
+        pooled = pixels.reshape(32, 7, 32, 7, 3).mean(axis=(1, 3))
+        # 평균 밝기 제거 (CLIP 의 픽셀 정규화처럼) -> 다른 이미지끼리는 유사도가 낮음
+        return (pooled - pooled.mean()).reshape(-1) @ self.projection
+
+def load_clip(mode: str):
+    """Returns (encoder, 이름). model: 로컬 캐시의 실제 모델만 사용 (다운로드 안 함)"""
+    if mode in ("auto", "model"):
+        try:
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer('sentence-transformers/clip-ViT-B-32', local_files_only=True), "clip-ViT-B-32"
+        except Exception as e:
+            if mode == "model":
+                raise RuntimeError(f"CLIP model is not in the local cache: {e}")
+    return StubClipEncoder(), "stub"
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {"n": 0, "p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return {"n": len(values), "p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2)}
+
+def seed_reports(encoder, n_existing: int, image_dir: str, seed: int, hashes: bool = False) -> dict:
+    """REPAIR_REPORTS 초기화 (hashes: 이미지 신고에 content hash / dHash 포함). Returns {이미지 이름: 그 이미지의 기존 신고 id}"""
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n_existing, CLIP_DIM)).astype('float32')
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    repair_service.REPAIR_REPORTS.clear()
+    for i, vec in enumerate(vecs):
+        repair_service.REPAIR_REPORTS.append({
+            "id": i + 1, "floor": str(rng.integers(1, 16)), "room_number": None,
+            "description": f"synthetic report {i + 1}", "image_url": None, "embedding": vec,
+        })
+    image_report = {}
+    for j, name in enumerate(IMAGES):
+        path = os.path.join(image_dir, name)
+        emb = repair_service.l2_normalize(encoder.encode(Image.open(path), convert_to_numpy=True))
+        image_report[name] = n_existing + j + 1
+        repair_service.REPAIR_REPORTS.append({
+            "id": n_existing + j + 1, "floor": "3", "room_number": "301",
+            "description": f"existing report for {name}", "image_url": None, "embedding": emb,
+        })
+        if hashes:
+            with open(path, "rb") as f:
+                repair_service.REPAIR_REPORTS[-1].update(content_hash=content_hash(f.read()), dhash=dhash(Image.open(path)))
+    return image_report
+
+async def _run_level(n_reports: int, concurrency: int, image_report: dict, n_scan: int, dup_ratio: float,
+                     work_dir: str, id_base: int, seed: int):
+    rng = np.random.default_rng(seed)
+    all_ids = np.array([r["id"] for r in repair_service.REPAIR_REPORTS])
+    latencies, stages, outcomes = [], {stage: [] for stage in STAGES}, {"new": 0, "duplicate": 0}
+
+    # 요청 준비 (이미지 복사는 측정 밖)
+    jobs = []
+    for i in range(n_reports):
+        name = IMAGES[i % len(IMAGES)]
+        path = os.path.join(work_dir, f"pending_{id_base + i}.jpg")
+        shutil.copyfile(name, path)
+        scan = rng.choice(all_ids, size=min(n_scan, len(all_ids)), replace=False).tolist()
+        scan = [x for x in scan if x != image_report[name]]
+        if rng.random() < dup_ratio:
+            scan.append(image_report[name])
+        jobs.append((RepairRequest(existingReportIds=scan, totalReportCount=id_base + i, floor="3", room_number="301"), path))
+
+    async def client():
+        # closed loop: 각 클라이언트는 이전 신고가 끝나면 바로 다음 신고 제출
+        # 지연 시간 = 제출 ~ 완료 (다른 클라이언트 요청이 이벤트 루프를 점유한 시간 포함)
+        submitted = time.perf_counter()
+        while jobs:
+            req, path = jobs.pop()
+            with repair_service.record_stage_timings() as timings:
+                response = await repair_service.process_repair_request(req, image_path=path)
+            done = time.perf_counter()
+            latencies.append(done - submitted)
+            submitted = done
+            for stage, t in timings.items():
+                stages[stage].append(t)
+            outcomes["new" if response.is_new else "duplicate"] += 1
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "reports": n_reports,
+        "throughput_rps": round(n_reports / wall, 2),
+        **outcomes,
+        "end_to_end_ms": _percentiles(latencies),
+        "stages_ms": {stage: _percentiles(values) for stage, values in stages.items()},
+    }
+
+def run(n_reports: int, levels: list, clip: str, gemini_latency_ms: float, n_existing: int, n_scan: int,
+        dup_ratio: float, seed: int = 0, hash_seed: bool = False) -> dict:
+    encoder, clip_name = load_clip(clip)
+    saved = (repair_service.genai, repair_service._clip_model, repair_service.REPAIR_VECTOR_DIR,
+             repair_service.REPAIR_IMAGE_DIR, derivatives.REPAIR_DERIVATIVE_DIR, list(repair_service.REPAIR_REPORTS))
+    StubGenerativeModel.latency = gemini_latency_ms / 1000.0
+    rows = []
+    try:
+        repair_service.genai = stub_genai
+        repair_service._clip_model = encoder
+        with tempfile.TemporaryDirectory() as work_dir:
+            repair_service.REPAIR_VECTOR_DIR = os.path.join(work_dir, "repair_vectors")
+            repair_service.REPAIR_IMAGE_DIR = os.path.join(work_dir, "repair_images")
+            derivatives.REPAIR_DERIVATIVE_DIR = os.path.join(work_dir, "repair_derivatives")
+            repair_service.ensure_repair_storage()
+            image_report = seed_reports(encoder, n_existing, ".", seed, hashes=hash_seed)
+            repair_service.rebuild_duplicate_index()
+            # 모델 warm-up (지연 로딩 / 첫 호출 비용 제외)
+            encoder.encode(Image.open(IMAGES[0]), convert_to_numpy=True)
+            for level_index, concurrency in enumerate(levels):
+                id_base = 1_000_000 * (level_index + 1)
+                rows.append(asyncio.run(_run_level(n_reports, concurrency, image_report, n_scan, dup_ratio,
+                                                   work_dir, id_base, seed + level_index)))
+            # 백그라운드 축소본 생성이 끝난 뒤 임시 디렉토리 삭제
+            derivatives.shutdown_derivatives()
+    finally:
+        (repair_service.genai, repair_service._clip_model, repair_service.REPAIR_VECTOR_DIR,
+         repair_service.REPAIR_IMAGE_DIR, derivatives.REPAIR_DERIVATIVE_DIR, reports) = saved
+        repair_service.REPAIR_REPORTS[:] = reports
+        repair_service.rebuild_duplicate_index()
+    return {"clip": clip_name, "gemini_latency_ms": gemini_latency_ms, "existing": n_existing,
+            "scan": n_scan, "dup_ratio": dup_ratio, "hash_seed": hash_seed, "results": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=100, help="reports per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--clip", choices=["auto", "model", "stub"], default="auto")
+    parser.add_argument("--gemini-latency", type=float, default=800.0, help="stub Gemini call latency (ms)")
+    parser.add_argument("--existing", type=int, default=2000, help="seeded reports in REPAIR_REPORTS")
+    parser.add_argument("--scan", type=int, default=200, help="existingReportIds per request")
+    parser.add_argument("--dup-ratio", type=float, default=0.3)
+    parser.add_argument("--hash-seed", action="store_true", help="seed image reports with content hashes")
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    out = run(args.reports, args.concurrency, args.clip, args.gemini_latency, args.existing, args.scan, args.dup_ratio,
+              hash_seed=args.hash_seed)
+
+    print(f"=== Repair pipeline benchmark (clip={out['clip']}, gemini stub {args.gemini_latency:g} ms, "
+          f"{args.existing} reports, scan {args.scan}, ms) ===")
+    print(f"{'conc':>5} {'rps':>8} {'new':>5} {'dup':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for r in out["results"]:
+        e = r["end_to_end_ms"]
+        print(f"{r['concurrency']:>5} {r['throughput_rps']:>8} {r['new']:>5} {r['duplicate']:>5} "
+              f"{e['p50']:>9} {e['p95']:>9} {e['p99']:>9}")
+    for r in out["results"]:
+        print(f"\n--- stages, concurrency {r['concurrency']} ---")
+        print(f"{'stage':>15} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for stage, p in r["stages_ms"].items():
+            print(f"{stage:>15} {p['n']:>5} {str(p['p50']):>9} {str(p['p95']):>9} {str(p['p99']):>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Two-stage ranking benchmark: exhaustive text scoring vs. tag/pref upper-bound pruning.
+
+Vectors are written to a temporary storage directory so vector loading is part of the cost,
+as in production. Every run checks that both rankings are identical.
+
+    python -m benchmarks.bench_two_stage --sizes 1000 10000 --dim 4096
+"""
+import argparse
+import json
+import tempfile
+import time
+import app.users.service as user_service
+import app.matching.service as matching_service
+from app.matching.models import MatchRequest, UserPreferences
+from .synthetic import synthetic_vectors, synthetic_profiles, write_vector_storage, SOLAR_DIM
+
+def _timed_match(request, two_stage: bool, repeat: int):
+    matching_service.MATCH_TWO_STAGE = two_stage
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = matching_service.calculate_hybrid_match(request)
+        best = min(best, time.perf_counter() - start)
+    return results, best
+
+def run(sizes: list, d: int, repeat: int, seed: int = 0) -> list:
+    rows = []
+    original_path = user_service.VECTOR_STORAGE_PATH
+    original_flag = matching_service.MATCH_TWO_STAGE
+    try:
+        for n in sizes:
+            with tempfile.TemporaryDirectory() as storage_dir:
+                user_service.VECTOR_STORAGE_PATH = storage_dir
+                candidates = synthetic_profiles(n, seed=seed)
+                write_vector_storage(storage_dir, [c.id for c in candidates], synthetic_vectors(n, d, seed=seed))
+                seeker = synthetic_profiles(1, seed=seed + 1, start_id=0)[0]
+                write_vector_storage(storage_dir, [0], synthetic_vectors(1, d, seed=seed + 1), "criteria")
+
+                request = MatchRequest(
+                    myProfile=seeker,
+                    preferences=UserPreferences(preferNonSmoker=True, preferQuietSleeper=True),
+                    candidates=candidates,
+                )
+                exhaustive, t_full = _timed_match(request, False, repeat)
+                two_stage, t_two = _timed_match(request, True, repeat)
+
+                rows.append({
+                    "n": n,
+                    "dim": d,
+                    "exhaustive_ms": round(1000 * t_full, 1),
+                    "two_stage_ms": round(1000 * t_two, 1),
+                    "speedup": round(t_full / t_two, 2),
+                    "identical": [r.model_dump() for r in exhaustive] == [r.model_dump() for r in two_stage],
+                })
+    finally:
+        user_service.VECTOR_STORAGE_PATH = original_path
+        matching_service.MATCH_TWO_STAGE = original_flag
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.dim, args.repeat)
+
+    print(f"=== Two-stage ranking benchmark (dim={args.dim}, best of {args.repeat}) ===")
+    print(f"{'n':>7} {'exhaustive ms':>14} {'two-stage ms':>13} {'speedup':>8} {'identical':>10}")
+    for r in rows:
+        print(f"{r['n']:>7} {r['exhaustive_ms']:>14} {r['two_stage_ms']:>13} {r['speedup']:>8} {str(r['identical']):>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Matching worker pool load benchmark: throughput (requests/s) and latency under concurrency.
+
+Runs the same match requests through MatchWorkerPool with the thread pool (workers=0) and with
+1..N worker processes sharing a memory-mapped vector snapshot. Throughput should scale with the
+number of physical cores available (the machine's core count is printed with the results).
+
+    python -m benchmarks.bench_workers --workers 0 1 2 4 --n 5000 --requests 64 --concurrency 16
+"""
+import os
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import numpy as np
+import app.users.service as user_service
+from app.matching.workers import MatchWorkerPool
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserPreferences
+from .synthetic import synthetic_vectors, synthetic_profiles, write_vector_storage, SOLAR_DIM
+
+async def _load(pool: MatchWorkerPool, requests: list, concurrency: int) -> list:
+    """동시 요청 수를 concurrency 로 유지하며 전체 요청 처리. Returns 요청별 latency (s)"""
+    latencies = []
+    queue = list(requests)
+
+    async def client():
+        while queue:
+            request = queue.pop()
+            start = time.perf_counter()
+            await pool.run(calculate_hybrid_match, request)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return latencies
+
+def run(worker_counts: list, n: int, d: int, n_requests: int, concurrency: int, seed: int = 0) -> list:
+    rows = []
+    original_path = user_service.VECTOR_STORAGE_PATH
+    try:
+        with tempfile.TemporaryDirectory() as storage_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+            user_service.VECTOR_STORAGE_PATH = storage_dir
+            candidates = synthetic_profiles(n, seed=seed)
+            write_vector_storage(storage_dir, [c.id for c in candidates], synthetic_vectors(n, d, seed=seed))
+            seekers = synthetic_profiles(n_requests, seed=seed + 1, start_id=n + 1)
+            write_vector_storage(storage_dir, [s.id for s in seekers], synthetic_vectors(n_requests, d, seed=seed + 1), "criteria")
+            requests = [
+                MatchRequest(myProfile=s, preferences=UserPreferences(preferNonSmoker=True), candidates=candidates)
+                for s in seekers
+            ]
+
+            for workers in worker_counts:
+                pool = MatchWorkerPool(workers, max_pending=concurrency, snapshot_dir=snapshot_dir if workers else None)
+                try:
+                    # 워커 기동 + 첫 요청 (import, 스냅샷 mmap) 은 측정에서 제외
+                    asyncio.run(_load(pool, requests[:max(1, workers)], max(1, workers)))
+                    start = time.perf_counter()
+                    latencies = asyncio.run(_load(pool, requests, concurrency))
+                    elapsed = time.perf_counter() - start
+                finally:
+                    pool.shutdown()
+
+                rows.append({
+                    "workers": workers,
+                    "n": n,
+                    "requests": n_requests,
+                    "concurrency": concurrency,
+                    "throughput_rps": round(n_requests / elapsed, 2),
+                    "p50_ms": round(1000 * float(np.percentile(latencies, 50)), 1),
+                    "p95_ms": round(1000 * float(np.percentile(latencies, 95)), 1),
+                })
+    finally:
+        user_service.VECTOR_STORAGE_PATH = original_path
+
+    base = rows[0]["throughput_rps"]
+    for r in rows:
+        r["speedup"] = round(r["throughput_rps"] / base, 2)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4], help="0 = thread pool")
+    parser.add_argument("--n", type=int, default=5000, help="candidates per request")
+    parser.add_argument("--dim", type=int, default=SOLAR_DIM)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--json", type=str, default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    rows = run(args.workers, args.n, args.dim, args.requests, args.concurrency)
+
+    print(f"=== Worker pool benchmark (n={args.n}, dim={args.dim}, concurrency={args.concurrency}, cpus={os.cpu_count()}) ===")
+    print(f"{'workers':>7} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in rows:
+        print(f"{r['workers']:>7} {r['throughput_rps']:>8} {r['speedup']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"cpus": os.cpu_count(), "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+
+# Upstage Solar large embedding dimension
+SOLAR_DIM = 4096
+CENTER_SEED = 12345
+
+def synthetic_vectors(n: int, d: int = SOLAR_DIM, n_clusters: int = 32, noise: float = 0.6,
+                      seed: int = 0, latent_dim: int = None) -> np.ndarray:
+    """
+    L2-normalized random vectors with cluster structure, so that top-K neighbours
+    are meaningful (pure gaussian noise makes every pair almost equidistant).
+    With `latent_dim`, vectors live near a random `latent_dim`-dimensional subspace,
+    closer to real text embeddings (low intrinsic dimension).
+    """
+    rng = np.random.default_rng(seed)
+    space = latent_dim or d
+    # 클러스터 중심은 seed와 무관하게 고정 -> 서로 다른 seed의 query/base가 같은 분포
+    centers = np.random.default_rng(CENTER_SEED).standard_normal((n_clusters, space)).astype('float32')
+    labels = rng.integers(0, n_clusters, size=n)
+    vecs = centers[labels] + noise * rng.standard_normal((n, space)).astype('float32')
+    if latent_dim:
+        basis = np.random.default_rng(CENTER_SEED + 1).standard_normal((latent_dim, d)).astype('float32')
+        vecs = vecs @ basis / np.sqrt(latent_dim)
+        vecs += 0.05 * rng.standard_normal((n, d)).astype('float32')
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype('float32')
+
+def topk_overlap(exact_ids: np.ndarray, approx_ids: np.ndarray, k: int) -> float:
+    """평균 top-k 겹침 비율 (recall@k). 입력: (n_queries, >=k) id 행렬"""
+    hits = 0
+    for e, a in zip(exact_ids[:, :k], approx_ids[:, :k]):
+        hits += len(set(e.tolist()) & set(a.tolist()))
+    return hits / (k * len(exact_ids))
+
+def rank_agreement(exact_ids: np.ndarray, approx_ids: np.ndarray, k: int) -> float:
+    """top-k 중 같은 순위에 같은 id가 있는 비율"""
+    return float(np.mean(exact_ids[:, :k] == approx_ids[:, :k]))
+
+CLEANING_CYCLES = ["DAILY", "EVERY_TWO_DAYS", "WEEKLY", "MONTHLY", "NEVER"]
+DRINKING_STYLES = ["RARELY", "SOMETIMES", "FREQUENTLY"]
+
+def synthetic_profiles(n: int, seed: int = 0, start_id: int = 1, gender: str = "MALE") -> list:
+    """Random UserProfile pool (ids start_id .. start_id+n-1, one gender so all are eligible)."""
+    from app.matching.models import UserProfile
+
+    rng = np.random.default_rng(seed)
+    birth = rng.integers(1996, 2007, size=n)
+    sleep = rng.integers(8, 15, size=n)
+    wake = rng.integers(5, 12, size=n)
+    clean = rng.integers(0, len(CLEANING_CYCLES), size=n)
+    drink = rng.integers(0, len(DRINKING_STYLES), size=n)
+    flags = rng.random((n, 3))
+    return [
+        UserProfile(
+            id=start_id + i, gender=gender, name=f"user{start_id + i}", birthYear=int(birth[i]),
+            smoker=bool(flags[i, 0] < 0.2), snoring=bool(flags[i, 1] < 0.3), bugKiller=bool(flags[i, 2] < 0.5),
+            sleepTime=int(sleep[i]), wakeTime=int(wake[i]),
+            cleaningCycle=CLEANING_CYCLES[clean[i]], drinkingStyle=DRINKING_STYLES[drink[i]],
+        )
+        for i in range(n)
+    ]
+
+def write_vector_storage(storage_dir: str, ids, vectors: np.ndarray, vector_type: str = "self"):
+    """Save normalized vectors as {id}_{vector_type}.npy in a current-format storage directory."""
+    import os
+    from app.core.vector_format import ensure_format_dir
+    ensure_format_dir(storage_dir)
+    for uid, vec in zip(ids, vectors):
+        np.save(os.path.join(storage_dir, f"{uid}_{vector_type}.npy"), vec)
@@ -0,0 +1,25 @@
+import argparse
+from app.matching.ann_index import build_from_storage, save_ann_index, ANN_BACKENDS, ANN_INDEX_DIR
+
+def main():
+    parser = argparse.ArgumentParser(description="캠퍼스 전체 ANN 인덱스 생성 도구")
+    parser.add_argument("--backend", choices=ANN_BACKENDS, default="hnsw")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW 이웃 수")
+    parser.add_argument("--nlist", type=int, default=256, help="IVF 셀 수")
+    parser.add_argument("--pq-m", type=int, default=64, help="PQ sub-quantizer 수 (벡터 차원의 약수)")
+    parser.add_argument("--opq", action="store_true", help="IVF-PQ 앞에 OPQ 회전 적용")
+    args = parser.parse_args()
+
+    print("=== ANN 인덱스 생성 도구 ===")
+    print(f"storage/vectors 의 self 벡터로 {args.backend} 인덱스 생성 중...")
+
+    ann = build_from_storage(args.backend, hnsw_m=args.hnsw_m, nlist=args.nlist, pq_m=args.pq_m, opq=args.opq)
+    save_ann_index(ann)
+
+    print(f"- factory: {ann.meta['factory']}")
+    print(f"- 벡터 수: {ann.meta['count']} (dim={ann.meta['dim']}, 투영={ann.meta['projection']})")
+    print(f"- 학습/추가 시간: {ann.meta['build_seconds']}s")
+    print(f"\n✅ 저장 완료: {ANN_INDEX_DIR} (MATCH_ANN_BACKEND={args.backend} 로 서버 실행)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import json
+import argparse
+import numpy as np
+from app.core.vector_format import l2_normalize
+from app.repair.service import load_repair_vectors, REPAIR_VECTOR_DIR
+from app.repair.thresholds import (calibrate, pair_similarities, similarity_histogram, background_floor,
+                                   HISTOGRAM_BINS, ANY_LOCATION, DUPLICATE_THRESHOLDS_PATH)
+
+# verify_duplicates_real.py 시나리오: test1~3 = 같은 고장, test4 = 다른 고장 (모두 1층 101호)
+SCENARIO_IMAGES = ["test1.jpg", "test2.jpg", "test3.jpg", "test4.jpg"]
+SCENARIO_GROUPS = [0, 0, 0, 1]
+SCENARIO_LOCATION = "1/101"
+
+def scenario_pairs() -> list:
+    pairs = []
+    for i in range(len(SCENARIO_IMAGES)):
+        for j in range(i + 1, len(SCENARIO_IMAGES)):
+            pairs.append({"a": SCENARIO_IMAGES[i], "b": SCENARIO_IMAGES[j],
+                          "duplicate": SCENARIO_GROUPS[i] == SCENARIO_GROUPS[j], "location": SCENARIO_LOCATION})
+    return pairs
+
+class EmbeddingLookup:
+    """쌍의 a / b -> 임베딩. 정수 = 저장된 신고 id, 문자열 = 이미지 경로 (옆에 같은 이름의 .npy 가 있으면 사용, 없으면 CLIP)"""
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray):
+        self.rows = {int(report_id): row for row, report_id in enumerate(ids)}
+        self.matrix = matrix
+        self.images = {}
+
+    def __call__(self, ref: str) -> np.ndarray:
+        if ref.isdigit():
+            if int(ref) not in self.rows:
+                raise KeyError(f"Report {ref} has no stored vector")
+            return self.matrix[self.rows[int(ref)]]
+        if ref not in self.images:
+            npy = os.path.splitext(ref)[0] + ".npy"
+            if os.path.exists(npy):
+                vec = np.load(npy)
+            else:
+                from PIL import Image
+                from app.repair.service import get_clip_model
+                vec = get_clip_model().encode(Image.open(ref), convert_to_numpy=True)
+            self.images[ref] = l2_normalize(vec).reshape(-1)
+        return self.images[ref]
+
+def _summary(values) -> str:
+    if len(values) == 0:
+        return "-"
+    return f"n={len(values)} min={np.min(values):.3f} median={np.median(values):.3f} max={np.max(values):.3f}"
+
+def _histogram_quantile(histogram: np.ndarray, q: float) -> float:
+    cumulative = np.cumsum(histogram)
+    return float(HISTOGRAM_BINS[1:][np.searchsorted(cumulative, q * cumulative[-1])])
+
+def main():
+    parser = argparse.ArgumentParser(description="중복 판정 기준 오프라인 보정 도구")
+    parser.add_argument("--pairs", help='라벨 쌍 JSON: [{"a": 12, "b": "photo.jpg", "duplicate": true, "location": "3/301"}]')
+    parser.add_argument("--no-scenario", action="store_true", help="test1~4.jpg 기본 시나리오 쌍 제외")
+    parser.add_argument("--vectors", default=REPAIR_VECTOR_DIR, help="신고 임베딩 디렉토리 (배경 분포 + id 조회)")
+    parser.add_argument("--locations", help='report id -> 위치 JSON: {"12": "3/301", "13": "3/public"}')
+    parser.add_argument("--fp-cost", type=float, default=3.0, help="잘못 중복 처리 1건 비용 (사용자 재신고)")
+    parser.add_argument("--fn-cost", type=float, default=1.0, help="놓친 중복 1건 비용 (Gemini 호출)")
+    parser.add_argument("--max-background-rate", type=float, default=0.001,
+                        help="저장된 신고 쌍 중 기준 이상 허용 비율")
+    parser.add_argument("--min-pairs", type=int, default=20, help="위치별 기준을 따로 둘 최소 쌍 수 (중복 / 아님 각각)")
+    parser.add_argument("--batch-size", type=int, default=1024, help="배경 분포 계산 시 행렬 곱 행 수")
+    parser.add_argument("--output", default=DUPLICATE_THRESHOLDS_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 결과만 출력")
+    args = parser.parse_args()
+
+    print("=== 중복 기준 보정 도구 ===")
+    ids, matrix = load_repair_vectors(args.vectors)
+    locations = {}
+    if args.locations:
+        with open(args.locations, "r", encoding="utf-8") as f:
+            locations = {int(k): v for k, v in json.load(f).items()}
+
+    pairs = [] if args.no_scenario else scenario_pairs()
+    if args.pairs:
+        with open(args.pairs, "r", encoding="utf-8") as f:
+            pairs += json.load(f)
+    if not pairs:
+        parser.error("라벨 쌍이 없습니다 (--pairs 지정 또는 시나리오 사용)")
+
+    # 1. 라벨 쌍 유사도 (참조된 임베딩을 한 행렬로 모아 행 단위 내적 한 번)
+    lookup = EmbeddingLookup(ids, matrix)
+    refs = sorted({str(p[side]) for p in pairs for side in ("a", "b")})
+    rows = {ref: row for row, ref in enumerate(refs)}
+    pair_matrix = np.stack([lookup(ref) for ref in refs])
+    sims = pair_similarities(pair_matrix, np.array([rows[str(p["a"])] for p in pairs]),
+                             np.array([rows[str(p["b"])] for p in pairs]))
+    positive, negative = {}, {}
+    for pair, sim in zip(pairs, sims):
+        report_id = int(pair["a"]) if str(pair["a"]).isdigit() else None
+        location = pair.get("location") or locations.get(report_id, ANY_LOCATION)
+        (positive if pair["duplicate"] else negative).setdefault(location, []).append(float(sim))
+    print(f"- 중복 쌍:      {_summary([s for v in positive.values() for s in v])}")
+    print(f"- 중복 아닌 쌍: {_summary([s for v in negative.values() for s in v])}")
+
+    # 2. 저장된 신고 전체의 쌍 유사도 분포 (batch 행렬 곱, 위치 정보가 있으면 같은 위치 쌍만)
+    backgrounds = {}
+    if len(ids) > 1:
+        groups = np.array([locations.get(int(i), ANY_LOCATION) for i in ids])
+        backgrounds = similarity_histogram(matrix, groups if locations else None, args.batch_size)
+        if not locations:
+            backgrounds = {ANY_LOCATION: backgrounds[0]}
+        total = sum(backgrounds.values())
+        print(f"- 저장된 신고 {len(ids)}건, 쌍 {int(total.sum())}개: p99={_histogram_quantile(total, 0.99):.3f} "
+              f"p99.9={_histogram_quantile(total, 0.999):.3f} "
+              f"(허용 비율 {args.max_background_rate} 하한 {background_floor(total, args.max_background_rate):.3f})")
+    else:
+        print(f"- {args.vectors} 의 신고가 2건 미만이라 배경 분포 하한 없이 보정")
+
+    # 3. 기준 선택
+    config = calibrate(positive, negative, backgrounds, args.fp_cost, args.fn_cost,
+                       args.max_background_rate, args.min_pairs)
+    print(f"\n기본 기준: {config['default']:.4f} (기존 0.80)")
+    for area, threshold in config["area"].items():
+        print(f"- area {area}: {threshold:.4f}")
+    for location, threshold in config["locations"].items():
+        print(f"- {location}: {threshold:.4f}")
+    for group, info in config["calibration"]["groups"].items():
+        print(f"  [{group}] {info}")
+
+    if args.dry_run:
+        return
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ 저장 완료: {args.output} (서버 재시작 또는 POST /api/repair/thresholds/reload)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from app.matching.models import UserProfile
+from benchmarks.synthetic import CLEANING_CYCLES, DRINKING_STYLES
+
+# ==========================================
+# 🧪 테스트 공용 헬퍼
+# ==========================================
+# 테스트 파일이 루트에 있으므로 conftest 도 루트에 둠.
+# `from conftest import make_profile` 로 가져와서 `python test_xxx.py` 직접 실행에서도 동작.
+
+def one_hot(i, dim=8):
+    vec = [0.0] * dim
+    vec[i % dim] = 1.0
+    return vec
+
+def make_profile(uid, rng=None, gender="MALE", embedding_dim=None, **fields) -> UserProfile:
+    """
+    테스트용 UserProfile.
+    - rng (np.random.Generator) 없음: 고정 생활 습관 / rng 있음: 무작위 생활 습관
+    - embedding_dim: self / criteria 인라인 one-hot 임베딩 포함 (rng 필요)
+    - fields: 나머지 필드 덮어쓰기 (selfIntroductionEmbedding 등)
+    """
+    if rng is None:
+        habits = dict(
+            birthYear=2002, smoker=False, snoring=False, bugKiller=False, sleepTime=11, wakeTime=7,
+            cleaningCycle="DAILY", drinkingStyle="RARELY",
+        )
+    else:
+        habits = dict(
+            birthYear=int(rng.integers(1985, 2007)), smoker=bool(rng.random() < 0.2), snoring=bool(rng.random() < 0.3),
+            bugKiller=bool(rng.random() < 0.5), sleepTime=int(rng.integers(8, 15)), wakeTime=int(rng.integers(5, 12)),
+            cleaningCycle=CLEANING_CYCLES[int(rng.integers(0, 5))], drinkingStyle=DRINKING_STYLES[int(rng.integers(0, 3))],
+        )
+        if embedding_dim:
+            habits["selfIntroductionEmbedding"] = one_hot(int(rng.integers(0, embedding_dim)), embedding_dim)
+            habits["roommateCriteriaEmbedding"] = one_hot(int(rng.integers(0, embedding_dim)), embedding_dim)
+    return UserProfile(id=uid, gender=gender, name=f"user{uid}", **{**habits, **fields})
@@ -0,0 +1,35 @@
+import os
+import argparse
+from app.core.vector_format import migrate_storage, get_format_version, VECTOR_FORMAT_VERSION, STORAGE_DTYPES
+from app.users.service import VECTOR_STORAGE_PATH
+from app.repair.service import REPAIR_VECTOR_DIR
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 저장소 마이그레이션")
+    parser.add_argument("--dtype", choices=STORAGE_DTYPES, default=None,
+                        help="유저 벡터(storage/vectors)를 이 dtype으로 재인코딩 (float16/int8 = 압축 저장)")
+    args = parser.parse_args()
+
+    print("=== 벡터 저장소 마이그레이션 도구 ===")
+    print(f"대상 포맷 버전: v{VECTOR_FORMAT_VERSION} (L2 정규화)\n")
+
+    for storage_dir in [VECTOR_STORAGE_PATH, REPAIR_VECTOR_DIR]:
+        if not os.path.isdir(storage_dir):
+            print(f"- {storage_dir}: 디렉토리 없음 (건너뜀)")
+            continue
+
+        before = get_format_version(storage_dir)
+        # 압축 저장은 유저 벡터에만 적용 (CLIP 벡터는 512차원으로 작음)
+        dtype = args.dtype if storage_dir == VECTOR_STORAGE_PATH else None
+        count = migrate_storage(storage_dir, dtype=dtype)
+        after = get_format_version(storage_dir)
+
+        if count == 0 and before == after:
+            print(f"- {storage_dir}: 이미 v{after} (변경 없음)")
+        else:
+            print(f"- {storage_dir}: v{before} → v{after}, {count}개 파일 재작성")
+
+    print("\n✅ 마이그레이션 완료!")
+
+if __name__ == "__main__":
+    main()
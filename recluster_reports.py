@@ -0,0 +1,48 @@
+import json
+import argparse
+from app.repair.service import load_repair_vectors, REPAIR_VECTOR_DIR
+from app.repair.clustering import ClusterSet, REPAIR_CLUSTER_THRESHOLD, REPAIR_RECLUSTER_ITERATIONS
+from app.repair.thresholds import get_duplicate_thresholds
+
+def main():
+    parser = argparse.ArgumentParser(description="고장 신고 이력 중복 클러스터링 도구")
+    parser.add_argument("--vectors", default=REPAIR_VECTOR_DIR, help="신고 임베딩 디렉토리")
+    parser.add_argument("--threshold", type=float, default=REPAIR_CLUSTER_THRESHOLD, help="클러스터 기준 유사도")
+    parser.add_argument("--iterations", type=int, default=REPAIR_RECLUSTER_ITERATIONS)
+    parser.add_argument("--duplicate-threshold", type=float, default=get_duplicate_thresholds().default,
+                        help="절감률 추정용 중복 판정 유사도 (기본: 보정된 default)")
+    parser.add_argument("--output", help="report id -> cluster 번호 JSON 저장 경로")
+    args = parser.parse_args()
+
+    print("=== 중복 클러스터링 도구 ===")
+    ids, matrix = load_repair_vectors(args.vectors)
+    if len(ids) == 0:
+        print(f"{args.vectors} 에 신고 임베딩이 없습니다.")
+        return
+    print(f"{args.vectors} 의 신고 {len(ids)}건 클러스터링 중 (위치 정보 없이 전체를 한 묶음으로)...")
+
+    clusters = ClusterSet(args.threshold)
+    clusters.rebuild(ids, matrix, args.iterations)
+    sizes = sorted((len(c.members) for c in clusters.clusters.values()), reverse=True)
+    print(f"- 클러스터 수: {len(sizes)} (최대 {sizes[0]}건, 단독 {sizes.count(1)}개)")
+    print(f"- 상위 클러스터 크기: {sizes[:10]}")
+
+    # 각 신고를 새 신고로 가정했을 때 비교 수 (중심 + 후보 클러스터 멤버) vs 전체 비교
+    compared = 0
+    for vec in matrix:
+        members, centroids = clusters.candidates(vec, args.duplicate_threshold)
+        compared += centroids + len(members)
+    average = compared / len(ids)
+    print(f"- 신고당 비교 수: {average:.1f} (전체 비교 {len(ids)}, 절감 {1 - average / len(ids):.1%})")
+
+    if args.output:
+        # 클러스터 번호: 큰 클러스터부터 0, 1, ...
+        by_size = sorted(clusters.clusters.values(), key=lambda c: -len(c.members))
+        cluster_numbers = {c.id: n for n, c in enumerate(by_size)}
+        assignment = {int(report_id): cluster_numbers[cid] for report_id, cid in clusters.assignment.items()}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(assignment.items())), f, indent=2)
+        print(f"\n✅ 저장 완료: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import time
+import numpy as np
+import app.users.service as user_service
+import app.matching.service as matching_service
+import app.matching.ann_index as ann_module
+from types import SimpleNamespace
+from app.matching.ann_index import build_ann_index, save_ann_index, load_ann_index, build_from_storage
+from conftest import make_profile
+
+def _unit_rows(n, d, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, d)).astype('float32')
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def test_hnsw_save_load_roundtrip(tmp_path):
+    base = _unit_rows(300, 32)
+    ids = np.arange(1000, 1300, dtype='int64')
+
+    ann = build_ann_index(base, ids, "hnsw")
+    save_ann_index(ann, str(tmp_path))
+    loaded = load_ann_index(str(tmp_path))
+
+    hits = loaded.search(base[5:6], 10)
+    assert 1005 in hits
+    assert len(hits) == 10
+    assert loaded.meta["count"] == 300
+
+def test_ann_prefilter_keeps_unindexed(monkeypatch):
+    base = _unit_rows(100, 32)
+    ann = build_ann_index(base, np.arange(100, dtype='int64'), "hnsw")
+    monkeypatch.setattr(matching_service, "get_ann_index", lambda: ann)
+    monkeypatch.setattr(matching_service, "MATCH_ANN_TOP_M", 5)
+
+    candidates = [make_profile(i) for i in range(100)]
+    candidates.append(make_profile(500))                            # 인덱스에 없는 신규 유저
+    candidates.append(make_profile(7, selfIntroductionEmbedding=[0.1] * 32))        # 요청에 임베딩 직접 포함
+
+    kept = matching_service.ann_prefilter(base[3:4], candidates)
+    kept_ids = [c.id for c in kept]
+
+    assert 3 in kept_ids
+    assert 500 in kept_ids
+    assert len([c for c in kept if c.id < 100 and not c.selfIntroductionEmbedding]) == 5
+
+def test_ann_prefilter_keeps_resaved(tmp_path, monkeypatch):
+    base = _unit_rows(100, 32)
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", str(tmp_path / "vectors"))
+    for uid in range(100):
+        user_service.store_user_vectors(uid, self_emb=base[uid])
+    ann = build_from_storage("hnsw")
+    monkeypatch.setattr(matching_service, "get_ann_index", lambda: ann)
+    monkeypatch.setattr(matching_service, "MATCH_ANN_TOP_M", 5)
+
+    # 인덱스 생성 이후 seeker 와 가장 먼 사용자가 자기소개를 다시 저장 -> 인덱스에는 이전 벡터가 남아 있음
+    far = int(np.argmin(base @ base[3]))
+    time.sleep(0.05)
+    user_service.store_user_vectors(far, self_emb=base[3])
+
+    kept_ids = [c.id for c in matching_service.ann_prefilter(base[3:4], [make_profile(i) for i in range(100)])]
+    assert far in kept_ids
+    assert len(kept_ids) == 6
+
+def test_ann_index_rejected_after_projection_change(monkeypatch):
+    ann = build_ann_index(_unit_rows(50, 8), np.arange(50, dtype='int64'), "hnsw")
+    ann.meta["projection"] = "pca_8_old"
+    monkeypatch.setattr(ann_module, "MATCH_ANN_BACKEND", "hnsw")
+    monkeypatch.setattr(ann_module, "load_ann_index", lambda: ann)
+    monkeypatch.setattr(ann_module, "_loaded_index", None)
+
+    # 같은 차원으로 PCA 재학습 -> 벡터 공간이 달라 인덱스 사용 안 함
+    for active, expected in (("pca_8_new", None), ("pca_8_old", ann)):
+        monkeypatch.setattr("app.core.projection.get_active_projection", lambda _: SimpleNamespace(name=active))
+        monkeypatch.setattr(ann_module, "_index_loaded", False)
+        assert ann_module.get_ann_index() is expected
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,99 @@
+import random
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.matching.assignment import PairScorer, solve_exact, solve_greedy, assign_rooms
+from app.matching.models import AssignmentRequest, UserProfile, UserPreferences
+
+client = TestClient(app)
+
+def _one_hot(i, dim=8):
+    vec = [0.0] * dim
+    vec[i % dim] = 1.0
+    return vec
+
+def _applicants(n, seed=0, genders=("MALE", "FEMALE")):
+    rng = random.Random(seed)
+    applicants = []
+    for uid in range(1, n + 1):
+        profile = UserProfile(
+            id=uid, gender=rng.choice(genders), name=f"user{uid}",
+            birthYear=rng.randint(1998, 2005), smoker=rng.random() < 0.2, snoring=rng.random() < 0.3,
+            bugKiller=rng.random() < 0.5, sleepTime=rng.randint(8, 14), wakeTime=rng.randint(5, 11),
+            cleaningCycle=rng.choice(["DAILY", "WEEKLY", "NEVER"]), drinkingStyle=rng.choice(["RARELY", "FREQUENTLY"]),
+            selfIntroductionEmbedding=_one_hot(rng.randint(0, 7)),
+            roommateCriteriaEmbedding=_one_hot(rng.randint(0, 7)),
+        )
+        prefs = UserPreferences(preferNonSmoker=rng.random() < 0.5, preferQuietSleeper=rng.random() < 0.5)
+        applicants.append({"profile": profile, "preferences": prefs})
+    return AssignmentRequest(applicants=applicants).applicants
+
+def _brute_force_best(weights, members):
+    """모든 완전 매칭을 나열해 최대 총점 계산 (작은 N 전용)"""
+    if len(members) < 2:
+        return 0.0
+    first, rest = members[0], members[1:]
+    return max(weights[first, m] + _brute_force_best(weights, [r for r in rest if r != m]) for m in rest)
+
+def _total(scorer, pairs):
+    a, b = np.array(pairs).T
+    return float(scorer.pairs(a, b).sum())
+
+def test_pair_score_is_symmetric():
+    scorer = PairScorer(_applicants(30, seed=1, genders=("MALE",)))
+    members = np.arange(scorer.n)
+    block = scorer.block(members, members)
+
+    assert np.allclose(block, block.T)
+    assert np.all(np.isneginf(np.diag(block)))
+    i, j = np.triu_indices(scorer.n, k=1)
+    assert np.allclose(block[i, j], scorer.pairs(i, j))
+
+def test_exact_matches_brute_force():
+    scorer = PairScorer(_applicants(8, seed=2, genders=("MALE",)))
+    members = np.arange(scorer.n)
+    weights = scorer.block(members, members)
+
+    pairs = solve_exact(scorer, members)
+    assert len(pairs) == 4
+    assert abs(_total(scorer, pairs) - _brute_force_best(weights, list(members))) < 1e-6
+
+def test_greedy_close_to_exact():
+    scorer = PairScorer(_applicants(80, seed=3, genders=("FEMALE",)))
+    members = np.arange(scorer.n)
+
+    exact = _total(scorer, solve_exact(scorer, members))
+    pairs = solve_greedy(scorer, members, k=5)
+    greedy = _total(scorer, pairs)
+
+    # 전원 배정, 한 사람은 한 방에만
+    assert sorted(m for pair in pairs for m in pair) == list(range(80))
+    assert greedy / exact > 0.97
+
+def test_assign_rooms_by_gender():
+    applicants = _applicants(41, seed=4)
+    for method in ("exact", "greedy"):
+        result = assign_rooms(AssignmentRequest(applicants=applicants, method=method))
+        gender = {a.profile.id: a.profile.gender for a in applicants}
+
+        placed = [m for room in result.rooms for m in room.members] + result.unassigned
+        assert sorted(placed) == list(range(1, 42))
+        # 성별 그룹 중 하나는 홀수 -> 정확히 한 명 미배정
+        assert len(result.unassigned) == 1
+        assert all(gender[a] == gender[b] for a, b in (room.members for room in result.rooms))
+        assert [r.roomNo for r in result.rooms] == list(range(1, len(result.rooms) + 1))
+
+def test_assign_endpoint():
+    request = AssignmentRequest(applicants=_applicants(10, seed=5))
+    response = client.post("/api/matching/assign", json=request.model_dump(mode="json"))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["rooms"]) * 2 + len(body["unassigned"]) == 10
+
+if __name__ == "__main__":
+    test_pair_score_is_symmetric()
+    test_exact_matches_brute_force()
+    test_greedy_close_to_exact()
+    test_assign_rooms_by_gender()
+    test_assign_endpoint()
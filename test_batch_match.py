@@ -0,0 +1,52 @@
+import json
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.matching.batch import iter_batch_matches
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import BatchMatchRequest, MatchRequest, UserPreferences
+from conftest import make_profile
+
+client = TestClient(app)
+
+def _random_profile(uid, rng):
+    return make_profile(uid, rng, gender=str(rng.choice(["MALE", "FEMALE"])), embedding_dim=8)
+
+def _random_batch(n_seekers=7, n_candidates=120, seed=0):
+    rng = np.random.default_rng(seed)
+    candidates = [_random_profile(i, rng) for i in range(1, n_candidates + 1)]
+    seekers = []
+    for s in range(n_seekers):
+        prefs = UserPreferences(preferNonSmoker=bool(rng.random() < 0.5), preferGoodAtBugs=bool(rng.random() < 0.5))
+        # seeker 일부는 후보자 풀에도 포함 (자기 자신 제외 확인)
+        profile = candidates[s] if s % 2 == 0 else _random_profile(1000 + s, rng)
+        seekers.append({"profile": profile, "preferences": prefs})
+    return BatchMatchRequest(seekers=seekers, candidates=candidates, topK=20)
+
+def test_batch_matches_single_requests():
+    request = _random_batch()
+
+    batch = list(iter_batch_matches(request, block_size=3))
+    assert [b["seekerId"] for b in batch] == [s.profile.id for s in request.seekers]
+
+    for seeker, result in zip(request.seekers, batch):
+        single = calculate_hybrid_match(MatchRequest(
+            myProfile=seeker.profile, preferences=seeker.preferences, candidates=request.candidates,
+        ))
+        assert result["matches"] == [r.model_dump() for r in single]
+        assert all(m["userId"] != seeker.profile.id for m in result["matches"])
+
+def test_batch_endpoint_streams_jsonl():
+    request = _random_batch(n_seekers=4, n_candidates=30, seed=1)
+    response = client.post("/api/matching/batch", json=request.model_dump(mode="json"))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 4
+    assert all(len(line["matches"]) <= 20 for line in lines)
+
+if __name__ == "__main__":
+    test_batch_matches_single_requests()
+    test_batch_endpoint_streams_jsonl()
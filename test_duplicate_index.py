@@ -0,0 +1,148 @@
+import asyncio
+import numpy as np
+import app.repair.service as repair_service
+from app.repair.duplicate_index import DuplicateIndex, partition_key
+from app.repair.clustering import recluster
+
+def _unit(i, dim=8):
+    vec = np.zeros(dim, dtype='float32')
+    vec[i] = 1.0
+    return vec
+
+def _report(report_id, floor, room, emb):
+    return {"id": report_id, "floor": floor, "room_number": room, "description": f"report {report_id}",
+            "image_url": None, "embedding": emb}
+
+def _clustered(n, centers, dim=32, noise=0.15, seed=0):
+    """centers 개의 고장 유형 주변에 흩어진 신고 임베딩 (정규화)"""
+    rng = np.random.default_rng(seed)
+    base = rng.standard_normal((centers, dim))
+    vecs = base[rng.integers(0, centers, n)] + noise * rng.standard_normal((n, dim))
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype('float32')
+
+def test_search_touches_only_location_partition():
+    index = DuplicateIndex(clustering=False)
+    index.add(_report(1, "3", "301", _unit(0)))
+    index.add(_report(2, "3", "302", _unit(0)))   # 같은 이미지, 다른 호실
+    index.add(_report(3, "3", None, _unit(0)))    # 같은 층 공용
+    index.add(_report(4, "3", "301", _unit(1)))
+
+    matches, compared = index.search(_unit(0), "3", "301", 0.8)
+    assert [report["id"] for report, _ in matches] == [1]
+    assert compared == 2
+    matches, _ = index.search(_unit(0), "3", None, 0.8)
+    assert [report["id"] for report, _ in matches] == [3]
+    # 요청에 포함된 id 만 비교
+    matches, compared = index.search(_unit(0), "3", "301", 0.8, report_ids=[4])
+    assert matches == [] and compared == 1
+    assert index.stats() == {"partitions": 3, "reports": 4, "largest_partition": 2}
+    assert partition_key(3, " 301 ") == ("3", "301")
+
+def test_mismatched_dimension_is_rejected():
+    index = DuplicateIndex(clustering=False)
+    index.add(_report(1, "3", "301", _unit(0)))
+    index.add(_report(2, "3", "301", _unit(1)))
+
+    # 다른 차원의 임베딩은 등록하지 않고 기존 신고는 유지
+    assert not index.add(_report(3, "3", "301", _unit(0, dim=16)))
+    assert len(index) == 2
+    matches, _ = index.search(_unit(0), "3", "301", 0.8)
+    assert [report["id"] for report, _ in matches] == [1]
+    assert index.remove(2)
+    assert not index.remove(3)
+
+def test_remove_and_growth_keep_rows_consistent():
+    index = DuplicateIndex()
+    rng = np.random.default_rng(0)
+    vecs = rng.standard_normal((100, 8)).astype('float32')
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    for i, vec in enumerate(vecs):
+        index.add(_report(i, "2", None, vec))
+    for i in range(0, 100, 3):
+        assert index.remove(i)
+    assert not index.remove(0)
+    assert len(index) == 66
+    for i in range(1, 100, 3):
+        matches, _ = index.search(vecs[i], "2", None, 0.999)
+        assert [report["id"] for report, _ in matches] == [i]
+
+def test_clustered_search_matches_full_scan():
+    vecs = _clustered(400, 12)
+    clustered, flat = DuplicateIndex(), DuplicateIndex(clustering=False)
+    for i, vec in enumerate(vecs):
+        clustered.add(_report(i, "1", None, vec))
+        flat.add(_report(i, "1", None, vec))
+    queries = _clustered(50, 12, seed=1)
+    compared_total = 0
+    for query in queries:
+        for threshold in (0.8, 0.95):
+            matches, compared = clustered.search(query, "1", None, threshold)
+            expected, full_scan = flat.search(query, "1", None, threshold)
+            assert [r["id"] for r, _ in matches] == [r["id"] for r, _ in expected]
+            compared_total += compared
+    assert compared_total < 0.5 * full_scan * len(queries) * 2
+    stats = clustered.stats()
+    assert stats["reports"] == 400 and 0 < stats["clusters"] < 100
+    assert stats["comparison_savings"] > 0.5
+
+def test_clusters_follow_removals_and_recluster():
+    index = DuplicateIndex()
+    index.add(_report(1, "2", "201", _unit(0)))
+    index.add(_report(2, "2", "201", _unit(0)))
+    index.add(_report(3, "2", "201", _unit(1)))
+    assert index.cluster_count() == 2
+    assert index.remove(3) and index.cluster_count() == 1
+    # 같은 id 재등록 (다른 이미지) -> 기존 클러스터에서 빠지고 새 클러스터
+    index.add(_report(2, "2", "201", _unit(2)))
+    assert index.cluster_count() == 2
+    matches, _ = index.search(_unit(2), "2", "201", 0.8)
+    assert [report["id"] for report, _ in matches] == [2]
+    assert index.recluster()["clusters"] == 2
+
+def test_batch_recluster_groups_history():
+    vecs = _clustered(300, 6, noise=0.05)
+    groups = recluster(np.arange(300), vecs, threshold=0.8)
+    assert sorted(i for group in groups for i in group) == list(range(300))
+    # 같은 그룹의 신고는 서로 유사
+    for group in groups:
+        sims = vecs[group] @ vecs[group].T
+        assert sims.min() > 0.6
+    assert len(groups) == 6
+    assert recluster([], np.zeros((0, 8))) == []
+
+def test_expired_reports_are_evicted():
+    index = DuplicateIndex(max_age_days=1, clustering=False)
+    index.add(_report(1, "5", "501", _unit(0)), added_at=0.0)  # 오래된 신고
+    index.add(_report(2, "5", "501", _unit(0)))
+    index.add(_report(3, "6", "601", _unit(0)), added_at=0.0)
+    matches, compared = index.search(_unit(0), "5", "501", 0.8)
+    assert [report["id"] for report, _ in matches] == [2] and compared == 1
+    assert index.evict_expired() == 1
+    assert len(index) == 1
+
+def test_check_duplicates_uses_index():
+    saved = list(repair_service.REPAIR_REPORTS)
+    try:
+        repair_service.REPAIR_REPORTS[:] = [_report(10, "3", "301", _unit(0)), _report(11, "4", "401", _unit(0))]
+        repair_service.rebuild_duplicate_index()
+        duplicates = asyncio.run(repair_service.check_duplicates(_unit(0), [10, 11], "3", "301"))
+        assert [(d.reportId, d.location) for d in duplicates] == [(10, "3층 301호")]
+        # None = 같은 위치 전체, [] = 비교 대상 없음
+        assert [d.reportId for d in asyncio.run(repair_service.check_duplicates(_unit(0), None, "3", "301"))] == [10]
+        assert asyncio.run(repair_service.check_duplicates(_unit(0), [], "3", "301")) == []
+        assert repair_service.resolve_report(10)
+        assert asyncio.run(repair_service.check_duplicates(_unit(0), None, "3", "301")) == []
+    finally:
+        repair_service.REPAIR_REPORTS[:] = saved
+        repair_service.rebuild_duplicate_index()
+
+if __name__ == "__main__":
+    test_search_touches_only_location_partition()
+    test_mismatched_dimension_is_rejected()
+    test_remove_and_growth_keep_rows_consistent()
+    test_clustered_search_matches_full_scan()
+    test_clusters_follow_removals_and_recluster()
+    test_batch_recluster_groups_history()
+    test_expired_reports_are_evicted()
+    test_check_duplicates_uses_index()
+    print("All duplicate index tests passed!")
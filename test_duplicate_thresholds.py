@@ -0,0 +1,104 @@
+import json
+import asyncio
+import numpy as np
+import pytest
+import app.repair.service as repair_service
+import app.repair.thresholds as thresholds
+from app.repair.thresholds import (DuplicateThresholds, choose_threshold, calibrate, similarity_histogram,
+                                   background_floor, HISTOGRAM_BINS, ANY_LOCATION)
+
+def _unit(dim, angle_sim):
+    """e0 와 코사인 유사도가 angle_sim 인 단위 벡터"""
+    vec = np.zeros(dim, dtype='float32')
+    vec[0], vec[1] = angle_sim, np.sqrt(1 - angle_sim ** 2)
+    return vec
+
+def test_lookup_order():
+    config = DuplicateThresholds({"default": 0.8, "area": {"public": 0.85}, "locations": {"3/301": 0.75}})
+    assert config.for_location("3", "301") == 0.75
+    assert config.for_location(3, " 301 ") == 0.75
+    assert config.for_location("3", "302") == 0.8
+    assert config.for_location("3", None) == 0.85
+    assert DuplicateThresholds().for_location("1", None) == 0.80
+    with pytest.raises(ValueError):
+        DuplicateThresholds({"default": 1.5})
+    with pytest.raises(ValueError):
+        DuplicateThresholds({"area": {"lobby": 0.8}})
+
+def test_scenario_threshold_separates_test_images():
+    # verify_duplicates_real.py: test1~3 같은 고장, test4 다른 고장
+    vecs = np.stack([np.load(f"test{i}.npy") for i in range(1, 5)])
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    sims = vecs @ vecs.T
+    positive = [sims[0, 1], sims[0, 2], sims[1, 2]]
+    negative = [sims[0, 3], sims[1, 3], sims[2, 3]]
+    threshold, info = choose_threshold(positive, negative)
+    assert max(negative) < threshold <= min(positive)
+    assert info["false_positives"] == info["false_negatives"] == 0
+
+def test_costs_move_threshold():
+    rng = np.random.default_rng(0)
+    positive = rng.normal(0.85, 0.05, 500)
+    negative = rng.normal(0.70, 0.05, 500)
+    balanced, _ = choose_threshold(positive, negative, fp_cost=1, fn_cost=1)
+    strict, info = choose_threshold(positive, negative, fp_cost=10, fn_cost=1)
+    assert 0.74 < balanced < 0.81
+    assert strict > balanced
+    assert info["false_positives"] < info["false_negatives"]
+    # 배경 분포 하한 아래로는 내려가지 않음
+    floored, _ = choose_threshold(positive, negative, floor=0.9)
+    assert floored >= 0.9
+
+def test_histogram_batches_match_full_pairwise():
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((50, 16)).astype('float32')
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    groups = np.array(["1/101", "1/public"] * 25)
+    histograms = similarity_histogram(matrix, groups, batch_size=7)
+
+    sims = matrix @ matrix.T
+    for label, histogram in histograms.items():
+        members = np.flatnonzero(groups == label)
+        iu = np.triu_indices(len(members), k=1)
+        expected, _ = np.histogram(sims[np.ix_(members, members)][iu], bins=HISTOGRAM_BINS)
+        assert histogram.sum() == len(iu[0]) == 300
+        assert np.abs(histogram - expected).sum() <= 2  # bin 경계 반올림 차이
+    total = similarity_histogram(matrix, batch_size=16)[0]
+    assert total.sum() == 50 * 49 // 2
+    assert background_floor(total, 0.0) >= sims[np.triu_indices(50, k=1)].max() - 1e-3
+
+def test_calibrate_per_location():
+    rng = np.random.default_rng(2)
+    positive = {"3/301": list(rng.normal(0.93, 0.02, 40)), ANY_LOCATION: list(rng.normal(0.85, 0.03, 10))}
+    negative = {"3/301": list(rng.normal(0.86, 0.02, 40)), ANY_LOCATION: list(rng.normal(0.70, 0.03, 10))}
+    config = calibrate(positive, negative, min_pairs=20)
+    assert set(config["locations"]) == {"3/301"}
+    assert set(config["area"]) == {"room"}
+    assert config["locations"]["3/301"] > 0.86
+    loaded = DuplicateThresholds(json.loads(json.dumps(config)))
+    assert loaded.for_location("3", "301") == config["locations"]["3/301"]
+    assert loaded.for_location("5", None) == config["default"]
+    with pytest.raises(ValueError):
+        calibrate({"3/301": [0.9]}, {})
+
+def test_check_duplicates_uses_location_threshold(tmp_path):
+    path = tmp_path / "duplicate_thresholds.json"
+    path.write_text(json.dumps({"default": 0.9, "locations": {"2/201": 0.75}}))
+    reports = list(repair_service.REPAIR_REPORTS)
+    try:
+        thresholds.reload_duplicate_thresholds(str(path))
+        repair_service.REPAIR_REPORTS[:] = [
+            {"id": 1, "floor": "2", "room_number": "201", "description": "a", "image_url": None, "embedding": _unit(4, 1.0)},
+            {"id": 2, "floor": "2", "room_number": "202", "description": "b", "image_url": None, "embedding": _unit(4, 1.0)},
+        ]
+        repair_service.rebuild_duplicate_index()
+        query = _unit(4, 0.8)
+        assert [d.reportId for d in asyncio.run(repair_service.check_duplicates(query, None, "2", "201"))] == [1]
+        assert asyncio.run(repair_service.check_duplicates(query, None, "2", "202")) == []
+    finally:
+        thresholds.reload_duplicate_thresholds()
+        repair_service.REPAIR_REPORTS[:] = reports
+        repair_service.rebuild_duplicate_index()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,98 @@
+import asyncio
+import numpy as np
+from io import BytesIO
+from PIL import Image
+import app.core.storage as storage
+import app.repair.service as repair_service
+from app.core.storage import LocalStorage
+from app.repair.duplicate_index import DuplicateIndex
+from app.repair.image_hash import content_hash, dhash, hamming
+from app.repair.models import RepairRequest
+
+def _photo(seed=0, size=(640, 480)):
+    """부드러운 무늬 + 잡음 (실제 사진처럼 재압축 시 픽셀이 조금씩 바뀜)"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size[1], 0:size[0]]
+    freq = rng.uniform(0.005, 0.03, 3)
+    base = np.stack([127 + 100 * np.sin(x * f + y * f * 0.7 + i) for i, f in enumerate(freq)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype('uint8')
+    return Image.fromarray(pixels)
+
+def _jpeg(img, quality=90):
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+def _report(report_id, floor, room, data):
+    return {"id": report_id, "floor": floor, "room_number": room, "description": f"report {report_id}",
+            "image_url": None, "embedding": np.ones(4, dtype='float32') / 2,
+            "content_hash": content_hash(data), "dhash": dhash(Image.open(BytesIO(data)))}
+
+def test_dhash_tolerates_reencoding():
+    img = _photo()
+    original = dhash(Image.open(BytesIO(_jpeg(img))))
+    resent = dhash(Image.open(BytesIO(_jpeg(img.resize((320, 240)), quality=60))))
+    other = dhash(Image.open(BytesIO(_jpeg(_photo(seed=1)))))
+    hashes = np.array([resent, other], dtype='uint64')
+    distances = hamming(hashes, original)
+    assert distances[0] <= 4
+    assert distances[1] > 10
+
+def test_find_same_image_is_location_scoped():
+    data = _jpeg(_photo())
+    index = DuplicateIndex()
+    index.add(_report(1, "3", "301", data))
+    index.add(_report(2, "3", "302", data))  # 같은 사진, 다른 호실
+    exact = index.find_same_image("3", "301", content_hash=content_hash(data))
+    assert [(report["id"], distance) for report, distance in exact] == [(1, 0)]
+    assert index.find_same_image("3", "301", content_hash=content_hash(data), report_ids=[2]) == []
+
+    resent = _jpeg(_photo().resize((320, 240)), quality=60)
+    assert index.find_same_image("3", "301", content_hash=content_hash(resent)) == []
+    near = index.find_same_image("3", "301", dhash=dhash(Image.open(BytesIO(resent))), max_distance=4)
+    assert [report["id"] for report, _ in near] == [1]
+
+    # 처리 완료된 신고는 hash 로도 찾지 않음
+    assert index.remove(1)
+    assert index.find_same_image("3", "301", content_hash=content_hash(data)) == []
+
+def test_pipeline_skips_clip_for_resent_image(tmp_path):
+    data = _jpeg(_photo())
+    reports = list(repair_service.REPAIR_REPORTS)
+    clip_model = repair_service.get_clip_model
+
+    def no_clip():
+        raise AssertionError("CLIP should not run for a resent image")
+
+    def run():
+        store = storage.get_storage()
+        store.write("storage/temp/first.jpg", data)
+        asyncio.run(repair_service.save_report_files(
+            901, "storage/temp/first.jpg", np.ones(4, dtype='float32'), "4", "401", "수도꼭지 누수",
+            digest=content_hash(data), perceptual=dhash(Image.open(BytesIO(data)))))
+
+        responses = []
+        for name, payload in (("retry.jpg", data), ("resized.jpg", _jpeg(_photo().resize((320, 240)), quality=60))):
+            store.write(f"storage/temp/{name}", payload)
+            req = RepairRequest(existingReportIds=[901], totalReportCount=901, floor="4", room_number="401")
+            responses.append(asyncio.run(repair_service.process_repair_request(req, f"storage/temp/{name}")))
+            assert not store.exists(f"storage/temp/{name}")
+        return responses
+
+    storage.set_storage(LocalStorage(root=str(tmp_path)))
+    repair_service.get_clip_model = no_clip
+    try:
+        exact, perceptual = run()
+    finally:
+        repair_service.get_clip_model = clip_model
+        storage.set_storage(None)
+        repair_service.REPAIR_REPORTS[:] = reports
+        repair_service.resolve_report(901)
+
+    assert not exact.is_new and exact.analysis is None
+    assert [(d.reportId, d.match, d.similarity) for d in exact.duplicates] == [(901, "exact", 1.0)]
+    assert [(d.reportId, d.match) for d in perceptual.duplicates] == [(901, "perceptual")]
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,102 @@
+import io
+import json
+import queue
+import logging
+from fastapi.testclient import TestClient
+from app.main import app
+import app.core.logs as logs
+
+client = TestClient(app)
+
+def _capture(fn):
+    """app.* 로그를 StringIO 로 받아 fn 실행 후 JSON 줄 목록 반환"""
+    buffer = io.StringIO()
+    logs.shutdown_logging()
+    try:
+        logs.configure_logging(stream=buffer)
+        fn()
+    finally:
+        logs.shutdown_logging()  # 큐 flush
+        logs.configure_logging()
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+def test_json_record_has_context_and_extra_fields():
+    def run():
+        context, token = logs.start_request("req-123")
+        try:
+            logging.getLogger("app.test").info("hello", extra={"candidates": 3})
+        finally:
+            logs.end_request(token)
+
+    entry = _capture(run)[0]
+    assert entry["message"] == "hello"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-123"
+    assert entry["candidates"] == 3
+    assert "trace_id" in entry
+
+def test_slow_stage_logs_warning_with_request_id():
+    original = dict(logs.SLOW_STAGE_THRESHOLDS)
+    logs.SLOW_STAGE_THRESHOLDS["text"] = 0.0
+    responses = []
+    try:
+        lines = _capture(lambda: responses.append(client.get("/", headers={"X-Request-Id": "abc"})))
+
+        def run():
+            context, token = logs.start_request("slow-1")
+            logs.record_stage("text", 0.01)
+            logs.record_stage("text", 0.02)
+            logs.log_request(context, "POST", "/api/matching/match", 200, 0.05)
+            logs.end_request(token)
+
+        slow = _capture(run)
+    finally:
+        logs.SLOW_STAGE_THRESHOLDS.clear()
+        logs.SLOW_STAGE_THRESHOLDS.update(original)
+
+    assert responses[0].headers["X-Request-Id"] == "abc"
+    assert not any(line["message"] == "slow request" for line in lines)
+    warning = slow[0]
+    assert warning["level"] == "WARNING"
+    assert warning["message"] == "slow request"
+    assert warning["request_id"] == "slow-1"
+    assert warning["stages_ms"]["text"] == 30.0
+    assert warning["slow_stages_ms"] == {"text": 30.0}
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = logs.DroppingQueueHandler(queue.Queue(maxsize=2))
+    test_logger = logging.getLogger("app.test.drop")
+    test_logger.addHandler(handler)
+    test_logger.propagate = False
+    try:
+        for i in range(5):
+            test_logger.warning("message %d", i)
+    finally:
+        test_logger.removeHandler(handler)
+        test_logger.propagate = True
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+def test_classify_error():
+    assert logs.classify_error(TimeoutError()) == "timeout"
+    assert logs.classify_error(RuntimeError("429 Resource has been exhausted (quota)")) == "rate_limit"
+    assert logs.classify_error(RuntimeError("401 invalid api key")) == "auth"
+    assert logs.classify_error(ConnectionResetError()) == "network"
+    assert logs.classify_error(FileNotFoundError()) == "not_found"
+    assert logs.classify_error(json.JSONDecodeError("bad", "", 0)) == "invalid_response"
+    assert logs.classify_error(RuntimeError("boom")) == "internal"
+    assert logs.error_fields(TimeoutError()) == {"error_type": "TimeoutError", "error_class": "timeout"}
+
+def test_per_module_levels():
+    assert logs.parse_levels("app.repair=debug, app.core.embedding=WARNING") == {
+        "app.repair": "DEBUG", "app.core.embedding": "WARNING"}
+    assert logs.parse_thresholds("clip_encode=1000,text=500") == {"clip_encode": 1000.0, "text": 500.0}
+
+if __name__ == "__main__":
+    test_json_record_has_context_and_extra_fields()
+    test_slow_stage_logs_warning_with_request_id()
+    test_full_queue_drops_instead_of_blocking()
+    test_classify_error()
+    test_per_module_levels()
+    print("All logging tests passed!")
@@ -0,0 +1,81 @@
+import json
+import random
+from fastapi.testclient import TestClient
+from app.main import app
+from app.matching.stream import iter_ranked_matches
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserProfile, UserPreferences
+
+client = TestClient(app)
+
+def _one_hot(i, dim=8):
+    vec = [0.0] * dim
+    vec[i % dim] = 1.0
+    return vec
+
+def _request(n=150, seed=0):
+    rng = random.Random(seed)
+    def profile(uid):
+        return UserProfile(
+            id=uid, gender="MALE", name=f"user{uid}",
+            birthYear=rng.randint(1998, 2005), smoker=rng.random() < 0.2, snoring=rng.random() < 0.3,
+            bugKiller=rng.random() < 0.5, sleepTime=rng.randint(8, 14), wakeTime=rng.randint(5, 11),
+            cleaningCycle=rng.choice(["DAILY", "WEEKLY", "NEVER"]), drinkingStyle=rng.choice(["RARELY", "FREQUENTLY"]),
+            selfIntroductionEmbedding=_one_hot(rng.randint(0, 7)),
+            roommateCriteriaEmbedding=_one_hot(rng.randint(0, 7)),
+        )
+    candidates = [profile(uid) for uid in rng.sample(range(1, 10000), n)]
+    return MatchRequest(myProfile=profile(0), preferences=UserPreferences(preferNonSmoker=True), candidates=candidates)
+
+def test_full_ranking_order():
+    request = _request()
+    ranked = list(iter_ranked_matches(request))
+
+    assert len(ranked) == 150
+    assert [r["rank"] for r in ranked] == list(range(1, 151))
+    keys = [(-r["totalScore"], r["userId"]) for r in ranked]
+    assert keys == sorted(keys)
+
+    # 상위 20명 점수는 기존 매칭 API 와 동일 (동점 순서만 userId 기준)
+    top = calculate_hybrid_match(request)
+    assert [r["totalScore"] for r in ranked[:20]] == [r.totalScore for r in top]
+
+def test_offset_and_cursor_pages():
+    request = _request(seed=1)
+    full = list(iter_ranked_matches(request))
+
+    pages = []
+    for offset in range(0, 150, 40):
+        pages.extend(iter_ranked_matches(request, offset=offset, limit=40))
+    assert pages == full
+
+    cursor_pages, cursor = [], None
+    while True:
+        page = list(iter_ranked_matches(request, limit=33, cursor=cursor))
+        if not page:
+            break
+        cursor_pages.extend(page)
+        cursor = page[-1]["cursor"]
+    assert cursor_pages == full
+
+def test_stream_endpoint():
+    request = _request(n=30, seed=2)
+    response = client.post("/api/matching/match/stream?limit=10", json=request.model_dump(mode="json"))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 10
+
+    response = client.post(f"/api/matching/match/stream?cursor={lines[-1]['cursor']}", json=request.model_dump(mode="json"))
+    rest = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rest) == 20
+    assert rest[0]["rank"] == 11
+
+    response = client.post("/api/matching/match/stream?cursor=oops", json=request.model_dump(mode="json"))
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    test_full_ranking_order()
+    test_offset_and_cursor_pages()
+    test_stream_endpoint()
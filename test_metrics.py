@@ -0,0 +1,57 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+import app.core.metrics as metrics
+from app.repair.service import repair_stage
+from conftest import make_profile
+
+client = TestClient(app)
+
+def _sample(text, name, labels=""):
+    """exposition 텍스트에서 샘플 값 (없으면 0)"""
+    for line in text.splitlines():
+        if line.startswith(name + labels + " "):
+            return float(line.split()[-1])
+    return 0.0
+
+def test_metrics_disabled_by_default():
+    original = metrics.METRICS_ENABLED
+    try:
+        metrics.METRICS_ENABLED = False
+        assert client.get("/metrics").status_code == 404
+        # 비활성 시 기록하지 않음
+        with metrics.timed(metrics.MATCH_SECONDS):
+            pass
+    finally:
+        metrics.METRICS_ENABLED = original
+
+def test_metrics_endpoint_records_match_and_repair_stages():
+    original = metrics.METRICS_ENABLED
+    rng = np.random.default_rng(0)
+    people = [make_profile(uid, rng, embedding_dim=8).model_dump(mode="json") for uid in range(30)]
+    try:
+        metrics.METRICS_ENABLED = True
+        before = client.get("/metrics").text
+
+        response = client.post("/api/matching/match", json={"myProfile": people[0], "preferences": {}, "candidates": people[1:]})
+        assert response.status_code == 200
+        with repair_stage("clip_encode"):
+            pass
+
+        after = client.get("/metrics")
+        assert after.status_code == 200
+        assert after.headers["content-type"].startswith("text/plain")
+        text = after.text
+        assert _sample(text, "roomy_match_seconds_count") == _sample(before, "roomy_match_seconds_count") + 1
+        for stage in ("seeker_vector", "tag_pref", "text", "results"):
+            key = f'{{stage="{stage}"}}'
+            assert _sample(text, "roomy_match_stage_seconds_count", key) == _sample(before, "roomy_match_stage_seconds_count", key) + 1
+        assert _sample(text, "roomy_match_candidates_sum") == _sample(before, "roomy_match_candidates_sum") + 29
+        key = '{stage="clip_encode"}'
+        assert _sample(text, "roomy_repair_stage_seconds_count", key) == _sample(before, "roomy_repair_stage_seconds_count", key) + 1
+    finally:
+        metrics.METRICS_ENABLED = original
+
+if __name__ == "__main__":
+    test_metrics_disabled_by_default()
+    test_metrics_endpoint_records_match_and_repair_stages()
@@ -0,0 +1,83 @@
+import os
+import time
+import tempfile
+import numpy as np
+import app.users.service as user_service
+import app.matching.service as matching_service
+import app.matching.mutual as mutual
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserPreferences
+from conftest import make_profile
+
+def _setup(storage_dir, n=120, d=8, seed=0):
+    rng = np.random.default_rng(seed)
+    user_service.VECTOR_STORAGE_PATH = storage_dir
+    user_service.ensure_vector_storage()
+    for uid in range(n + 1):
+        user_service._save_vector(uid, "self", rng.standard_normal(d).astype('float32'))
+        user_service._save_vector(uid, "criteria", rng.standard_normal(d).astype('float32'))
+    return [make_profile(uid, rng, gender="FEMALE") for uid in range(n + 1)]
+
+def _reference_sim(a, a_type, b, b_type):
+    return max(0.0, float(user_service.load_user_vector(a, a_type) @ user_service.load_user_vector(b, b_type)))
+
+def test_aggregations():
+    f = np.array([0.8, 0.0, 0.5])
+    r = np.array([0.2, 0.6, 0.5])
+    assert np.allclose(mutual.aggregate_sims(f, r, "mean"), [0.5, 0.3, 0.5])
+    assert np.allclose(mutual.aggregate_sims(f, r, "min"), [0.2, 0.0, 0.5])
+    assert np.allclose(mutual.aggregate_sims(f, r, "geometric"), [0.4, 0.0, 0.5])
+    assert np.allclose(mutual.aggregate_sims(f, r, "harmonic"), [0.32, 0.0, 0.5])
+
+def test_mutual_scores_and_two_stage():
+    original = user_service.VECTOR_STORAGE_PATH
+    original_flag = matching_service.MATCH_TWO_STAGE
+    with tempfile.TemporaryDirectory() as storage_dir:
+        try:
+            profiles = _setup(storage_dir)
+            seeker, candidates = profiles[0], profiles[1:]
+            for mode in mutual.MUTUAL_AGGREGATIONS:
+                request = MatchRequest(myProfile=seeker, preferences=UserPreferences(preferNonSmoker=True),
+                                       candidates=candidates, mutual=True, mutualAggregation=mode)
+                matching_service.MATCH_TWO_STAGE = True
+                two_stage = calculate_hybrid_match(request)
+                matching_service.MATCH_TWO_STAGE = False
+                exhaustive = calculate_hybrid_match(request)
+                assert [r.model_dump() for r in two_stage] == [r.model_dump() for r in exhaustive]
+
+                for r in two_stage[:5]:
+                    f = _reference_sim(0, "criteria", r.userId, "self")
+                    b = _reference_sim(r.userId, "criteria", 0, "self")
+                    expected = float(mutual.aggregate_sims(np.array([f]), np.array([b]), mode)[0]) * 30.0
+                    assert abs(r.matchDetails["textScore"] - round(expected, 1)) <= 0.1
+        finally:
+            user_service.VECTOR_STORAGE_PATH = original
+            matching_service.MATCH_TWO_STAGE = original_flag
+
+def test_pair_cache_tracks_vector_versions():
+    original = user_service.VECTOR_STORAGE_PATH
+    with tempfile.TemporaryDirectory() as storage_dir:
+        try:
+            profiles = _setup(storage_dir, n=20, seed=1)
+            seeker, candidates = profiles[0], profiles[1:]
+            mutual._pair_cache.clear()
+
+            first = mutual.reverse_text_sims(seeker, candidates)
+            assert len(mutual._pair_cache) == 20
+            assert np.array_equal(mutual.reverse_text_sims(seeker, candidates), first)
+
+            # 후보자 5의 criteria 벡터 변경 -> 그 쌍만 재계산
+            user_service._save_vector(5, "criteria", np.ones(8, dtype='float32'))
+            future = time.time() + 10
+            os.utime(os.path.join(storage_dir, "5_criteria.npy"), (future, future))
+            updated = mutual.reverse_text_sims(seeker, candidates)
+            assert abs(updated[4] - _reference_sim(5, "criteria", 0, "self")) < 1e-6
+            assert np.array_equal(np.delete(updated, 4), np.delete(first, 4))
+        finally:
+            user_service.VECTOR_STORAGE_PATH = original
+            mutual._pair_cache.clear()
+
+if __name__ == "__main__":
+    test_aggregations()
+    test_mutual_scores_and_two_stage()
+    test_pair_cache_tracks_vector_versions()
@@ -0,0 +1,74 @@
+import os
+import json
+import random
+import tempfile
+from fastapi.testclient import TestClient
+from app.main import app
+import app.core.profiling as profiling
+from app.matching.models import UserProfile
+
+client = TestClient(app)
+
+def _one_hot(i, dim=8):
+    vec = [0.0] * dim
+    vec[i % dim] = 1.0
+    return vec
+
+def _match_body(n=40, seed=0):
+    rng = random.Random(seed)
+    people = [UserProfile(
+        id=uid, gender="MALE", name=f"user{uid}",
+        birthYear=rng.randint(1998, 2005), smoker=rng.random() < 0.2, snoring=rng.random() < 0.3,
+        bugKiller=rng.random() < 0.5, sleepTime=rng.randint(8, 14), wakeTime=rng.randint(5, 11),
+        cleaningCycle="WEEKLY", drinkingStyle="SOMETIMES",
+        selfIntroductionEmbedding=_one_hot(rng.randint(0, 7)), roommateCriteriaEmbedding=_one_hot(rng.randint(0, 7)),
+    ).model_dump(mode="json") for uid in range(n)]
+    return {"myProfile": people[0], "preferences": {}, "candidates": people[1:]}
+
+def _profiled(backend, headers, sample_rate=0.0):
+    """프로파일링 활성 상태로 /match 호출. Returns (응답, {확장자: 파일}, 메타데이터)"""
+    original = (profiling.PROFILING_ENABLED, profiling.PROFILE_DIR, profiling.PROFILE_BACKEND, profiling.PROFILE_SAMPLE_RATE)
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            profiling.PROFILING_ENABLED = True
+            profiling.PROFILE_DIR = tmp
+            profiling.PROFILE_BACKEND = backend
+            profiling.PROFILE_SAMPLE_RATE = sample_rate
+            response = client.post("/api/matching/match", json=_match_body(), headers=headers)
+            files = {os.path.splitext(name)[1]: name for name in os.listdir(tmp)}
+            meta = None
+            if ".json" in files:
+                with open(os.path.join(tmp, files[".json"]), encoding="utf-8") as f:
+                    meta = json.load(f)
+            return response, files, meta
+        finally:
+            profiling.PROFILING_ENABLED, profiling.PROFILE_DIR, profiling.PROFILE_BACKEND, profiling.PROFILE_SAMPLE_RATE = original
+
+def test_header_triggers_sampling_profile():
+    response, files, meta = _profiled("sampling", {"X-Profile": "1"})
+    assert response.status_code == 200
+    assert set(files) == {".json", ".collapsed"}
+    assert "api_matching_match_candidates39" in files[".json"]
+    assert meta["route"] == "/api/matching/match" and meta["endpoint"] == "match_roommates"
+    assert meta["status"] == 200
+    assert meta["tags"] == {"candidates": 39}
+    assert meta["artifact"] == files[".collapsed"]
+
+def test_cprofile_backend_and_untriggered_requests():
+    response, files, meta = _profiled("cprofile", {"X-Profile": "1"})
+    assert response.status_code == 200
+    assert set(files) == {".json", ".pstats"}
+    assert meta["backend"] == "cprofile" and len(meta["top"]) > 0
+
+    # 헤더 없음 + 샘플링 0 -> 프로파일링 안 함
+    response, files, meta = _profiled("sampling", {})
+    assert response.status_code == 200
+    assert files == {} and meta is None
+
+    # 샘플링 100%
+    _, files, meta = _profiled("sampling", {}, sample_rate=1.0)
+    assert meta is not None
+
+if __name__ == "__main__":
+    test_header_triggers_sampling_profile()
+    test_cprofile_backend_and_untriggered_requests()
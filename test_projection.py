@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+import app.users.service as user_service
+from app.core import projection as projection_module
+from app.core.projection import train_from_storage, backfill_projection, activate_projection, get_active_projection
+from app.matching.service import prepare_inline_vector, InlineEmbeddingMismatch
+from app.matching.models import MatchRequest, UserProfile, UserPreferences
+
+client = TestClient(app)
+
+def _fake_embedding(text, model_type="passage"):
+    rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+    return rng.standard_normal(64).astype('float32')
+
+def test_projection_write_and_query(tmp_path, monkeypatch):
+    storage_dir = str(tmp_path / "vectors")
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", storage_dir)
+    monkeypatch.setattr("app.matching.service.VECTOR_STORAGE_PATH", storage_dir)
+    monkeypatch.setattr(user_service, "get_embedding", _fake_embedding)
+    monkeypatch.setattr(projection_module, "_projection_cache", {})
+
+    # 1. 원본 벡터 저장 후 학습
+    for uid in range(20):
+        user_service.save_user_vectors(uid, f"self {uid}", f"criteria {uid}")
+    name = train_from_storage(storage_dir, 8)
+    assert backfill_projection(storage_dir, name) == 40
+    activate_projection(storage_dir, name)
+    projection = get_active_projection(storage_dir)
+
+    # 2. 로드 시 투영된 벡터 반환
+    vec = user_service.load_user_vector(3, 'self')
+    assert vec.shape == (8,)
+    assert np.isclose(np.linalg.norm(vec), 1.0, atol=1e-5)
+
+    # 3. 활성화 이후 저장된 벡터도 투영본이 함께 저장됨
+    user_service.save_user_vectors(100, "new user", None)
+    assert os.path.exists(os.path.join(projection.directory, "100_self.npy"))
+
+    # 4. 요청에 포함된 원본 임베딩은 질의 시점에 투영
+    inline = prepare_inline_vector(_fake_embedding("self 3"))
+    assert np.allclose(inline, vec, atol=1e-5)
+
+    # 원본 벡터는 그대로 유지
+    assert np.load(os.path.join(storage_dir, "3_self.npy")).shape == (64,)
+
+    # 5. 투영 입력 차원과 다른 인라인 임베딩은 500 대신 400
+    with pytest.raises(InlineEmbeddingMismatch):
+        prepare_inline_vector(np.ones(8, dtype='float32'))
+    habits = dict(gender="MALE", birthYear=2002, smoker=False, snoring=False, bugKiller=False,
+                  sleepTime=11, wakeTime=7, cleaningCycle="DAILY", drinkingStyle="RARELY")
+    seeker = UserProfile(id=3, name="seeker", **habits)
+    bad = UserProfile(id=4, name="bad", selfIntroductionEmbedding=[1.0] * 32, **habits)
+    request = MatchRequest(myProfile=seeker, preferences=UserPreferences(), candidates=[bad])
+    response = client.post("/api/matching/match", json=request.model_dump(mode="json"))
+    assert response.status_code == 400
+    assert "expects 64" in response.json()["detail"]
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
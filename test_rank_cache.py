@@ -0,0 +1,115 @@
+import tempfile
+import numpy as np
+import app.users.service as user_service
+import app.matching.rank_cache as rank_cache
+from app.matching.rank_cache import RankingCache
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserProfile, UserPreferences
+from conftest import CLEANING_CYCLES, make_profile
+
+def _requests(candidates, seekers, prefs):
+    return [MatchRequest(myProfile=s, preferences=p, candidates=candidates) for s, p in zip(seekers, prefs)]
+
+def _dump(results):
+    return [r.model_dump() for r in results]
+
+def test_incremental_updates_match_full_recompute():
+    rng = np.random.default_rng(0)
+    original = user_service.VECTOR_STORAGE_PATH
+    with tempfile.TemporaryDirectory() as storage_dir:
+        try:
+            user_service.VECTOR_STORAGE_PATH = storage_dir
+            user_service.ensure_vector_storage()
+            for uid in range(1, 201):
+                user_service._save_vector(uid, "self", rng.standard_normal(8).astype('float32'))
+                user_service._save_vector(uid, "criteria", rng.standard_normal(8).astype('float32'))
+
+            # seeker 5명은 후보자 풀에도 포함
+            candidates = [make_profile(uid, rng) for uid in range(1, 201)]
+            seekers = candidates[:5] + [make_profile(uid, rng) for uid in range(201, 211)]
+            for s in seekers[5:]:
+                user_service._save_vector(s.id, "criteria", rng.standard_normal(8).astype('float32'))
+            prefs = [UserPreferences(preferNonSmoker=bool(rng.random() < 0.5), preferQuietSleeper=bool(rng.random() < 0.5))
+                     for _ in seekers]
+
+            cache = RankingCache(max_entries=100, reserve=2)
+            for request in _requests(candidates, seekers, prefs):
+                assert _dump(cache.match(request)) == _dump(calculate_hybrid_match(request))
+            assert len(cache) == 15
+
+            for step in range(24):
+                uid = int(rng.integers(1, 201))
+                if step % 3 == 0:
+                    # 상위권 후보자 변경 (retained 에서 빠지는 경우)
+                    uid = cache.match(_requests(candidates, seekers, prefs)[step % 15])[0].userId
+                if step % 2 == 0:
+                    # 생활 습관 변경
+                    changed = UserProfile(**{
+                        **candidates[uid - 1].model_dump(),
+                        "sleepTime": int(rng.integers(8, 15)), "smoker": bool(rng.random() < 0.5),
+                        "cleaningCycle": CLEANING_CYCLES[int(rng.integers(0, 5))],
+                    })
+                    candidates[uid - 1] = changed
+                    stats = cache.update_candidate(uid, changed)
+                else:
+                    # 자기소개 벡터 변경
+                    user_service._save_vector(uid, "self", rng.standard_normal(8).astype('float32'))
+                    stats = cache.update_candidate(uid)
+                # 영향받은 seeker 만 재계산 (본인이 seeker 인 항목 제외)
+                assert stats["rescored"] <= len(cache) + stats["invalidated"]
+
+                for request in _requests(candidates, seekers, prefs):
+                    assert _dump(cache.match(request)) == _dump(calculate_hybrid_match(request))
+        finally:
+            user_service.VECTOR_STORAGE_PATH = original
+
+def test_invalidate_seeker():
+    rng = np.random.default_rng(1)
+    candidates = [make_profile(uid, rng) for uid in range(1, 30)]
+    cache = RankingCache(max_entries=10)
+    for request in _requests(candidates, candidates[:3], [UserPreferences()] * 3):
+        cache.match(request)
+
+    assert cache.invalidate_seeker(2) == 1
+    assert len(cache) == 2
+
+def test_update_loads_candidate_vector_once(monkeypatch):
+    rng = np.random.default_rng(3)
+    candidates = [make_profile(uid, rng) for uid in range(1, 30)]
+    cache = RankingCache(max_entries=10)
+    # 같은 후보자를 포함한 풀 2개
+    for pool in (candidates, candidates[:20]):
+        for request in _requests(pool, pool[:2], [UserPreferences()] * 2):
+            cache.match(request)
+
+    calls = []
+    monkeypatch.setattr(rank_cache, "load_user_vector", lambda uid, kind: calls.append(uid))
+    stats = cache.update_candidate(5, candidates[4].model_copy(update={"smoker": True}))
+    assert calls == [5]
+    assert stats["rescored"] == 4
+
+def test_changed_profile_with_same_ids_is_recomputed():
+    rng = np.random.default_rng(2)
+    candidates = [make_profile(uid, rng) for uid in range(1, 30)]
+    seeker = candidates[0]
+    prefs = UserPreferences(preferNonSmoker=True)
+    cache = RankingCache(max_entries=10)
+    cache.match(MatchRequest(myProfile=seeker, preferences=prefs, candidates=candidates))
+
+    # 알림 (/cache/candidate) 없이 후보자가 흡연자로 바뀐 요청 -> 같은 id 목록이어도 다시 계산
+    top = cache.match(MatchRequest(myProfile=seeker, preferences=prefs, candidates=candidates))[0].userId
+    changed = list(candidates)
+    pos = next(i for i, c in enumerate(candidates) if c.id == top)
+    changed[pos] = candidates[pos].model_copy(update={"smoker": True})
+    request = MatchRequest(myProfile=seeker, preferences=prefs, candidates=changed)
+    assert _dump(cache.match(request)) == _dump(calculate_hybrid_match(request))
+
+    # seeker 프로필만 바뀐 경우도 동일
+    request = MatchRequest(myProfile=seeker.model_copy(update={"sleepTime": 14}), preferences=prefs, candidates=changed)
+    assert _dump(cache.match(request)) == _dump(calculate_hybrid_match(request))
+    assert len(cache) == 1
+
+if __name__ == "__main__":
+    test_incremental_updates_match_full_recompute()
+    test_invalidate_seeker()
+    test_changed_profile_with_same_ids_is_recomputed()
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import Future
+from io import BytesIO
+from PIL import Image
+from fastapi.testclient import TestClient
+from app.main import app
+import app.core.storage as storage
+import app.repair.service as repair_service
+import app.repair.derivatives as derivatives
+from app.core.storage import LocalStorage
+
+client = TestClient(app)
+
+def _jpeg(width=2000, height=1500):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(200, 30, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+def _with_storage(tmp_path, fn):
+    storage.set_storage(LocalStorage(root=str(tmp_path)))
+    try:
+        return fn()
+    finally:
+        storage.set_storage(None)
+
+def test_generate_derivatives_sizes(tmp_path):
+    def run():
+        storage.get_storage().write("storage/repair_images/5.jpg", _jpeg())
+        keys = derivatives.generate_derivatives(5, "storage/repair_images/5.jpg")
+        return {size: Image.open(BytesIO(storage.get_storage().read(key))) for size, key in keys.items()}
+
+    images = _with_storage(tmp_path, run)
+    assert set(images) == set(derivatives.DERIVATIVE_SIZES)
+    for size, img in images.items():
+        assert max(img.size) == derivatives.DERIVATIVE_SIZES[size]
+        assert img.size[0] > img.size[1]  # 비율 유지
+        assert img.format == derivatives._output_format()[0]
+
+def test_save_report_schedules_derivatives(tmp_path):
+    reports = list(repair_service.REPAIR_REPORTS)
+
+    def run():
+        storage.get_storage().write("storage/temp/pending.jpg", _jpeg(800, 600))
+        asyncio.run(repair_service.save_report_files(
+            601, "storage/temp/pending.jpg", np.ones(4, dtype='float32'), "2", None, "desc"))
+        derivatives._pending[601].result(timeout=30)
+        return storage.get_storage().exists(derivatives.derivative_key(601, "thumb"))
+
+    try:
+        assert _with_storage(tmp_path, run)
+    finally:
+        repair_service.REPAIR_REPORTS[:] = reports
+        repair_service.resolve_report(601)
+
+def test_image_route_caching(tmp_path):
+    def run():
+        storage.get_storage().write(f"{repair_service.REPAIR_IMAGE_DIR}/77.jpg", _jpeg())
+        # 축소본이 없으면 요청 시 생성
+        thumb = client.get("/api/repair/images/77/thumb")
+        cached = client.get("/api/repair/images/77/thumb", headers={"If-None-Match": thumb.headers["ETag"]})
+        original = client.get("/api/repair/images/77/original")
+        return thumb, cached, original, client.get("/api/repair/images/77/huge"), client.get("/api/repair/images/78/thumb")
+
+    thumb, cached, original, unknown_size, unknown_report = _with_storage(tmp_path, run)
+    assert thumb.status_code == 200
+    assert thumb.headers["Cache-Control"] == derivatives.IMMUTABLE_CACHE
+    assert max(Image.open(BytesIO(thumb.content)).size) == derivatives.DERIVATIVE_SIZES["thumb"]
+    assert cached.status_code == 304
+    assert original.status_code == 200 and original.headers["content-type"] == "image/jpeg"
+    assert unknown_size.status_code == 404
+    assert unknown_report.status_code == 404
+
+def test_image_urls():
+    assert derivatives.image_urls(3) == {
+        "original": "/api/repair/images/3/original",
+        "thumb": "/api/repair/images/3/thumb",
+        "medium": "/api/repair/images/3/medium",
+    }
+    assert derivatives.parse_sizes("small=128") == {"small": 128}
+
+class _InlineExecutor:
+    """submit 이 반환되기 전에 작업이 끝나는 executor (이미 완료된 Future)"""
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def test_schedule_missing_image_does_not_deadlock(tmp_path, monkeypatch):
+    monkeypatch.setattr(derivatives, "_get_executor", lambda: _InlineExecutor())
+    result = {}
+
+    def run():
+        result["future"] = derivatives.schedule_derivatives(77, "storage/repair_images/missing.jpg")
+
+    thread = threading.Thread(target=_with_storage, args=(tmp_path, run), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert result["future"].exception() is not None
+    assert 77 not in derivatives._pending
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
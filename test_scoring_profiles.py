@@ -0,0 +1,88 @@
+import os
+import json
+import tempfile
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+import app.matching.profiles as profiles
+from app.matching.profiles import ScoringProfile, load_scoring_profiles, scale_diff_scores
+from app.matching.scoring import candidate_features, compute_tag_score_matrix
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserPreferences
+from conftest import make_profile
+
+client = TestClient(app)
+
+def _reference_tag_scores(s, c):
+    """프로필 도입 전 공식 (나이 5 + 생활 시간 20 + 생활 습관 15)"""
+    age_p = np.maximum(0, 100 - (np.abs(s["age"] - c["age"]) * 10)) * 0.05
+    time_p = (scale_diff_scores(s["wake"], c["wake"], 6) + scale_diff_scores(s["sleep"], c["sleep"], 6)) / 2.0 * 20.0
+    habit_p = (scale_diff_scores(s["clean"], c["clean"], 4) + scale_diff_scores(s["drink"], c["drink"], 2)) / 2.0 * 15.0
+    return age_p + time_p + habit_p
+
+def test_default_profile_matches_reference_formula():
+    rng = np.random.default_rng(0)
+    people = [make_profile(uid, rng) for uid in range(300)]
+    feats = candidate_features(people)
+    s = {key: arr[:, None] for key, arr in candidate_features(people[:40]).items()}
+    # 비트 단위로 동일해야 함
+    assert np.array_equal(compute_tag_score_matrix(people[:40], feats), _reference_tag_scores(s, feats))
+
+def test_custom_profile_changes_scores():
+    rng = np.random.default_rng(1)
+    seeker, candidates = make_profile(0, rng), [make_profile(uid, rng) for uid in range(1, 80)]
+    feats = candidate_features(candidates)
+    night_owl = ScoringProfile("night_owl", {"weights": {"age": 0, "time": 40, "habit": 0, "pref": 30, "text": 30},
+                                             "ranges": {"sleep": 3}})
+
+    scores = compute_tag_score_matrix([seeker], feats, night_owl)[0]
+    wake_p = scale_diff_scores(seeker.wakeTime, feats["wake"], 6)
+    sleep_p = scale_diff_scores(seeker.sleepTime, feats["sleep"], 3)
+    assert np.allclose(scores, (wake_p + sleep_p) / 2.0 * 40.0)
+    assert night_owl.to_dict()["maxScore"] == 100.0
+
+    original = profiles._profiles
+    try:
+        profiles._profiles = {"default": profiles.DEFAULT_PROFILE, "night_owl": night_owl}
+        results = calculate_hybrid_match(MatchRequest(myProfile=seeker, preferences=UserPreferences(),
+                                                      candidates=candidates, scoringProfile="night_owl"))
+        top = {c.id: c for c in candidates}[results[0].userId]
+        assert results[0].matchDetails["tagScore"] == round(float(
+            (scale_diff_scores(seeker.wakeTime, top.wakeTime, 6) + scale_diff_scores(seeker.sleepTime, top.sleepTime, 3)) / 2.0 * 40.0), 1)
+    finally:
+        profiles._profiles = original
+
+def test_load_profiles_and_validation():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"profiles": {"quiet": {"weights": {"time": 30, "habit": 5}, "agePenaltyPerYear": 25}}}, f)
+        loaded = load_scoring_profiles(path)
+        assert set(loaded) == {"default", "quiet"}
+        assert loaded["quiet"].spec["weights"]["text"] == 30.0
+        assert loaded["quiet"].age_cap == 4
+        assert load_scoring_profiles(os.path.join(tmp, "missing.json")).keys() == {"default"}
+
+    for bad in ({"weights": {"loudness": 3}}, {"ranges": {"sleep": 0}}, {"weights": {"time": -1}}, {"bonus": 1}):
+        try:
+            ScoringProfile("bad", bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_unknown_profile_api():
+    rng = np.random.default_rng(2)
+    people = [make_profile(uid, rng).model_dump() for uid in range(5)]
+    response = client.post("/api/matching/match", json={
+        "myProfile": people[0], "preferences": {}, "candidates": people[1:], "scoringProfile": "no_such_profile"})
+    assert response.status_code == 400
+
+    response = client.get("/api/matching/profiles")
+    assert response.status_code == 200
+    assert "default" in [p["name"] for p in response.json()]
+
+if __name__ == "__main__":
+    test_default_profile_matches_reference_formula()
+    test_custom_profile_changes_scores()
+    test_load_profiles_and_validation()
+    test_unknown_profile_api()
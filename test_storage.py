@@ -0,0 +1,92 @@
+import os
+import asyncio
+import threading
+import numpy as np
+import app.core.storage as storage
+import app.repair.service as repair_service
+from app.core.storage import LocalStorage, StorageBackend
+
+class MemoryStorage(StorageBackend):
+    """object store 대용 (key -> bytes)"""
+
+    def __init__(self):
+        self.objects = {}
+        self.threads = set()
+
+    def read(self, key):
+        self.threads.add(threading.current_thread().name)
+        return self.objects[key]
+
+    def write(self, key, data):
+        self.threads.add(threading.current_thread().name)
+        self.objects[key] = data
+
+    def move(self, src, dst):
+        self.objects[dst] = self.objects.pop(src)
+
+    def delete(self, key):
+        return self.objects.pop(key, None) is not None
+
+    def exists(self, key):
+        return key in self.objects
+
+def test_local_atomic_write_and_move(tmp_path):
+    store = LocalStorage(root=str(tmp_path))
+    store.write("vectors/1.npy", storage.npy_bytes(np.arange(3, dtype='float32')))  # 없는 디렉토리도 생성
+    store.write("vectors/1.npy", storage.npy_bytes(np.ones(3, dtype='float32')))  # 기존 파일 교체
+    assert np.allclose(np.load(tmp_path / "vectors" / "1.npy"), [1.0, 1.0, 1.0])
+    assert os.listdir(tmp_path / "vectors") == ["1.npy"]  # 임시 파일 남지 않음
+
+    store.ensure_dir("images")
+    (tmp_path / "pending.jpg").write_bytes(b"jpeg")
+    store.move("pending.jpg", "images/7.jpg")
+    assert store.read("images/7.jpg") == b"jpeg"
+    assert not store.exists("pending.jpg")
+    assert store.delete("images/7.jpg") and not store.delete("images/7.jpg")
+
+def test_invalid_fsync_policy():
+    try:
+        LocalStorage(fsync="sometimes")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_async_io_runs_in_storage_pool():
+    memory = MemoryStorage()
+    storage.set_storage(memory)
+    try:
+        async def run():
+            await storage.write_bytes("a", b"1")
+            return await storage.read_bytes("a")
+
+        assert asyncio.run(run()) == b"1"
+    finally:
+        storage.set_storage(None)
+    assert all(name.startswith("storage-io") for name in memory.threads)
+
+def test_save_report_files_uses_backend():
+    memory = MemoryStorage()
+    memory.objects["storage/temp/pending.jpg"] = b"jpeg"
+    storage.set_storage(memory)
+    reports = list(repair_service.REPAIR_REPORTS)
+    try:
+        image_url = asyncio.run(repair_service.save_report_files(
+            501, "storage/temp/pending.jpg", np.array([3.0, 4.0], dtype='float32'), "3", "301", "desc"))
+    finally:
+        storage.set_storage(None)
+        repair_service.REPAIR_REPORTS[:] = reports
+        repair_service.resolve_report(501)
+    assert image_url == f"{repair_service.REPAIR_IMAGE_DIR}/501.jpg"
+    assert memory.objects[image_url] == b"jpeg"
+    assert "storage/temp/pending.jpg" not in memory.objects
+    vector_key = f"{repair_service.REPAIR_VECTOR_DIR}/501.npy"
+    assert vector_key in memory.objects
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    with tempfile.TemporaryDirectory() as tmp:
+        test_local_atomic_write_and_move(pathlib.Path(tmp))
+    test_invalid_fsync_policy()
+    test_async_io_runs_in_storage_pool()
+    test_save_report_files_uses_backend()
+    print("All storage tests passed!")
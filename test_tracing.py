@@ -0,0 +1,122 @@
+import os
+import json
+import random
+import logging
+import tempfile
+from fastapi.testclient import TestClient
+from app.main import app
+import app.core.tracing as tracing
+from app.matching.models import UserProfile
+
+client = TestClient(app)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+def _one_hot(i, dim=8):
+    vec = [0.0] * dim
+    vec[i % dim] = 1.0
+    return vec
+
+def _match_body(n=20, seed=0):
+    rng = random.Random(seed)
+    people = [UserProfile(
+        id=uid, gender="FEMALE", name=f"user{uid}",
+        birthYear=rng.randint(1998, 2005), smoker=rng.random() < 0.2, snoring=rng.random() < 0.3,
+        bugKiller=rng.random() < 0.5, sleepTime=rng.randint(8, 14), wakeTime=rng.randint(5, 11),
+        cleaningCycle="DAILY", drinkingStyle="RARELY",
+        selfIntroductionEmbedding=_one_hot(rng.randint(0, 7)), roommateCriteriaEmbedding=_one_hot(rng.randint(0, 7)),
+    ).model_dump(mode="json") for uid in range(n)]
+    return {"myProfile": people[0], "preferences": {}, "candidates": people[1:]}
+
+def _with_file_exporter(fn, sample_rate=1.0):
+    original = (tracing.TRACING_EXPORTER, tracing.TRACING_FILE, tracing.TRACING_SAMPLE_RATE)
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            tracing.TRACING_EXPORTER = "file"
+            tracing.TRACING_FILE = os.path.join(tmp, "spans.jsonl")
+            tracing.TRACING_SAMPLE_RATE = sample_rate
+            fn()
+            if not os.path.exists(tracing.TRACING_FILE):
+                return []
+            with open(tracing.TRACING_FILE, encoding="utf-8") as f:
+                return [json.loads(line) for line in f]
+        finally:
+            tracing.TRACING_EXPORTER, tracing.TRACING_FILE, tracing.TRACING_SAMPLE_RATE = original
+
+def test_match_request_spans_continue_incoming_trace():
+    responses = []
+    spans = _with_file_exporter(lambda: responses.append(client.post(
+        "/api/matching/match", json=_match_body(), headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})))
+
+    assert responses[0].status_code == 200
+    assert responses[0].headers["X-Trace-Id"] == TRACE_ID
+    by_name = {s["name"]: s for s in spans}
+    for name in ("POST /api/matching/match", "match", "match.seeker_vector", "match.tag_pref", "match.text", "match.results"):
+        assert name in by_name, name
+    assert all(s["traceId"] == TRACE_ID for s in spans)
+    # 부모 관계: HTTP -> match -> match.*
+    assert by_name["POST /api/matching/match"]["parentId"] == PARENT_ID
+    assert by_name["match"]["parentId"] == by_name["POST /api/matching/match"]["spanId"]
+    assert by_name["match.text"]["parentId"] == by_name["match"]["spanId"]
+    assert by_name["POST /api/matching/match"]["attributes"]["http.status_code"] == 200
+
+def test_sampling_and_log_correlation():
+    # 샘플링 제외: export 없음, trace id 는 응답 헤더에 남음
+    responses = []
+    spans = _with_file_exporter(lambda: responses.append(client.post("/api/matching/match", json=_match_body())), 0.0)
+    assert spans == []
+    assert len(responses[0].headers["X-Trace-Id"]) == 32
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(tracing.TraceContextFilter())
+    logger = logging.getLogger("app.test_tracing")
+    logger.addHandler(handler)
+
+    def log_in_span():
+        with tracing.span("outer") as outer:
+            with tracing.span("inner", step=1) as inner:
+                logger.warning("inside")
+            assert inner.trace_id == outer.trace_id
+        logger.warning("outside")
+
+    try:
+        spans = _with_file_exporter(log_in_span)
+    finally:
+        logger.removeHandler(handler)
+    assert [s["name"] for s in spans] == ["inner", "outer"]
+    assert records[0].trace_id == spans[0]["traceId"] and records[0].span_id == spans[0]["spanId"]
+    assert records[1].trace_id == "-"
+
+def test_worker_context_and_errors():
+    def child():
+        with tracing.span("child"):
+            pass
+
+    def work():
+        with tracing.span("parent"):
+            context = tracing.current_context()
+        # 다른 프로세스에서 실행되는 것처럼 context 만 전달
+        tracing.run_with_context(context, child)
+
+    def failing():
+        try:
+            with tracing.span("boom"):
+                raise ValueError("bad")
+        except ValueError:
+            pass
+
+    spans = _with_file_exporter(lambda: (work(), failing()))
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["child"]["traceId"] == by_name["parent"]["traceId"]
+    assert by_name["child"]["parentId"] == by_name["parent"]["spanId"]
+    assert by_name["boom"]["status"] == "ERROR"
+    assert by_name["boom"]["events"][0]["attributes"]["type"] == "ValueError"
+    assert tracing.parse_traceparent("garbage") is None
+
+if __name__ == "__main__":
+    test_match_request_spans_continue_incoming_trace()
+    test_sampling_and_log_correlation()
+    test_worker_context_and_errors()
@@ -0,0 +1,88 @@
+import random
+import numpy as np
+import faiss
+import app.matching.service as matching_service
+from app.matching.service import calculate_hybrid_match, get_scale_diff_score
+from app.core.vector_format import l2_normalize
+from app.matching.models import MatchRequest, UserProfile, UserPreferences, MatchResult
+
+def _random_profile(uid, rng, dim):
+    return UserProfile(
+        id=uid, gender=rng.choice(["MALE", "MALE", "FEMALE"]), name=f"user{uid}",
+        birthYear=rng.randint(1996, 2006), smoker=rng.random() < 0.2, snoring=rng.random() < 0.3,
+        bugKiller=rng.random() < 0.5, sleepTime=rng.randint(8, 14), wakeTime=rng.randint(5, 11),
+        cleaningCycle=rng.choice(["DAILY", "EVERY_TWO_DAYS", "WEEKLY", "MONTHLY", "NEVER"]),
+        drinkingStyle=rng.choice(["RARELY", "SOMETIMES", "FREQUENTLY"]),
+        selfIntroductionEmbedding=[rng.gauss(0, 1) for _ in range(dim)],
+        roommateCriteriaEmbedding=[rng.gauss(0, 1) for _ in range(dim)],
+    )
+
+def _random_request(n, seed, dim=16):
+    rng = random.Random(seed)
+    seeker = _random_profile(0, rng, dim)
+    seeker.gender = "MALE"
+    prefs = UserPreferences(
+        preferNonSmoker=rng.random() < 0.5, preferGoodAtBugs=rng.random() < 0.5, preferQuietSleeper=rng.random() < 0.5,
+    )
+    return MatchRequest(myProfile=seeker, preferences=prefs, candidates=[_random_profile(i, rng, dim) for i in range(1, n + 1)])
+
+def reference_match(request):
+    """기존 per-candidate 루프 구현 (정답 기준)"""
+    seeker, prefs = request.myProfile, request.preferences
+    # 저장 시점 정규화(l2_normalize)와 같은 방식으로 정규화
+    seeker_vec = l2_normalize([seeker.roommateCriteriaEmbedding])
+    matrix = l2_normalize([c.selfIntroductionEmbedding for c in request.candidates])
+    index = faiss.IndexFlatIP(matrix.shape[1])
+    index.add(matrix)
+    D, I = index.search(seeker_vec, len(request.candidates))
+    text_scores_map = {request.candidates[idx].id: max(0.0, float(d)) for d, idx in zip(D[0], I[0])}
+
+    results = []
+    for cand in request.candidates:
+        if cand.id == seeker.id or cand.gender != seeker.gender: continue
+        age_p = max(0, 100 - (abs(seeker.age - cand.age) * 10)) * 0.05
+        time_p = (get_scale_diff_score(seeker.wakeTime, cand.wakeTime, 6) + get_scale_diff_score(seeker.sleepTime, cand.sleepTime, 6)) / 2.0 * 20.0
+        habit_p = (get_scale_diff_score(seeker.cleaningCycle.to_score(), cand.cleaningCycle.to_score(), 4)
+                   + get_scale_diff_score(seeker.drinkingStyle.to_score(), cand.drinkingStyle.to_score(), 2)) / 2.0 * 15.0
+        tag_score = age_p + time_p + habit_p
+        active = []
+        if prefs.preferNonSmoker: active.append(not cand.smoker)
+        if prefs.preferGoodAtBugs: active.append(cand.bugKiller)
+        if prefs.preferQuietSleeper: active.append(not cand.snoring)
+        pref_score = 30.0 if not active else (sum(active) / len(active)) * 30.0
+        text_score = text_scores_map.get(cand.id, 0.0) * 30.0
+        total = tag_score + pref_score + text_score
+        results.append(MatchResult(userId=cand.id, name=cand.name, totalScore=round(total, 1), rank=0, matchDetails={
+            "tagScore": round(tag_score, 1), "prefScore": round(pref_score, 1), "textScore": round(text_score, 1), "age": cand.age}))
+    results.sort(key=lambda x: x.totalScore, reverse=True)
+    for i, r in enumerate(results[:20]):
+        r.rank = i + 1
+    return results[:20]
+
+def test_two_stage_identical_to_exhaustive(monkeypatch):
+    for seed in range(15):
+        request = _random_request(400, seed)
+        expected = [r.model_dump() for r in reference_match(request)]
+
+        monkeypatch.setattr(matching_service, "MATCH_TWO_STAGE", False)
+        exhaustive = [r.model_dump() for r in calculate_hybrid_match(request)]
+        monkeypatch.setattr(matching_service, "MATCH_TWO_STAGE", True)
+        two_stage = [r.model_dump() for r in calculate_hybrid_match(request)]
+
+        assert exhaustive == expected
+        assert two_stage == expected
+
+def test_two_stage_skips_text_for_hopeless_candidates(monkeypatch):
+    request = _random_request(2000, 99)
+    calls = []
+    original = matching_service.compute_text_sims
+    monkeypatch.setattr(matching_service, "compute_text_sims", lambda q, cands: calls.append(len(cands)) or original(q, cands))
+    monkeypatch.setattr(matching_service, "MATCH_TWO_STAGE", True)
+
+    calculate_hybrid_match(request)
+    eligible = sum(1 for c in request.candidates if c.gender == "MALE")
+    assert sum(calls) < eligible
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
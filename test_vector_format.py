@@ -0,0 +1,74 @@
+import os
+import numpy as np
+from app.core.vector_format import l2_normalize, migrate_storage, get_format_version, VECTOR_FORMAT_VERSION, encode_vector, decode_vector
+import app.users.service as user_service
+
+def test_migrate_legacy_storage(tmp_path):
+    storage_dir = str(tmp_path / "vectors")
+    os.makedirs(storage_dir)
+
+    # v1 (legacy) 파일: 정규화되지 않은 원본 벡터
+    raw = np.array([3.0, 4.0, 0.0], dtype='float32')
+    np.save(os.path.join(storage_dir, "1_self.npy"), raw)
+    assert get_format_version(storage_dir) == 1
+
+    count = migrate_storage(storage_dir)
+
+    assert count == 1
+    assert get_format_version(storage_dir) == VECTOR_FORMAT_VERSION
+    migrated = np.load(os.path.join(storage_dir, "1_self.npy"))
+    assert np.allclose(migrated, [0.6, 0.8, 0.0])
+
+    # 두 번째 실행은 변경 없음
+    assert migrate_storage(storage_dir) == 0
+
+def test_save_and_load_normalized(tmp_path, monkeypatch):
+    storage_dir = str(tmp_path / "vectors")
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", storage_dir)
+    monkeypatch.setattr(user_service, "get_embedding", lambda text, model_type="passage": np.array([0.0, 2.0, 0.0], dtype='float32'))
+
+    user_service.save_user_vectors(1, "self", "criteria")
+
+    # 새 디렉토리는 현재 포맷으로 시작
+    assert get_format_version(storage_dir) == VECTOR_FORMAT_VERSION
+    stored = np.load(os.path.join(storage_dir, "1_self.npy"))
+    assert np.allclose(stored, [0.0, 1.0, 0.0])
+    assert np.allclose(user_service.load_user_vector(1, 'criteria'), [0.0, 1.0, 0.0])
+
+def test_load_legacy_is_normalized(tmp_path, monkeypatch):
+    storage_dir = str(tmp_path / "vectors")
+    os.makedirs(storage_dir)
+    np.save(os.path.join(storage_dir, "5_self.npy"), np.array([0.0, 0.0, 10.0], dtype='float32'))
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", storage_dir)
+
+    # 마이그레이션 전에도 로더는 정규화된 벡터를 반환
+    vec = user_service.load_user_vector(5, 'self')
+    assert np.allclose(vec, [0.0, 0.0, 1.0])
+    assert np.allclose(l2_normalize(np.zeros(3)), 0.0)
+
+def test_compact_dtypes_roundtrip():
+    vec = l2_normalize(np.random.default_rng(0).standard_normal(4096))
+
+    for dtype, max_bytes in [("float32", 4096 * 4), ("float16", 4096 * 2), ("int8", 4096 + 4)]:
+        encoded = encode_vector(vec, dtype)
+        decoded = decode_vector(encoded)
+        assert encoded.nbytes == max_bytes
+        assert decoded.dtype == np.float32
+        assert float(decoded @ vec) > 0.999
+        # 압축 dtype 도 자기 유사도 1 (two-stage 상한 SIM_UPPER_BOUND 이내)
+        assert abs(float(decoded @ decoded) - 1.0) < 1e-5
+
+def test_migrate_to_int8(tmp_path, monkeypatch):
+    storage_dir = str(tmp_path / "vectors")
+    os.makedirs(storage_dir)
+    np.save(os.path.join(storage_dir, "7_self.npy"), np.array([1.0, 2.0, 2.0], dtype='float32'))
+
+    assert migrate_storage(storage_dir, dtype="int8") == 1
+    assert np.load(os.path.join(storage_dir, "7_self.npy")).dtype == np.int8
+
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", storage_dir)
+    assert np.allclose(user_service.load_user_vector(7, 'self'), [1/3, 2/3, 2/3], atol=1e-2)
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_migrate_legacy_storage(pathlib.Path(tempfile.mkdtemp()))
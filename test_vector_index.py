@@ -0,0 +1,24 @@
+import numpy as np
+from app.matching.vector_index import build_text_index, search_text_index, INDEX_TYPES
+
+def _unit_rows(n, d, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, d)).astype('float32')
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def test_quantized_index_with_rescoring():
+    base = _unit_rows(500, 128)
+    query = base[:5] + 0.01
+
+    _, exact_ids = build_text_index(base, "flat").search(query, 20)
+
+    for index_type in INDEX_TYPES:
+        index = build_text_index(base, index_type)
+        D, I = search_text_index(index, query, 50, exact_matrix=base, rescore_k=50)
+
+        # 재계산 후 상위 20개는 정확한 경로와 동일
+        assert (I[:, :20] == exact_ids).all()
+        # 재계산된 점수는 float32 내적과 일치
+        assert np.allclose(D[:, 0], (base[I[:, 0]] * query).sum(axis=1), atol=1e-5)
+
+if __name__ == "__main__":
+    test_quantized_index_with_rescoring()
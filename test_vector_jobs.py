@@ -0,0 +1,96 @@
+import os
+import asyncio
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+import app.users.jobs as jobs
+import app.users.service as user_service
+from app.users.jobs import JobStore, VectorJobQueue
+
+client = TestClient(app)
+
+def _fake_embeddings(calls):
+    def get_embeddings(texts, model_type="passage"):
+        calls.append((model_type, list(texts)))
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype='float32')
+    return get_embeddings
+
+def test_store_survives_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job = store.enqueue(1, "self", None)
+    assert [j["id"] for j in store.claim(10)] == [job["id"]]
+    store.close()
+
+    # 처리 중 종료 -> 다시 열면 queued 로 복구
+    store = JobStore(path)
+    assert store.recover() == 1
+    claimed = store.claim(10)
+    assert claimed[0]["id"] == job["id"] and claimed[0]["attempts"] == 2
+    store.complete([job["id"]])
+    assert store.get(job["id"])["status"] == "done"
+    assert store.counts()["done"] == 1
+    store.close()
+
+def test_batch_embeds_once_and_last_edit_wins(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs, "get_embeddings", _fake_embeddings(calls))
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", str(tmp_path / "vectors"))
+    queue = VectorJobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), batch_size=16)
+
+    async def run():
+        first = await queue.enqueue(1, "old intro", "quiet")
+        second = await queue.enqueue(2, "hello", None)
+        last = await queue.enqueue(1, "a much longer new intro", None)
+        await queue.drain()
+        return [await queue.get(job["id"]) for job in (first, second, last)]
+
+    results = asyncio.run(run())
+    assert [job["status"] for job in results] == ["done", "done", "done"]
+    # 작업 3개 -> passage / query 각 1회 호출
+    assert sorted(model_type for model_type, _ in calls) == ["passage", "query"]
+    expected = np.array([len("a much longer new intro"), 1.0, 0.0])
+    assert np.allclose(user_service.load_user_vector(1, "self"), expected / np.linalg.norm(expected))
+    assert user_service.load_user_vector(1, "criteria") is not None
+    assert user_service.load_user_vector(2, "criteria") is None
+    queue.store.close()
+
+def test_failed_batch_retries_then_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "get_embeddings", lambda texts, model_type="passage": None)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+    queue = VectorJobQueue(store)
+
+    async def run():
+        job = await queue.enqueue(3, "intro", None)
+        await queue.run_once()
+        retried = await queue.get(job["id"])
+        await queue.run_once()
+        return retried, await queue.get(job["id"])
+
+    retried, failed = asyncio.run(run())
+    assert retried["status"] == "queued" and retried["attempts"] == 1
+    assert failed["status"] == "failed" and "Embedding request failed" in failed["error"]
+    store.close()
+
+def test_api_returns_202_and_reports_status(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "get_embeddings", _fake_embeddings([]))
+    monkeypatch.setattr(user_service, "VECTOR_STORAGE_PATH", str(tmp_path / "vectors"))
+    queue = VectorJobQueue(JobStore(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(jobs, "_queue", queue)
+
+    response = client.post("/api/users/vector", json={"userId": 42, "selfDescription": "clean"})
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "queued"
+    assert body["statusUrl"] == f"/api/users/vector/jobs/{body['jobId']}"
+
+    asyncio.run(queue.drain())
+    status = client.get(body["statusUrl"]).json()
+    assert status["status"] == "done" and status["userId"] == 42
+    assert os.path.exists(tmp_path / "vectors" / "42_self.npy")
+    assert client.get("/api/users/vector/jobs/unknown").status_code == 404
+    queue.store.close()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,88 @@
+import os
+import time
+import asyncio
+import tempfile
+import numpy as np
+import app.users.service as user_service
+from app.core.vector_snapshot import build_snapshot, open_snapshot
+from app.matching.workers import MatchWorkerPool, WorkerPoolBusy
+from app.matching.service import calculate_hybrid_match
+from app.matching.models import MatchRequest, UserPreferences
+from conftest import make_profile
+
+def _write_storage(storage_dir, n, d=16, seed=0):
+    """임시 저장소에 self / criteria 벡터 저장 (저장 경로는 호출 측에서 복원)"""
+    rng = np.random.default_rng(seed)
+    user_service.VECTOR_STORAGE_PATH = storage_dir
+    user_service.ensure_vector_storage()
+    for uid in range(n + 1):
+        user_service._save_vector(uid, "self", rng.standard_normal(d).astype('float32'))
+        user_service._save_vector(uid, "criteria", rng.standard_normal(d).astype('float32'))
+    return MatchRequest(
+        myProfile=make_profile(0, rng),
+        preferences=UserPreferences(preferNonSmoker=True),
+        candidates=[make_profile(uid, rng) for uid in range(1, n + 1)],
+    )
+
+def test_snapshot_lookup_and_staleness():
+    original = user_service.VECTOR_STORAGE_PATH
+    with tempfile.TemporaryDirectory() as storage_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        try:
+            _write_storage(storage_dir, 20)
+            meta = build_snapshot(storage_dir, snapshot_dir)
+            assert meta["counts"] == {"self": 21, "criteria": 21}
+
+            snapshot = open_snapshot(snapshot_dir, storage_dir)
+            for uid in (0, 7, 20):
+                assert np.array_equal(snapshot.lookup(uid, "self"), user_service.load_user_vector(uid, "self"))
+            assert snapshot.lookup(999, "self") is None
+
+            # 스냅샷 이후 갱신된 벡터는 저장소에서 직접 로드
+            path = os.path.join(storage_dir, "7_self.npy")
+            future = time.time() + 10
+            os.utime(path, (future, future))
+            assert snapshot.lookup(7, "self") is None
+        finally:
+            user_service.VECTOR_STORAGE_PATH = original
+
+def test_process_pool_matches_inline():
+    original = user_service.VECTOR_STORAGE_PATH
+    with tempfile.TemporaryDirectory() as storage_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        try:
+            request = _write_storage(storage_dir, 60, seed=1)
+            expected = [r.model_dump() for r in calculate_hybrid_match(request)]
+
+            pool = MatchWorkerPool(workers=2, snapshot_dir=snapshot_dir)
+            try:
+                async def run_all():
+                    return await asyncio.gather(*[pool.run(calculate_hybrid_match, request) for _ in range(4)])
+                results = asyncio.run(run_all())
+            finally:
+                pool.shutdown()
+
+            for result in results:
+                assert [r.model_dump() for r in result] == expected
+        finally:
+            user_service.VECTOR_STORAGE_PATH = original
+
+def test_backpressure_rejects_when_full():
+    pool = MatchWorkerPool(workers=0, max_pending=1)
+
+    async def run_two():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        try:
+            await pool.run(time.sleep, 0)
+            rejected = False
+        except WorkerPoolBusy:
+            rejected = True
+        await first
+        return rejected
+
+    assert asyncio.run(run_two())
+    assert pool.pending == 0
+
+if __name__ == "__main__":
+    test_snapshot_lookup_and_staleness()
+    test_process_pool_matches_inline()
+    test_backpressure_rejects_when_full()
@@ -0,0 +1,37 @@
+import argparse
+from app.core.projection import train_from_storage, backfill_projection, activate_projection, load_projection
+from app.users.service import VECTOR_STORAGE_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description="유저 텍스트 벡터 PCA 투영 학습 도구")
+    parser.add_argument("--dim", type=int, default=256, help="투영 차원")
+    parser.add_argument("--activate", action="store_true", help="학습한 투영을 활성 버전으로 지정")
+    parser.add_argument("--deactivate", action="store_true", help="투영 비활성화 (원본 벡터 사용)")
+    args = parser.parse_args()
+
+    print("=== PCA 투영 학습 도구 ===")
+
+    if args.deactivate:
+        activate_projection(VECTOR_STORAGE_PATH, None)
+        print("✅ 투영 비활성화 완료 (서버 재시작 필요)")
+        return
+
+    # 1. 학습 (storage/vectors 전체)
+    print(f"{VECTOR_STORAGE_PATH} 벡터로 {args.dim}차원 PCA 학습 중...")
+    name = train_from_storage(VECTOR_STORAGE_PATH, args.dim)
+    projection = load_projection(VECTOR_STORAGE_PATH, name)
+    print(f"- 버전: {name} ({projection.d_in} → {projection.d_out})")
+
+    # 2. 기존 벡터 투영본 생성
+    count = backfill_projection(VECTOR_STORAGE_PATH, name)
+    print(f"- 투영 벡터 {count}개 저장: {projection.directory}")
+
+    # 3. 활성화
+    if args.activate:
+        activate_projection(VECTOR_STORAGE_PATH, name)
+        print("- 활성 버전으로 지정 (서버 재시작 필요)")
+
+    print("\n✅ 완료!")
+
+if __name__ == "__main__":
+    main()